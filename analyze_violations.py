@@ -4,10 +4,11 @@ Violation Analysis Tool - Analyze detected traffic violations
 """
 
 import sqlite3
-import pandas as pd
 from datetime import datetime
 
 def analyze_violations():
+    import pandas as pd
+    
     print("Traffic Violation Analysis")
     print("=" * 40)
     
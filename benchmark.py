@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Per-stage pipeline benchmark
+Times every stage of the violation pipeline over the sample clips and
+synthetic frames, saves the numbers as JSON and compares them with a baseline
+
+Usage:
+    python benchmark.py                                  # run and save outputs/benchmarks/benchmark_<time>.json
+    python benchmark.py --save-baseline                  # also store the run as the baseline
+    python benchmark.py --compare                        # run and flag regressions against the baseline
+    python benchmark.py --current run.json --compare     # compare a saved run without re-running
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+sys.path.append('src')
+
+# cv2, numpy, ultralytics and the pipeline modules are imported in run_benchmarks
+
+OUTPUT_DIR = "outputs/benchmarks"
+BASELINE_PATH = os.path.join(OUTPUT_DIR, "baseline.json")
+
+# A stage regresses when a latency percentile grows by more than the tolerance
+# and by more than MIN_DELTA_MS, so sub-microsecond stages do not flap
+COMPARED_PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+MIN_DELTA_MS = 0.05
+
+def summarize(samples):
+    """Throughput and latency percentiles for a list of per-item durations in seconds"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    total = sum(ordered)
+
+    def percentile(q):
+        # Nearest-rank percentile
+        return ordered[min(count, max(1, math.ceil(q * count - 1e-9))) - 1] * 1000
+
+    return {
+        "count": count,
+        "throughput_per_s": count / total if total > 0 else 0.0,
+        "mean_ms": total / count * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99)
+    }
+
+class StageTimer:
+    """Collect per-item durations by stage name"""
+
+    def __init__(self):
+        self.samples = {}
+        self.skipped = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def skip(self, stage, reason):
+        self.skipped[stage] = reason
+
+    def results(self):
+        return {stage: summarize(samples) for stage, samples in self.samples.items() if samples}
+
+def synthetic_scene(index, width=1280, height=720):
+    """A synthetic frame and the detections of what was drawn in it
+
+    Each frame has a road, a red light, cars in the bottom band (so the
+    red-light rule fires), a motorcycle with a bare-headed rider and a
+    pedestrian on a crosswalk. Positions shift with index so the tracking
+    rules see movement.
+    """
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(index)
+    frame = rng.integers(90, 110, (height, width, 3), dtype=np.uint8)
+    detections = []
+
+    # Crosswalk stripes
+    for x in range(0, width, 80):
+        cv2.rectangle(frame, (x, int(height * 0.62)), (x + 40, int(height * 0.68)), (235, 235, 235), -1)
+
+    # Traffic light with the red lamp lit
+    cv2.rectangle(frame, (60, 40), (100, 160), (30, 30, 30), -1)
+    cv2.circle(frame, (80, 65), 15, (0, 0, 255), -1)
+    detections.append([60, 40, 100, 160, 0.9, 9])
+
+    shift = (index * 12) % 200
+    for k in range(3):
+        x1 = 250 + k * 300 + shift
+        y1 = int(height * 0.6) + k * 20
+        x2, y2 = x1 + 220, y1 + 150
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (40 + 60 * k, 80, 200), -1)
+        # Plate band
+        cv2.rectangle(frame, (x1 + 70, y2 - 35), (x2 - 70, y2 - 10), (255, 255, 255), -1)
+        cv2.putText(frame, f"KA0{k}AB{1000 + index % 9000}", (x1 + 72, y2 - 15),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+        detections.append([x1, y1, x2, y2, 0.85, 2])
+
+    # Motorcycle with a rider whose head region is light (no helmet)
+    mx1, my1 = 150 + shift, int(height * 0.35)
+    cv2.rectangle(frame, (mx1, my1 + 60), (mx1 + 90, my1 + 160), (20, 20, 20), -1)
+    cv2.rectangle(frame, (mx1 + 15, my1), (mx1 + 75, my1 + 120), (180, 200, 220), -1)
+    detections.append([mx1, my1 + 60, mx1 + 90, my1 + 160, 0.8, 3])
+    detections.append([mx1 + 15, my1, mx1 + 75, my1 + 120, 0.8, 0])
+
+    # Pedestrian on the crosswalk
+    detections.append([700, int(height * 0.55), 740, int(height * 0.7), 0.75, 0])
+
+    return frame, np.array(detections, dtype=np.float32)
+
+def load_clip_frames(frames_per_clip):
+    """Decode up to frames_per_clip frames from each sample clip, timing each decode"""
+    from frame_source import FrameSource
+
+    decode_times, frames = [], []
+    for path in sorted(glob.glob("data/samples/*.mp4")):
+        source = iter(FrameSource(path, end_frame=frames_per_clip))
+        while True:
+            start = time.perf_counter()
+            item = next(source, None)
+            if item is None:
+                break
+            decode_times.append(time.perf_counter() - start)
+            frames.append(item[2])
+    return frames, decode_times
+
+def run_benchmarks(model_path="yolov8n.pt", frames_per_clip=60, synthetic_frames=60, warmup=3):
+    """Time each pipeline stage and return the result document"""
+    import cv2
+    import sqlite3
+    from ultralytics import YOLO
+    from local_processor import (LocalTrafficProcessor, DETECTOR_CONF, DETECTOR_INPUT, results_to_detections)
+    from violation_db import ensure_violations_table, insert_violation
+
+    class BenchmarkProcessor(LocalTrafficProcessor):
+        # Rule state without touching the session database
+        def setup_database(self):
+            self.conn = sqlite3.connect(':memory:')
+            ensure_violations_table(self.conn)
+
+    timer = StageTimer()
+
+    print("🎞️  Decoding sample clips...")
+    clip_frames, decode_times = load_clip_frames(frames_per_clip)
+    timer.samples["decode"] = decode_times
+    if not clip_frames:
+        timer.skip("decode", "no clips in data/samples")
+
+    scenes = [synthetic_scene(index) for index in range(synthetic_frames)]
+    # Rules run on model detections for clip frames and on the drawn boxes for synthetic ones
+    inputs = [(frame, None) for frame in clip_frames] + scenes
+
+    model = YOLO(model_path)
+    processor = BenchmarkProcessor(record_clips=False, model=model, drift_db=None)
+    # The full pass keeps its own dedup and position state, so the per-rule
+    # timings above it cannot mark vehicles as already handled
+    full_pass = BenchmarkProcessor(record_clips=False, model=model, drift_db=None)
+    for frame, _ in inputs[:warmup]:
+        model(cv2.resize(frame, DETECTOR_INPUT), conf=DETECTOR_CONF, device='cpu', verbose=False)
+
+    print(f"⏱️  Timing {len(inputs)} frames ({len(clip_frames)} from clips, {len(scenes)} synthetic)...")
+    vehicle_crops = []
+    for frame_num, (frame, drawn) in enumerate(inputs):
+        resized = timer.time("resize", cv2.resize, frame, DETECTOR_INPUT)
+        results = timer.time("inference", model, resized, conf=DETECTOR_CONF, device='cpu', verbose=False)
+        detections = timer.time("postprocess", results_to_detections, [frame], results)[0]
+        if drawn is not None:
+            detections = drawn
+        vehicles, traffic_lights, persons = timer.time("group_detections", processor.group_detections, detections)
+
+        for light in traffic_lights:
+            x1, y1, x2, y2 = light['bbox']
+            timer.time("traffic_light_color", processor.detect_traffic_light_color, frame[y1:y2, x1:x2])
+        for motorcycle in vehicles['motorcycles']:
+            timer.time("helmet", processor.check_helmet_violation, frame, motorcycle, persons)
+
+        timer.time("rule_red_light", processor.detect_red_light, frame, traffic_lights)
+        timer.time("rule_speeding", processor.check_speeding_violations, vehicles, frame_num)
+        timer.time("rule_wrong_way", processor.check_wrong_way_violations, vehicles, frame_num)
+        timer.time("rule_lane", processor.check_lane_violations, frame, vehicles, frame_num)
+        timer.time("rule_parking", processor.check_parking_violations, vehicles, frame_num)
+        timer.time("rule_tailgating", processor.check_tailgating_violations, vehicles, frame_num)
+        timer.time("rule_crosswalk", processor.check_crosswalk_violations, frame, vehicles, persons, frame_num)
+        timer.time("violation_rules", full_pass.detect_violations_from_detections, frame, detections, frame_num)
+
+        timer.time("jpeg_encode", cv2.imencode, '.jpg', frame)
+
+        for vehicle_list in vehicles.values():
+            for vehicle in vehicle_list[:1]:
+                x1, y1, x2, y2 = [max(0, coord) for coord in vehicle['bbox']]
+                vehicle_crops.append(frame[y1:y2, x1:x2])
+
+    # OCR is timed per vehicle, as the plate queue reads them
+    if processor.plate_detector is None:
+        timer.skip("ocr", "Tesseract not available")
+    else:
+        for crop in vehicle_crops:
+            timer.time("ocr", processor.plate_detector.read_vehicle_plates, [crop])
+
+    # One insert and commit per violation, as save_violation does
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(OUTPUT_DIR, "benchmark_insert.db"))
+    conn.execute("DROP TABLE IF EXISTS violations")
+    ensure_violations_table(conn)
+
+    def insert_one(index):
+        insert_violation(conn, datetime.now().isoformat(), 'red_light_violation', f"outputs/violations/{index}.jpg",
+                         f"car_{index}", 'Benchmark', '0, 0', 'CAM_001', plate_number=f"KA01AB{index:04d}")
+        conn.commit()
+
+    for index in range(200):
+        timer.time("db_insert", insert_one, index)
+    conn.close()
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "model": model_path,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "clip_frames": len(clip_frames),
+            "synthetic_frames": len(scenes)
+        },
+        "stages": timer.results(),
+        "skipped": timer.skipped
+    }
+
+def compare_results(current, baseline, tolerance=0.10):
+    """Per-stage comparison rows; a stage regresses when a latency percentile is more than tolerance slower"""
+    rows = []
+    for stage, stats in current["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None:
+            rows.append({"stage": stage, "status": "new"})
+            continue
+
+        changes = {}
+        regressed = False
+        for key in COMPARED_PERCENTILES:
+            change = (stats[key] - base[key]) / base[key] if base[key] > 0 else 0.0
+            changes[key] = change
+            if change > tolerance and stats[key] - base[key] > MIN_DELTA_MS:
+                regressed = True
+        improved = all(change < -tolerance for change in changes.values())
+        rows.append({"stage": stage, "status": "regressed" if regressed else "improved" if improved else "ok",
+                     "p50_ms": stats["p50_ms"], "baseline_p50_ms": base["p50_ms"], "changes": changes})
+
+    for stage in baseline["stages"]:
+        if stage not in current["stages"]:
+            rows.append({"stage": stage, "status": "missing"})
+    return rows
+
+def print_results(results):
+    print(f"\n{'stage':<22}{'n':>6}{'items/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<22}{stats['count']:>6}{stats['throughput_per_s']:>11.1f}"
+              f"{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    for stage, reason in results.get("skipped", {}).items():
+        print(f"{stage:<22}skipped: {reason}")
+
+def print_comparison(rows, tolerance):
+    icons = {"regressed": "❌", "improved": "✅", "ok": "  ", "new": "🆕", "missing": "⚠️ "}
+    print(f"\nComparison with baseline (tolerance {tolerance:.0%}):")
+    for row in rows:
+        line = f"{icons[row['status']]} {row['stage']:<22}{row['status']:<10}"
+        if "changes" in row:
+            line += f"p50 {row['baseline_p50_ms']:.3f} → {row['p50_ms']:.3f} ms  " + "  ".join(
+                f"{key[:-3]} {change:+.1%}" for key, change in row["changes"].items())
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--frames-per-clip", type=int, default=60)
+    parser.add_argument("--synthetic-frames", type=int, default=60)
+    parser.add_argument("--output", help="result path (default outputs/benchmarks/benchmark_<time>.json)")
+    parser.add_argument("--current", help="compare this saved result instead of running")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="flag regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if args.current:
+        with open(args.current) as f:
+            results = json.load(f)
+    else:
+        results = run_benchmarks(args.model, args.frames_per_clip, args.synthetic_frames)
+        output = args.output or os.path.join(OUTPUT_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📁 Results saved: {output}")
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved: {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare_results(results, baseline, args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if any(row["status"] == "regressed" for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -282,12 +282,12 @@ class TrafficViolationModel:
         print(f"Total frames: {total_frames}, FPS: {fps}, Resolution: {width}x{height}")
         
         while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Process frame
             if frame_count % frame_skip == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                # Process frame
                 detections = self.detect_objects(frame)
                 detections_count += len(detections)
                 
@@ -303,6 +303,9 @@ class TrafficViolationModel:
                     cv2.imshow('Detection Preview', annotated_frame)
                     if cv2.waitKey(1) & 0xFF == ord('q'):
                         break
+            elif not cap.grab():
+                # grab() still decodes skipped frames; only retrieve() and its conversion are skipped
+                break
             
             frame_count += 1
             
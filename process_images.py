@@ -6,7 +6,8 @@ Standalone script to process traffic images for violations
 import os
 import sys
 import glob
-from src.image_processor import ImageViolationProcessor
+sys.path.append('src')
+from image_processor import ImageViolationProcessor
 
 def main():
     print("🚦 Traffic Violation Image Processor")
@@ -26,8 +27,24 @@ def main():
         return
     
     print(f"Found {len(image_files)} image(s) to process:")
-    for img in image_files:
+    for img in image_files[:20]:
         print(f"  - {os.path.basename(img)}")
+    if len(image_files) > 20:
+        print(f"  ... and {len(image_files) - 20} more")
+    
+    if '--bulk' in sys.argv:
+        from bulk_ingest import BulkImageIngestor
+        
+        ingestor = BulkImageIngestor()
+        summary = ingestor.ingest(sorted({os.path.normpath(path) for path in image_files}))
+        
+        print(f"\n🎯 Summary:")
+        print(f"  - Images processed: {summary['processed']}")
+        print(f"  - Already done (manifest): {summary['skipped']}")
+        print(f"  - Unreadable: {summary['unreadable']}")
+        print(f"  - Total violations found: {summary['violations']}")
+        print(f"  - Manifest: {ingestor.manifest_path}")
+        return
     
     # Process images
     processor = ImageViolationProcessor()
@@ -8,9 +8,7 @@ import sys
 import os
 sys.path.append('src')
 
-from src.adversarial_testing import run_adversarial_tests
-from src.explainability import generate_explainability_reports
-from src.audit_report import run_complete_audit
+# Each step imports its own (heavy) dependencies when it runs
 
 def main():
     """Run complete model analysis pipeline"""
@@ -25,16 +23,19 @@ def main():
     try:
         # Step 1: Adversarial Testing
         print("\n📊 Step 1: Running Adversarial Testing...")
+        from src.adversarial_testing import run_adversarial_tests
         adversarial_results = run_adversarial_tests()
         print("✅ Adversarial testing completed!")
         
         # Step 2: Explainability Analysis
         print("\n🔍 Step 2: Generating Explainability Reports...")
+        from src.explainability import generate_explainability_reports
         explainability_results = generate_explainability_reports()
         print("✅ Explainability analysis completed!")
         
         # Step 3: Comprehensive Audit
         print("\n📋 Step 3: Generating Audit Report...")
+        from src.audit_report import run_complete_audit
         audit_results = run_complete_audit()
         print("✅ Audit report completed!")
         
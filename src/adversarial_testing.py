@@ -3,23 +3,59 @@ import numpy as np
 import torch
 from ultralytics import YOLO
 import json
+import hashlib
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor
+from cache_utils import ResultCache, file_digest, model_digest
+
+# (test name, perturbation method, keyword arguments)
+ADVERSARIAL_TESTS = [
+    ("gaussian_noise_low", "add_noise", {"noise_type": "gaussian", "intensity": 0.05}),
+    ("gaussian_noise_high", "add_noise", {"noise_type": "gaussian", "intensity": 0.15}),
+    ("salt_pepper", "add_noise", {"noise_type": "salt_pepper", "intensity": 0.1}),
+    ("blur", "add_noise", {"noise_type": "blur", "intensity": 0.3}),
+    ("dark_bias", "brightness_bias", {"factor": 0.3}),
+    ("bright_bias", "brightness_bias", {"factor": 1.5}),
+    ("rain_weather", "weather_simulation", {"weather_type": "rain"}),
+    ("fog_weather", "weather_simulation", {"weather_type": "fog"})
+]
+
+def perturbation_digest(method, kwargs):
+    """Short hash of a perturbation method and its parameters"""
+    return hashlib.sha1(json.dumps([method, kwargs], sort_keys=True).encode()).hexdigest()[:12]
 
 class AdversarialTester:
-    def __init__(self, model_path="yolov8n.pt"):
+    def __init__(self, model_path="yolov8n.pt", seed=0, cache_path=None):
         self.model = YOLO(model_path)
+        self.model_hash = model_digest(model_path)
+        self.seed = seed
+        self.cache = ResultCache(cache_path) if cache_path else None
         self.results = []
+        self._buffers = {}
+    
+    def _buffer(self, name, shape):
+        """Scratch float32 array reused across images of the same size"""
+        key = (name, shape)
+        if key not in self._buffers:
+            self._buffers[key] = np.empty(shape, dtype=np.float32)
+        return self._buffers[key]
         
-    def add_noise(self, image, noise_type="gaussian", intensity=0.1):
+    def add_noise(self, image, noise_type="gaussian", intensity=0.1, rng=None):
         """Add different types of noise to test robustness"""
+        rng = rng if rng is not None else np.random.default_rng()
         if noise_type == "gaussian":
-            noise = np.random.normal(0, intensity * 255, image.shape).astype(np.uint8)
-            return cv2.add(image, noise)
+            noisy = self._buffer("noise", image.shape)
+            rng.standard_normal(out=noisy, dtype=np.float32)
+            noisy *= intensity * 255
+            noisy += image
+            np.clip(noisy, 0, 255, out=noisy)
+            return noisy.astype(np.uint8)
         elif noise_type == "salt_pepper":
             noisy = image.copy()
             prob = intensity
-            random_matrix = np.random.random(image.shape[:2])
+            random_matrix = self._buffer("mask", image.shape[:2])
+            rng.random(out=random_matrix, dtype=np.float32)
             noisy[random_matrix < prob/2] = 0
             noisy[random_matrix > 1-prob/2] = 255
             return noisy
@@ -28,60 +64,82 @@ class AdversarialTester:
             return cv2.GaussianBlur(image, (kernel_size, kernel_size), 0)
         return image
     
-    def brightness_bias(self, image, factor=0.5):
+    def brightness_bias(self, image, factor=0.5, rng=None):
         """Test with different brightness levels"""
         return cv2.convertScaleAbs(image, alpha=factor, beta=0)
     
-    def weather_simulation(self, image, weather_type="rain"):
+    def weather_simulation(self, image, weather_type="rain", rng=None):
         """Simulate weather conditions"""
+        rng = rng if rng is not None else np.random.default_rng()
         if weather_type == "rain":
-            rain_drops = np.random.randint(0, 255, (image.shape[0]//10, image.shape[1]//10))
+            rain_drops = rng.integers(0, 255, (image.shape[0]//10, image.shape[1]//10), dtype=np.uint8)
             rain_drops = cv2.resize(rain_drops, (image.shape[1], image.shape[0]))
             rain_drops = cv2.cvtColor(rain_drops, cv2.COLOR_GRAY2BGR)
             return cv2.addWeighted(image, 0.8, rain_drops, 0.2, 0)
         elif weather_type == "fog":
-            fog = np.ones_like(image) * 200
+            fog = np.full_like(image, 200)
             return cv2.addWeighted(image, 0.7, fog, 0.3, 0)
         return image
     
     def test_adversarial_inputs(self, image_path):
-        """Run comprehensive adversarial tests"""
+        """Run comprehensive adversarial tests
+        
+        The original and every perturbed image go through the model in one
+        batch. Each perturbation draws from its own generator seeded by
+        (seed, image hash, perturbation digest), so results are reproducible
+        whichever process runs them. With a cache, results are stored per
+        model hash, image hash, seed, test and perturbation digest, so
+        changing a test's parameters reruns it; only missing tests run.
+        """
         original_image = cv2.imread(image_path)
         if original_image is None:
             return None
-            
-        # Original detection
-        original_results = self.model(original_image)
-        original_detections = len(original_results[0].boxes) if original_results[0].boxes is not None else 0
         
-        test_results = {
-            "original": {"detections": original_detections, "confidence": self._get_avg_confidence(original_results)},
-            "adversarial_tests": {}
-        }
+        image_hash = file_digest(image_path)
+        digests = {"original": perturbation_digest(None, {})}
+        digests.update((name, perturbation_digest(method, kwargs)) for name, method, kwargs in ADVERSARIAL_TESTS)
+        keys = {name: f"{self.model_hash}:{image_hash}:{self.seed}:{name}:{digest}" for name, digest in digests.items()}
+        scores = self.cache.get_many(keys.values()) if self.cache else {}
+        scores = {name: scores[key] for name, key in keys.items() if key in scores}
         
         # Test different adversarial conditions
-        tests = [
-            ("gaussian_noise_low", lambda img: self.add_noise(img, "gaussian", 0.05)),
-            ("gaussian_noise_high", lambda img: self.add_noise(img, "gaussian", 0.15)),
-            ("salt_pepper", lambda img: self.add_noise(img, "salt_pepper", 0.1)),
-            ("blur", lambda img: self.add_noise(img, "blur", 0.3)),
-            ("dark_bias", lambda img: self.brightness_bias(img, 0.3)),
-            ("bright_bias", lambda img: self.brightness_bias(img, 1.5)),
-            ("rain_weather", lambda img: self.weather_simulation(img, "rain")),
-            ("fog_weather", lambda img: self.weather_simulation(img, "fog"))
-        ]
+        batch, batch_names = [], []
+        if "original" not in scores:
+            batch.append(original_image)
+            batch_names.append("original")
+        for test_name, method, kwargs in ADVERSARIAL_TESTS:
+            if test_name in scores:
+                continue
+            rng = np.random.default_rng([self.seed, int(image_hash[:12], 16), int(digests[test_name], 16)])
+            batch.append(getattr(self, method)(original_image, rng=rng, **kwargs))
+            batch_names.append(test_name)
+        
+        if batch:
+            results = self.model(batch, verbose=False)
+            computed = {}
+            for name, result in zip(batch_names, results):
+                computed[name] = {
+                    "detections": len(result.boxes) if result.boxes is not None else 0,
+                    "confidence": self._get_avg_confidence([result])
+                }
+            scores.update(computed)
+            if self.cache:
+                self.cache.set_many({keys[name]: value for name, value in computed.items()})
         
-        for test_name, transform in tests:
-            modified_image = transform(original_image)
-            results = self.model(modified_image)
-            detections = len(results[0].boxes) if results[0].boxes is not None else 0
-            confidence = self._get_avg_confidence(results)
+        original = scores["original"]
+        test_results = {
+            "original": original,
+            "adversarial_tests": {}
+        }
+        for test_name, _, _ in ADVERSARIAL_TESTS:
+            detections = scores[test_name]["detections"]
+            confidence = scores[test_name]["confidence"]
             
             test_results["adversarial_tests"][test_name] = {
                 "detections": detections,
                 "confidence": confidence,
-                "detection_drop": original_detections - detections,
-                "confidence_drop": test_results["original"]["confidence"] - confidence
+                "detection_drop": original["detections"] - detections,
+                "confidence_drop": original["confidence"] - confidence
             }
         
         return test_results
@@ -92,7 +150,8 @@ class AdversarialTester:
             return 0.0
         return float(results[0].boxes.conf.mean())
     
-    def generate_bias_report(self, test_results):
+    @staticmethod
+    def generate_bias_report(test_results):
         """Generate bias and robustness report"""
         if not test_results:
             return None
@@ -133,30 +192,53 @@ class AdversarialTester:
             
         return report
 
-def run_adversarial_tests():
-    """Run adversarial tests on sample images"""
-    tester = AdversarialTester()
-    sample_dir = "data/samples"
-    results_dir = "outputs/adversarial_tests"
-    
+_worker_tester = None
+
+def _init_worker(model_path, seed, cache_path, threads):
+    """Load the model once per worker process"""
+    global _worker_tester
+    torch.set_num_threads(threads)
+    _worker_tester = AdversarialTester(model_path, seed=seed, cache_path=cache_path)
+
+def _test_image(image_path):
+    return image_path, _worker_tester.test_adversarial_inputs(image_path)
+
+def run_adversarial_tests(sample_dir="data/samples", results_dir="outputs/adversarial_tests", model_path="yolov8n.pt",
+                          workers=None, seed=0, cache_path="outputs/adversarial_tests/results_cache.db"):
+    """Run adversarial tests on sample images, spread over `workers` processes"""
     os.makedirs(results_dir, exist_ok=True)
     
     # Test on sample images
-    image_files = [f for f in os.listdir(sample_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    image_files = sorted(f for f in os.listdir(sample_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+    image_paths = [os.path.join(sample_dir, image_file) for image_file in image_files]
+    
+    workers = workers or min(4, os.cpu_count() or 1)
+    workers = min(workers, len(image_paths)) or 1
+    if workers == 1:
+        tester = AdversarialTester(model_path, seed=seed, cache_path=cache_path)
+        outcomes = ((path, tester.test_adversarial_inputs(path)) for path in image_paths)
+    else:
+        # Split the CPU threads between workers so they do not oversubscribe
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(model_path, seed, cache_path, max(1, (os.cpu_count() or 1) // workers)))
+        outcomes = pool.map(_test_image, image_paths)
     
     all_results = {}
-    for image_file in image_files:
-        image_path = os.path.join(sample_dir, image_file)
-        test_results = tester.test_adversarial_inputs(image_path)
-        if test_results:
-            all_results[image_file] = test_results
-            
-            # Generate individual bias report
-            bias_report = tester.generate_bias_report(test_results)
-            if bias_report:
-                report_path = os.path.join(results_dir, f"{image_file}_bias_report.json")
-                with open(report_path, 'w') as f:
-                    json.dump(bias_report, f, indent=2)
+    try:
+        for image_path, test_results in outcomes:
+            image_file = os.path.basename(image_path)
+            if test_results:
+                all_results[image_file] = test_results
+                
+                # Generate individual bias report
+                bias_report = AdversarialTester.generate_bias_report(test_results)
+                if bias_report:
+                    report_path = os.path.join(results_dir, f"{image_file}_bias_report.json")
+                    with open(report_path, 'w') as f:
+                        json.dump(bias_report, f, indent=2)
+    finally:
+        if workers > 1:
+            pool.shutdown()
     
     # Save comprehensive results
     with open(os.path.join(results_dir, "adversarial_test_results.json"), 'w') as f:
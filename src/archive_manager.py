@@ -38,17 +38,47 @@ def view_archived_data():
         conn.close()
         print(f"{i+1}. {file} - {count} violations")
 
+def index_archived_plates():
+    """Add plates of older sessions to the plate search index (offender counters are built on connect)"""
+    from plate_index import find_session_databases, index_violation_plates
+    from violation_db import connect
+
+    for file in find_session_databases():
+        conn = connect(file)
+        with conn:
+            added = index_violation_plates(conn)
+        conn.close()
+        print(f"{file} - {added} plates indexed")
+
+def search_plate(query):
+    """Fuzzy plate lookup across the current session and all archives"""
+    from plate_index import search_archives
+
+    matches = search_archives(query)
+    if not matches:
+        print("No matching plates found")
+        return
+    for match in matches:
+        print(f"{match['plate_number']} (distance {match['distance']}) - {match['violation_type']} "
+              f"{match['timestamp']} [{match['database']}]")
+
 if __name__ == "__main__":
     print("Archive Manager")
     print("1. Clear current session")
     print("2. Archive old data") 
     print("3. View archived data")
+    print("4. Index plates in archives")
+    print("5. Search plate")
     
-    choice = input("Choose option (1-3): ")
+    choice = input("Choose option (1-5): ")
     
     if choice == "1":
         clear_current_session()
     elif choice == "2":
         archive_old_data()
     elif choice == "3":
-        view_archived_data()
\ No newline at end of file
+        view_archived_data()
+    elif choice == "4":
+        index_archived_plates()
+    elif choice == "5":
+        search_plate(input("Plate number: "))
\ No newline at end of file
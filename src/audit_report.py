@@ -7,13 +7,17 @@ import seaborn as sns
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import os
 import sqlite3
-from ultralytics import YOLO
-import cv2
+from evaluation import EvaluationHarness, load_dataset_manifest
+from drift_monitor import SKETCH_DB, camera_drift
 
 class ModelAuditor:
-    def __init__(self, model_path="yolov8n.pt", db_path="current_session.db"):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path="yolov8n.pt", db_path="current_session.db",
+                 prediction_cache="outputs/audit_reports/prediction_cache.db", sketch_db=SKETCH_DB):
+        # Predictions come from the cached harness; the model itself is only
+        # loaded if some image has not been scored with these weights yet
+        self.harness = EvaluationHarness(model_path, cache_path=prediction_cache)
         self.db_path = db_path
+        self.sketch_db = sketch_db  # written by the processors' DriftMonitors
         self.baseline_metrics = None
         
     def calculate_model_drift(self, current_predictions, baseline_predictions=None):
@@ -50,6 +54,10 @@ class ModelAuditor:
             "drift_level": "High" if drift_score > 0.3 else "Medium" if drift_score > 0.1 else "Low"
         }
     
+    def calculate_camera_drift(self, recent_hours=3, baseline_hours=168):
+        """Per-camera drift of the last recent_hours against the week before, from the stored sketches"""
+        return camera_drift(self.sketch_db, recent_hours, baseline_hours)
+    
     def calculate_fairness_metrics(self, predictions_by_group):
         """Calculate fairness metrics across different groups"""
         fairness_metrics = {}
@@ -87,39 +95,32 @@ class ModelAuditor:
             "fairness_level": "High" if fairness_score > 0.8 else "Medium" if fairness_score > 0.6 else "Low"
         }
     
-    def calculate_accuracy_metrics(self, test_images_dir="data/samples"):
-        """Calculate model accuracy on test dataset"""
-        image_files = [f for f in os.listdir(test_images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    def calculate_accuracy_metrics(self, test_images_dir="data/samples", manifest_path=None):
+        """Calculate model accuracy on test dataset (a manifest, or every image in test_images_dir)"""
+        entries = load_dataset_manifest(manifest_path, test_images_dir)
+        predictions = self.harness.predict(entries)
+        names = self.harness.class_names if any(predictions.values()) else {}
         
         total_predictions = 0
         correct_predictions = 0
         all_confidences = []
         class_counts = {}
         
-        for image_file in image_files:
-            image_path = os.path.join(test_images_dir, image_file)
-            image = cv2.imread(image_path)
-            
-            if image is not None:
-                results = self.model(image)
+        for rows in predictions.values():
+            for *_, confidence, class_id in rows:
+                class_name = names[int(class_id)]
+                
+                all_confidences.append(confidence)
+                class_counts[class_name] = class_counts.get(class_name, 0) + 1
+                total_predictions += 1
                 
-                if results[0].boxes is not None:
-                    for box in results[0].boxes:
-                        confidence = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        class_name = self.model.names[class_id]
-                        
-                        all_confidences.append(confidence)
-                        class_counts[class_name] = class_counts.get(class_name, 0) + 1
-                        total_predictions += 1
-                        
-                        # Simple accuracy approximation (confidence > 0.5 = correct)
-                        if confidence > 0.5:
-                            correct_predictions += 1
+                # Simple accuracy approximation (confidence > 0.5 = correct)
+                if confidence > 0.5:
+                    correct_predictions += 1
         
         accuracy = correct_predictions / total_predictions if total_predictions > 0 else 0
         avg_confidence = np.mean(all_confidences) if all_confidences else 0
-        detection_rate = total_predictions / len(image_files) if image_files else 0
+        detection_rate = total_predictions / len(predictions) if predictions else 0
         
         # Normalize class distribution
         total_detections = sum(class_counts.values())
@@ -130,21 +131,40 @@ class ModelAuditor:
             "avg_confidence": avg_confidence,
             "detection_rate": detection_rate,
             "total_predictions": total_predictions,
+            "images_evaluated": len(predictions),
+            "images_scored": self.harness.scored,
             "class_distribution": class_distribution,
             "precision": accuracy,  # Simplified for demo
             "recall": detection_rate,
             "f1_score": 2 * (accuracy * detection_rate) / (accuracy + detection_rate) if (accuracy + detection_rate) > 0 else 0
         }
     
-    def generate_audit_report(self):
+    def predictions_by_group(self, manifest_path):
+        """Per-image fairness inputs grouped by the manifest's "group" key, from cached predictions"""
+        entries = [entry for entry in load_dataset_manifest(manifest_path) if entry.get('group')]
+        predictions = self.harness.predict(entries)
+        groups = {}
+        for entry in entries:
+            rows = predictions.get(entry['path'])
+            if rows is None:
+                continue
+            groups.setdefault(entry['group'], []).append({
+                "detected": bool(rows),
+                "confidence": max((row[4] for row in rows), default=0.0),
+                "false_positive": False  # no labels to tell
+            })
+        return groups
+    
+    def generate_audit_report(self, test_images_dir="data/samples", manifest_path=None):
         """Generate comprehensive audit report"""
         print("Generating comprehensive audit report...")
         
         # Calculate current model performance
-        current_metrics = self.calculate_accuracy_metrics()
+        current_metrics = self.calculate_accuracy_metrics(test_images_dir, manifest_path)
         
         # Calculate model drift
         drift_metrics = self.calculate_model_drift(current_metrics)
+        camera_drift_metrics = self.calculate_camera_drift()
         
         # Simulate fairness testing with different groups
         # In real scenario, you'd have labeled data by demographic groups
@@ -166,7 +186,9 @@ class ModelAuditor:
             ]
         }
         
-        fairness_metrics = self.calculate_fairness_metrics(simulated_groups)
+        # A manifest with "group" labels replaces the simulated groups
+        groups = self.predictions_by_group(manifest_path) if manifest_path else {}
+        fairness_metrics = self.calculate_fairness_metrics(groups or simulated_groups)
         
         # Load adversarial test results if available
         adversarial_results = {}
@@ -189,7 +211,8 @@ class ModelAuditor:
             },
             "model_drift": {
                 "drift_analysis": drift_metrics,
-                "drift_recommendation": self._get_drift_recommendation(drift_metrics)
+                "drift_recommendation": self._get_drift_recommendation(drift_metrics),
+                "camera_drift": camera_drift_metrics
             },
             "fairness_analysis": {
                 "fairness_metrics": fairness_metrics,
@@ -206,7 +229,8 @@ class ModelAuditor:
                 "risk_level": "Medium",
                 "next_audit_date": (datetime.now() + timedelta(days=30)).isoformat()
             },
-            "recommendations": self._generate_recommendations(current_metrics, drift_metrics, fairness_metrics)
+            "recommendations": self._generate_recommendations(current_metrics, drift_metrics, fairness_metrics,
+                                                              camera_drift_metrics)
         }
         
         # Save audit report
@@ -292,10 +316,15 @@ class ModelAuditor:
         
         return np.mean(all_stability_scores) if all_stability_scores else 0.5
     
-    def _generate_recommendations(self, performance, drift, fairness):
+    def _generate_recommendations(self, performance, drift, fairness, camera_drift_metrics=None):
         """Generate actionable recommendations"""
         recommendations = []
         
+        for camera_id, metrics in sorted((camera_drift_metrics or {}).items()):
+            if metrics["drift_level"] == "High":
+                recommendations.append(f"Check camera {camera_id}: detections shifted in the last hours "
+                                       "(dirty lens, moved camera or firmware change)")
+        
         if performance["accuracy"] < 0.7:
             recommendations.append("Improve model accuracy through additional training data and hyperparameter tuning")
         
@@ -373,10 +402,10 @@ class ModelAuditor:
         plt.savefig(save_path, dpi=300, bbox_inches='tight')
         plt.close()
 
-def run_complete_audit():
+def run_complete_audit(manifest_path=None):
     """Run complete model audit"""
     auditor = ModelAuditor()
-    audit_report = auditor.generate_audit_report()
+    audit_report = auditor.generate_audit_report(manifest_path=manifest_path)
     
     print("\n" + "="*50)
     print("MODEL AUDIT SUMMARY")
@@ -0,0 +1,143 @@
+"""
+Bulk ingestion of large image sets with batched inference and a resumable manifest
+"""
+
+import cv2
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from image_processor import ImageViolationProcessor, violation_row
+from violation_db import insert_violations
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+MANIFEST_PATH = 'outputs/bulk_manifest.jsonl'
+
+def find_images(directory):
+    """All images under a directory, sorted so reruns see the same order"""
+    paths = []
+    for path in glob.glob(os.path.join(directory, '**', '*'), recursive=True):
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            paths.append(os.path.normpath(path))
+    return sorted(paths)
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Return the image paths already recorded as finished"""
+    done = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    continue  # torn last line from an interrupted run
+    return done
+
+class BulkImageIngestor:
+    """Process many images with threaded decoding and batched inference
+
+    The next batch is decoded on the thread pool while the current one is in
+    the model. Each batch's rows go in with one transaction, after which the
+    batch is appended to a JSONL manifest; a rerun skips every path in the
+    manifest, so an interrupted run repeats at most the batch in flight.
+    """
+
+    def __init__(self, processor=None, batch_size=16, imgsz=640, workers=4,
+                 manifest_path=MANIFEST_PATH, output_dir='outputs/violations'):
+        self.processor = processor or ImageViolationProcessor()
+        self.batch_size = batch_size
+        self.imgsz = imgsz
+        self.workers = workers
+        self.manifest_path = manifest_path
+        self.output_dir = output_dir
+
+    def ingest(self, image_paths, on_image=None):
+        """Process every path not already in the manifest
+
+        on_image(path, violations, evidence_path) is called for each readable
+        image. Returns a summary dict of counts.
+        """
+        done = load_manifest(self.manifest_path)
+        pending = [path for path in image_paths if path not in done]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        summary = {'total': len(image_paths), 'skipped': len(image_paths) - len(pending),
+                   'processed': 0, 'unreadable': 0, 'violations': 0}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest_dir = os.path.dirname(self.manifest_path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        # An interrupted run may have left a torn last line; start after it
+        torn = False
+        if os.path.exists(self.manifest_path) and os.path.getsize(self.manifest_path):
+            with open(self.manifest_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, open(self.manifest_path, 'a') as manifest:
+            if torn:
+                manifest.write('\n')
+            decoding = [pool.submit(cv2.imread, path) for path in batches[0]] if batches else []
+
+            for index, batch in enumerate(batches):
+                images = [future.result() for future in decoding]
+                if index + 1 < len(batches):
+                    decoding = [pool.submit(cv2.imread, path) for path in batches[index + 1]]
+
+                entries = self._process_batch(pool, batch, images, summary, on_image)
+
+                for entry in entries:
+                    manifest.write(json.dumps(entry) + '\n')
+                manifest.flush()
+                os.fsync(manifest.fileno())
+
+        return summary
+
+    def _process_batch(self, pool, paths, images, summary, on_image):
+        readable = [(path, image) for path, image in zip(paths, images) if image is not None]
+        entries = [{'path': path, 'error': 'unreadable'} for path, image in zip(paths, images) if image is None]
+        summary['unreadable'] += len(entries)
+
+        detections = self.processor.run_detector([image for _, image in readable], imgsz=self.imgsz) if readable else []
+
+        rows = []
+        writes = []
+        for (path, image), image_detections in zip(readable, detections):
+            violations = self.processor.detect_violations_from_detections(image, image_detections)
+            evidence_path = None
+            if violations:
+                timestamp = datetime.now().isoformat().replace(':', '-')
+                stem = os.path.splitext(os.path.basename(path))[0]
+                evidence_path = f"{self.output_dir}/violation_{timestamp}_{stem}.jpg"
+                annotated = self.processor.draw_violations(image.copy(), violations)
+                writes.append(pool.submit(cv2.imwrite, evidence_path, annotated))
+                rows.extend(violation_row(v, evidence_path, path, timestamp) for v in violations)
+
+            entries.append({'path': path, 'violations': len(violations)})
+            summary['processed'] += 1
+            summary['violations'] += len(violations)
+            if on_image:
+                on_image(path, violations, evidence_path)
+
+        for write in writes:
+            write.result()
+
+        # One transaction per batch
+        with self.processor.conn:
+            insert_violations(self.processor.conn, rows)
+
+        return entries
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'data/samples'
+    paths = find_images(directory)
+    print(f"Found {len(paths)} image(s) in {directory}")
+
+    ingestor = BulkImageIngestor()
+    result = ingestor.ingest(paths)
+    print(f"Processed {result['processed']} new image(s), skipped {result['skipped']} already in "
+          f"{ingestor.manifest_path}, {result['unreadable']} unreadable, {result['violations']} violations")
@@ -0,0 +1,60 @@
+"""
+Content hashes and a small SQLite-backed cache for analysis results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def model_digest(model_path):
+    """Hash of a model's weights file; names that are not local files (e.g. hub downloads) hash the name"""
+    if os.path.isfile(model_path):
+        return file_digest(model_path)
+    return hashlib.sha1(model_path.encode()).hexdigest()
+
+class ResultCache:
+    """JSON values stored by string key in a SQLite file
+
+    Safe to share between processes; keep one instance per process.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """{key: value} for the keys that are cached"""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                                  [(key, json.dumps(value)) for key, value in items.items()])
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def close(self):
+        self.conn.close()
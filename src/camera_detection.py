@@ -3,13 +3,29 @@ import streamlit as st
 import os
 from datetime import datetime
 from ultralytics import YOLO
-from license_plate_recognition import LicensePlateRecognizer
+from plate_queue import PlateOCRQueue
 from screenshot_handler import capture_violation_screenshot
+from clip_buffer import ClipRingBuffer
+from frame_grabber import LatestFrameGrabber
+from video_worker import VideoWorker, poll_worker
+from drift_monitor import DriftMonitor
 
-def run_live_camera():
-    """Run live camera with real-time detection"""
+def stop_live_camera():
+    """Stop the camera worker left running by a previous page run"""
+    live = st.session_state.pop('live_camera', None)
+    if live:
+        live['worker'].stop()
+        live['grabber'].stop()
+        live['cap'].release()
+        live['clip_buffer'].flush()
+        live['plate_queue'].close()
+        live['drift'].flush()
+
+def start_live_camera():
+    """Open the camera and start the capture and analysis threads"""
+    from free_dashboard import save_violation_to_db
+    
     model = YOLO('yolov8n.pt')
-    plate_recognizer = LicensePlateRecognizer()
     
     # Try different camera indices
     cap = None
@@ -21,18 +37,34 @@ def run_live_camera():
     
     if cap is None or not cap.isOpened():
         st.error("❌ Cannot access camera. Please check camera permissions and ensure no other app is using the camera.")
-        return
+        return None
     
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     st.success("✅ Camera connected successfully!")
     
-    frame_count = 0
+    # Recent frames kept in memory so each violation also gets a short clip
+    clip_buffer = ClipRingBuffer(fps=cap.get(cv2.CAP_PROP_FPS) or 15)
+    
+    # Capture on its own thread so we always analyze the newest frame
+    grabber = LatestFrameGrabber(cap, "Live Camera").start()
+    
     violations_found = 0
     live_violations = []
     violated_vehicles = set()
     detected_plates = []
     
+    def plate_read(violation_id, plate_number, confidence):
+        detected_plates.append({
+            'plate_number': plate_number,
+            'time': datetime.now().strftime('%H:%M:%S')
+        })
+    
+    # Only violators' plates are read, off the detection thread
+    plate_queue = PlateOCRQueue(on_plate=plate_read)
+    drift = DriftMonitor()
+    
     vehicle_classes = {
         2: ('cars', 'Car', (0, 255, 0)),
         3: ('motorcycles', 'Motorcycle', (255, 0, 255)),
@@ -47,40 +79,31 @@ def run_live_camera():
         10: 'Fire Hydrant', 11: 'Stop Sign', 12: 'Parking Meter', 13: 'Bench'
     }
     
-    camera_placeholder = st.empty()
-    stats_placeholder = st.empty()
-    violations_placeholder = st.empty()
+    def camera_frames():
+        frame_count = 0
+        while True:
+            ret, frame, captured_at = grabber.read()
+            if not ret:
+                if not grabber.running:
+                    return
+                continue
+            yield frame_count, frame, captured_at
+            frame_count += 1
     
-    while st.session_state.get('camera_active', False):
-        ret, frame = cap.read()
-        if not ret:
-            break
+    def analyze_frame(frame_count, frame, captured_at):
+        """Detection, rules and annotation for one frame; runs on the worker thread"""
+        nonlocal violations_found
         
+        clip_buffer.add_frame(frame, captured_at)
         results = model(frame, conf=0.3)
+        drift.update("Live Camera", results[0].boxes.data.cpu().numpy(), frame.shape)
         annotated_frame = frame.copy()
         
-        # License plates
-        plates_data = plate_recognizer.recognize_license_plate(frame)
-        if plates_data:
-            annotated_frame = plate_recognizer.draw_plates(annotated_frame, plates_data)
-            for plate in plates_data:
-                detected_plates.append({
-                    'frame': frame_count,
-                    'plate_number': plate['plate_number'],
-                    'time': datetime.now().strftime('%H:%M:%S')
-                })
-        
         current_violations = 0
+        object_counts = {}
         vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
         persons = []
         
-        # COCO class names for identification
-        class_names = {
-            0: 'Person', 1: 'Bicycle', 2: 'Car', 3: 'Motorcycle', 4: 'Airplane',
-            5: 'Bus', 6: 'Train', 7: 'Truck', 8: 'Boat', 9: 'Traffic Light',
-            10: 'Fire Hydrant', 11: 'Stop Sign', 12: 'Parking Meter', 13: 'Bench'
-        }
-        
         for r in results:
             for box in r.boxes:
                 x1, y1, x2, y2 = box.xyxy[0].int().tolist()
@@ -89,6 +112,7 @@ def run_live_camera():
                 
                 # Get class name
                 class_name = class_names.get(cls, f'Object_{cls}')
+                object_counts[class_name] = object_counts.get(class_name, 0) + 1
                 
                 if cls in vehicle_classes:
                     vehicle_type, label, color = vehicle_classes[cls]
@@ -119,6 +143,9 @@ def run_live_camera():
                     cv2.putText(annotated_frame, f"{class_name} {conf:.2f}", (x1, y1-10), 
                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (128, 128, 128), 1)
         
+        # Violators are followed so their plates get read from several frames
+        plate_queue.follow(frame, [box for boxes in vehicles.values() for box in boxes])
+        
         # Check for various violations
         
         # 1. Helmet violations for motorcycles
@@ -150,8 +177,10 @@ def run_live_camera():
                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                 
                 screenshot_path = capture_violation_screenshot(annotated_frame, 'No Helmet Violation', vehicle_id)
-                from free_dashboard import save_violation_to_db
-                save_violation_to_db('No Helmet Violation', vehicle_id, screenshot_path, "Live Camera")
+                
+                clip_path = clip_buffer.trigger('No Helmet Violation', vehicle_id)
+                violation_id = save_violation_to_db('No Helmet Violation', vehicle_id, screenshot_path, "Live Camera", clip_path=clip_path)
+                plate_queue.submit_vehicle(violation_id, frame, (mx1, my1, mx2, my2))
                 
                 live_violations.append({
                     'type': 'No Helmet Violation',
@@ -177,8 +206,10 @@ def run_live_camera():
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                         
                         screenshot_path = capture_violation_screenshot(annotated_frame, 'Speeding Violation', vehicle_id)
-                        from free_dashboard import save_violation_to_db
-                        save_violation_to_db('Speeding Violation', vehicle_id, screenshot_path, "Live Camera")
+                        
+                        clip_path = clip_buffer.trigger('Speeding Violation', vehicle_id)
+                        violation_id = save_violation_to_db('Speeding Violation', vehicle_id, screenshot_path, "Live Camera", clip_path=clip_path)
+                        plate_queue.submit_vehicle(violation_id, frame, (vx1, vy1, vx2, vy2))
                         
                         live_violations.append({
                             'type': 'Speeding Violation',
@@ -203,8 +234,10 @@ def run_live_camera():
                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                     
                     screenshot_path = capture_violation_screenshot(annotated_frame, 'Wrong Way Violation', vehicle_id)
-                    from free_dashboard import save_violation_to_db
-                    save_violation_to_db('Wrong Way Violation', vehicle_id, screenshot_path, "Live Camera")
+                    
+                    clip_path = clip_buffer.trigger('Wrong Way Violation', vehicle_id)
+                    violation_id = save_violation_to_db('Wrong Way Violation', vehicle_id, screenshot_path, "Live Camera", clip_path=clip_path)
+                    plate_queue.submit_vehicle(violation_id, frame, (vx1, vy1, vx2, vy2))
                     
                     live_violations.append({
                         'type': 'Wrong Way Violation',
@@ -219,32 +252,72 @@ def run_live_camera():
             cv2.putText(annotated_frame, f"VIOLATIONS: {current_violations}", 
                       (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
         
-        # Display live feed
-        camera_placeholder.image(annotated_frame, channels="BGR", use_container_width=True)
+        grabber.record_decision(captured_at)
         
-        # Count all detected objects
-        object_counts = {}
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls)
-                class_name = class_names.get(cls, f'Object_{cls}')
-                object_counts[class_name] = object_counts.get(class_name, 0) + 1
+        return annotated_frame, {
+            'frame': frame_count,
+            'vehicles': sum(len(v) for v in vehicles.values()),
+            'violations_found': violations_found,
+            'object_counts': object_counts,
+            'recent_plates': detected_plates[-3:],
+            'live_violations': list(live_violations),
+            'capture': grabber.stats()
+        }
+    
+    worker = VideoWorker(camera_frames(), analyze_frame).start()
+    live = {'worker': worker, 'grabber': grabber, 'cap': cap, 'clip_buffer': clip_buffer,
+            'plate_queue': plate_queue, 'drift': drift}
+    st.session_state.live_camera = live
+    return live
+
+def run_live_camera(refresh_hz=4):
+    """Run live camera with real-time detection
+    
+    Analysis runs on a background worker that survives page reruns; this
+    function only polls it and redraws the preview and counters.
+    """
+    live = st.session_state.get('live_camera')
+    if live is None or not live['worker'].is_alive():
+        stop_live_camera()
+        live = start_live_camera()
+        if live is None:
+            return
+    
+    from violation_categories import VIOLATION_CATEGORIES, get_violation_category, get_violation_emoji
+    
+    camera_placeholder = st.empty()
+    stats_placeholder = st.empty()
+    violations_placeholder = st.empty()
+    
+    def render(snapshot):
+        stats = snapshot['stats']
+        if snapshot['jpeg']:
+            camera_placeholder.image(snapshot['jpeg'], use_container_width=True)
+        if not stats:
+            return
+        
+        capture_stats = stats['capture']
+        live_violations = stats['live_violations']
         
         # Update stats
         with stats_placeholder.container():
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Frame", frame_count)
+                st.metric("Frame", stats['frame'])
             with col2:
-                total_vehicles = sum(len(v) for v in vehicles.values())
-                st.metric("Vehicles", total_vehicles)
+                st.metric("Vehicles", stats['vehicles'])
             with col3:
-                st.metric("Violations", violations_found)
+                st.metric("Violations", stats['violations_found'])
+            
+            st.write(f"**Capture latency:** {capture_stats['latency_ms_last']:.0f} ms "
+                     f"(p95 {capture_stats['latency_ms_p95']:.0f} ms) · "
+                     f"**Dropped frames:** {capture_stats['dropped']} · "
+                     f"**Analysis:** {snapshot['fps']:.1f} FPS")
             
             # Show detected objects
-            if object_counts:
+            if stats['object_counts']:
                 st.write("**Detected Objects:**")
-                for obj_name, count in object_counts.items():
+                for obj_name, count in stats['object_counts'].items():
                     if count > 0:
                         emoji = {
                             'Person': '👤', 'Car': '🚗', 'Motorcycle': '🏍️', 
@@ -253,14 +326,12 @@ def run_live_camera():
                         }.get(obj_name, '📦')
                         st.write(f"{emoji} {obj_name}: {count}")
             
-            if detected_plates:
+            if stats['recent_plates']:
                 st.write("**Recent Plates:**")
-                for plate in detected_plates[-3:]:
+                for plate in stats['recent_plates']:
                     st.write(f"🚗 {plate['plate_number']} ({plate['time']})")
         
         # Categorize live violations
-        from violation_categories import VIOLATION_CATEGORIES, get_violation_category, get_violation_emoji
-        
         violation_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
         for violation in live_violations:
             category = get_violation_category(violation['type'])
@@ -298,7 +369,9 @@ def run_live_camera():
                     st.image(latest_violation['screenshot'], 
                            caption=f"{latest_violation['type']} - {latest_violation['time']}", 
                            width=200)
-        
-        frame_count += 1
     
-    cap.release()
\ No newline at end of file
+    snapshot = poll_worker(live['worker'], render, refresh_hz=refresh_hz,
+                           should_stop=lambda: not st.session_state.get('camera_active', False))
+    stop_live_camera()
+    if snapshot['error']:
+        raise snapshot['error']
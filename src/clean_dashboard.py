@@ -233,6 +233,9 @@ def main():
                 with cols[i]:
                     st.image(file, caption=file.name, use_container_width=True)
             
+            bulk_mode = st.checkbox("⚡ Bulk mode", value=len(uploaded_files) > 8,
+                                    help="Decode in parallel and run inference in batches")
+            
             if st.button("🔍 Analyze Images"):
                 from image_processor import ImageViolationProcessor
                 processor = ImageViolationProcessor()
@@ -240,21 +243,39 @@ def main():
                 progress = st.progress(0)
                 results = []
                 
-                for i, file in enumerate(uploaded_files):
+                input_paths = []
+                for file in uploaded_files:
                     input_path = f"data/samples/{file.name}"
                     with open(input_path, "wb") as f:
                         f.write(file.getbuffer())
+                    input_paths.append(input_path)
+                
+                if bulk_mode:
+                    from bulk_ingest import BulkImageIngestor
                     
-                    output_path = f"outputs/violations/analyzed_{file.name}"
-                    annotated_image, violations = processor.process_image(input_path, output_path)
-                    
-                    results.append({
-                        'filename': file.name,
-                        'violations': violations,
-                        'annotated_image': annotated_image
-                    })
+                    def collect(path, violations, evidence_path):
+                        results.append({
+                            'filename': os.path.basename(path),
+                            'violations': violations,
+                            'annotated_image': cv2.imread(evidence_path) if evidence_path else cv2.imread(path)
+                        })
+                        progress.progress(len(results) / len(uploaded_files))
                     
-                    progress.progress((i + 1) / len(uploaded_files))
+                    # Uploads are analyzed every time, so keep the manifest per session run
+                    manifest_path = f"outputs/upload_manifest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                    BulkImageIngestor(processor, manifest_path=manifest_path).ingest(input_paths, on_image=collect)
+                else:
+                    for i, (file, input_path) in enumerate(zip(uploaded_files, input_paths)):
+                        output_path = f"outputs/violations/analyzed_{file.name}"
+                        annotated_image, violations = processor.process_image(input_path, output_path)
+                        
+                        results.append({
+                            'filename': file.name,
+                            'violations': violations,
+                            'annotated_image': annotated_image
+                        })
+                        
+                        progress.progress((i + 1) / len(uploaded_files))
                 
                 st.success(f"✅ Processed {len(uploaded_files)} images!")
                 
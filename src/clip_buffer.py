@@ -0,0 +1,106 @@
+"""
+In-memory ring buffer of recent frames for pre/post-event violation clips
+"""
+
+import cv2
+import numpy as np
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+class ClipRingBuffer:
+    """Keep the last few seconds of one stream as JPEG bytes and cut clips on demand"""
+
+    def __init__(self, fps=10, pre_seconds=3.0, post_seconds=2.0, max_bytes=32 * 1024 * 1024,
+                 jpeg_quality=80, output_dir='outputs/violations/clips'):
+        self.fps = fps
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.output_dir = output_dir
+
+        self.frames = deque()  # (timestamp, jpeg bytes)
+        self.total_bytes = 0
+        self.pending_clips = []  # clips still collecting post-event frames
+        self.writers = []
+
+    def add_frame(self, frame, timestamp=None):
+        """Compress a frame into the buffer and feed any clips waiting for post-event frames"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        data = buffer.tobytes()
+
+        self.frames.append((timestamp, data))
+        self.total_bytes += len(data)
+
+        # Evict by age first, then by byte budget
+        while self.frames and (timestamp - self.frames[0][0] > self.pre_seconds or
+                               self.total_bytes > self.max_bytes):
+            _, old = self.frames.popleft()
+            self.total_bytes -= len(old)
+
+        still_pending = []
+        for clip in self.pending_clips:
+            clip['frames'].append(data)
+            if timestamp >= clip['end_time']:
+                self._write_async(clip)
+            else:
+                still_pending.append(clip)
+        self.pending_clips = still_pending
+
+    def trigger(self, violation_type, vehicle_id, timestamp=None):
+        """Start a clip around the current moment and return the path it will be written to"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        filename = f"{violation_type.lower().replace(' ', '_')}_{vehicle_id}_{stamp}.mp4"
+        clip_path = os.path.join(self.output_dir, filename)
+
+        self.pending_clips.append({
+            'path': clip_path,
+            'frames': [data for _, data in self.frames],
+            'end_time': timestamp + self.post_seconds
+        })
+        return clip_path
+
+    def flush(self):
+        """Write out clips that are still waiting (end of stream) and wait for all writers"""
+        for clip in self.pending_clips:
+            self._write_async(clip)
+        self.pending_clips = []
+
+        for writer in self.writers:
+            writer.join()
+        self.writers = []
+
+    def _write_async(self, clip):
+        """Encode the clip off the capture thread"""
+        writer = threading.Thread(target=self._write_clip, args=(clip,))
+        writer.start()
+        self.writers = [w for w in self.writers if w.is_alive()] + [writer]
+
+    def _write_clip(self, clip):
+        """Decode the buffered JPEGs once and write them out as an MP4"""
+        if not clip['frames']:
+            return
+
+        first = cv2.imdecode(np.frombuffer(clip['frames'][0], np.uint8), cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(clip['path'], fourcc, self.fps, (width, height))
+
+        for data in clip['frames']:
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            out.write(frame)
+        out.release()
@@ -0,0 +1,141 @@
+"""
+Append-only columnar row storage shared by the detection cache and the detection log
+"""
+
+import os
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class ColumnStore:
+    """Rows appended in groups, one file per column, indexed by a record per group
+
+    Each column lives in <name>.bin and is read back through a memory map.
+    <index>.bin holds one record per append: the caller's key, 'start'
+    (first row) and 'count' fields, then any extra fields. It is
+    written after the columns, so a group from an interrupted append is
+    dropped on open and the columns are cut back to line up with the
+    index. Only one writer should use a directory at a time; with
+    lock=True that is enforced by an exclusive lock on <directory>/lock,
+    held until close(), and opening a locked store raises BlockingIOError.
+
+    readonly=True opens a snapshot of the complete groups for reading
+    while a writer may still be appending: nothing is cut back or
+    rewritten, and append() is refused.
+    """
+
+    def __init__(self, directory, columns, record_dtype, index='frames', lock=False, readonly=False):
+        self.directory = directory
+        self.column_specs = columns  # name -> (dtype, values per row)
+        self.record_dtype = record_dtype
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        self._lock_file = _lock_directory(directory) if lock and not readonly else None
+        self.index_path = os.path.join(directory, f'{index}.bin')
+        self.paths = {name: os.path.join(directory, f'{name}.bin') for name in columns}
+
+        # Only keep groups whose rows made it into every column
+        self.records = np.zeros(0, dtype=record_dtype)
+        if os.path.exists(self.index_path):
+            raw = np.fromfile(self.index_path, dtype=np.uint8)
+            records = raw[:len(raw) // record_dtype.itemsize * record_dtype.itemsize].view(record_dtype)
+            rows = min(self._column_rows(name) for name in columns)
+            self.records = records[:np.searchsorted(np.cumsum(records['count']), rows, side='right')].copy()
+        self.row_count = int(self.records['count'].sum())
+        if not readonly:
+            self._truncate()
+
+        self._pending = []  # appended records not yet in self.records
+        self._files = None
+
+    def _column_rows(self, name):
+        dtype, width = self.column_specs[name]
+        path = self.paths[name]
+        return os.path.getsize(path) // (dtype.itemsize * width) if os.path.exists(path) else 0
+
+    def _truncate(self):
+        # Drop bytes of a half-written append so new rows line up with the index
+        for name, (dtype, width) in self.column_specs.items():
+            with open(self.paths[name], 'ab') as f:
+                f.truncate(self.row_count * dtype.itemsize * width)
+        with open(self.index_path, 'wb') as f:
+            self.records.tofile(f)
+
+    def __len__(self):
+        return len(self.records) + len(self._pending)
+
+    def append(self, key, values, *extra):
+        """Append one group of rows: values maps every column to its (N, width) or (N,) array
+
+        extra fills the record fields after key, start and count.
+        """
+        if self.readonly:
+            raise ValueError(f"{self.directory} was opened read-only")
+        if self._files is None:
+            self._files = {name: open(path, 'ab') for name, path in self.paths.items()}
+            self._files[None] = open(self.index_path, 'ab')
+        count = None
+        for name, (dtype, _) in self.column_specs.items():
+            column = np.ascontiguousarray(values[name], dtype=dtype)
+            count = len(column) if count is None else count
+            column.tofile(self._files[name])
+        record = (key, self.row_count, count, *extra)
+        np.array([record], dtype=self.record_dtype).tofile(self._files[None])
+        self._pending.append(record)
+        self.row_count += count
+        return record
+
+    def flush(self):
+        """Push buffered appends to disk so readers (and columns()) see them"""
+        if self._files is None:
+            return
+        # Columns before the index, so a crash never indexes missing rows
+        for name in self.column_specs:
+            self._files[name].flush()
+        self._files[None].flush()
+        if self._pending:
+            self.records = np.concatenate([self.records, np.array(self._pending, dtype=self.record_dtype)])
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+        if self._lock_file is not None:
+            # Closing the file releases the lock
+            self._lock_file.close()
+            self._lock_file = None
+
+    def columns(self):
+        """Memory maps of the stored columns, row-aligned"""
+        self.flush()
+        maps = {}
+        for name, (dtype, width) in self.column_specs.items():
+            shape = (self.row_count, width) if width > 1 else (self.row_count,)
+            maps[name] = np.memmap(self.paths[name], dtype=dtype, mode='r', shape=shape) if self.row_count else \
+                np.zeros(shape, dtype=dtype)
+        return maps
+
+    def size_bytes(self):
+        self.flush()
+        return sum(os.path.getsize(path) for path in list(self.paths.values()) + [self.index_path])
+
+def _lock_directory(directory):
+    """Open <directory>/lock and take an exclusive lock on it without waiting"""
+    lock_file = open(os.path.join(directory, 'lock'), 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        raise BlockingIOError(f"{directory} is in use by another writer")
+    return lock_file
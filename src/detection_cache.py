@@ -0,0 +1,94 @@
+"""
+Persistent per-frame detection cache for re-analysing the same media
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from cache_utils import file_digest, model_digest
+from column_store import ColumnStore
+
+CACHE_DIR = 'outputs/detection_cache'
+
+# frames.bin records: frame index, first row, row count
+FRAME_RECORD = np.dtype([('frame', '<i8'), ('start', '<i8'), ('count', '<i4')])
+ROW_WIDTH = 6  # x1, y1, x2, y2, confidence, class_id
+
+def detector_settings(model_path, **params):
+    """Settings dict identifying a detector: the weights hash plus inference params"""
+    return {'model': model_digest(model_path), **params}
+
+class DetectionCache:
+    """Detections per frame of one media file under one set of detector settings
+
+    Rows are (N, 6) float32 arrays as returned by run_detector, kept in a
+    single-column ColumnStore (rows.bin, indexed by frames.bin) and read
+    back through a memory map. Each put is flushed, so the cache on disk
+    is complete after every frame. The directory is locked until close(),
+    since the same media may be opened by several sessions; opening a
+    cache that is in use raises BlockingIOError.
+    """
+
+    def __init__(self, media_hash, settings, root=CACHE_DIR):
+        settings_hash = hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+        self.directory = os.path.join(root, media_hash, settings_hash)
+        self.store = ColumnStore(self.directory, {'rows': (np.dtype('<f4'), ROW_WIDTH)}, FRAME_RECORD, lock=True)
+        self.rows_path = self.store.paths['rows']
+        self.frames_path = self.store.index_path
+        self.hits = 0
+        self.misses = 0
+
+        self.index = {frame: (start, count) for frame, start, count in self.store.records.tolist()}
+        self._rows = None
+        self._mapped_rows = 0
+
+    @classmethod
+    def for_media(cls, media_path, settings, root=CACHE_DIR):
+        return cls(file_digest(media_path), settings, root)
+
+    @property
+    def row_count(self):
+        return self.store.row_count
+
+    def __contains__(self, frame_index):
+        return frame_index in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, frame_index):
+        """Cached detections for a frame, or None"""
+        entry = self.index.get(frame_index)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        start, count = entry
+        if count == 0:
+            return np.zeros((0, ROW_WIDTH), dtype=np.float32)
+        if self._mapped_rows < start + count:
+            # Re-map after appends grew the file
+            self._rows = self.store.columns()['rows']
+            self._mapped_rows = self.row_count
+        return np.array(self._rows[start:start + count])
+
+    def put(self, frame_index, detections):
+        """Append a frame's detections; a frame already cached is left as is"""
+        if frame_index in self.index:
+            return
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, ROW_WIDTH)
+        _, start, count = self.store.append(frame_index, {'rows': detections})
+        self.store.flush()
+        self.index[frame_index] = (start, count)
+
+    def close(self):
+        self.store.close()
+
+    def detect(self, frame_index, frame, run_detector):
+        """Cached detections for a frame, calling run_detector([frame]) only on a miss"""
+        detections = self.get(frame_index)
+        if detections is None:
+            detections = run_detector([frame])[0]
+            self.put(frame_index, detections)
+        return detections
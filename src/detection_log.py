@@ -0,0 +1,201 @@
+"""
+Columnar per-frame detection log, replayable into the violation rules
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from column_store import ColumnStore
+
+LOG_DIR = 'outputs/detection_logs'
+
+# frames.bin records: frame index, first row, row count, frame size
+FRAME_RECORD = np.dtype([('frame', '<i8'), ('start', '<i8'), ('count', '<i4'), ('height', '<u2'), ('width', '<u2')])
+
+# One file per column; 13 bytes per box against 24 for float32 rows
+COLUMNS = {
+    'boxes': (np.dtype('<i2'), 4),  # x1, y1, x2, y2, truncated as the rules read them
+    'conf': (np.dtype('<u2'), 1),  # confidence in 1/65535 steps
+    'cls': (np.dtype('u1'), 1),  # COCO class id
+    'cue': (np.dtype('<u2'), 1)  # what the rules read from pixels, see encode_cues
+}
+
+# Pixel cues: head darkness of persons, lamp colour of traffic lights
+PERSON, TRAFFIC_LIGHT = 0, 9
+LIGHT_COLORS = ('unknown', 'red', 'yellow', 'green')
+CUE_SCALE = 65534
+NO_CUE = 65535
+
+def encode_cues(classes, cues):
+    """Pack per-row cues (NaN for none) into uint16: light colour codes as is, fractions scaled"""
+    encoded = np.full(len(cues), NO_CUE, dtype=np.uint16)
+    present = ~np.isnan(cues)
+    lights = classes == TRAFFIC_LIGHT
+    encoded[present & lights] = cues[present & lights]
+    scaled = present & ~lights
+    encoded[scaled] = np.round(np.clip(cues[scaled], 0.0, 1.0) * CUE_SCALE)
+    return encoded
+
+def decode_cues(classes, encoded):
+    cues = np.where(classes == TRAFFIC_LIGHT, encoded, encoded / CUE_SCALE).astype(np.float32)
+    cues[encoded == NO_CUE] = np.nan
+    return cues
+
+class LoggedFrame:
+    """One logged frame: its index, (height, width, 3) shape, (N, 6) float32 detections and (N,) cues"""
+    __slots__ = ('index', 'shape', 'detections', 'cues')
+
+    def __init__(self, index, shape, detections, cues):
+        self.index = index
+        self.shape = shape
+        self.detections = detections
+        self.cues = cues
+
+class DetectionLog:
+    """Append-only record of every analysed frame's raw detections
+
+    Frames are stored as a ColumnStore, one file per column. Coordinates
+    are kept as the int16 the rules truncate them to and confidences in
+    1/65535 steps, so a replay sees what the live rules saw up to that
+    rounding. A writer locks the directory until close(); open with
+    readonly=True to read a log that may still be written to.
+    """
+
+    def __init__(self, directory, readonly=False):
+        self.directory = directory
+        self.store = ColumnStore(directory, COLUMNS, FRAME_RECORD, lock=True, readonly=readonly)
+        self.paths = self.store.paths
+        self.frames_path = self.store.index_path
+
+    @property
+    def records(self):
+        return self.store.records
+
+    @property
+    def row_count(self):
+        return self.store.row_count
+
+    def __len__(self):
+        return len(self.store)
+
+    def append(self, frame_index, frame_shape, detections, cues=None):
+        """Add a frame's (N, 6) detections and per-row pixel cues (NaN or None for none)"""
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        classes = detections[:, 5].astype(np.uint8)
+        if cues is None:
+            cues = np.full(len(detections), np.nan, dtype=np.float32)
+        self.store.append(frame_index, {
+            'boxes': np.clip(np.trunc(detections[:, :4]), -32768, 32767),
+            'conf': np.round(np.clip(detections[:, 4], 0.0, 1.0) * 65535),
+            'cls': classes,
+            'cue': encode_cues(classes, np.asarray(cues, dtype=np.float32))
+        }, frame_shape[0], frame_shape[1])
+
+    def flush(self):
+        """Push buffered appends to disk so readers (and frames()) see them"""
+        self.store.flush()
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def columns(self):
+        """Memory maps of the logged columns, row-aligned"""
+        return self.store.columns()
+
+    def frames(self, start=0, stop=None, chunk=4096):
+        """Yield LoggedFrames in log order, decoding `chunk` frames of rows at a time"""
+        columns = self.columns()
+        records = self.records[start:stop]
+        for first in range(0, len(records), chunk):
+            block = records[first:first + chunk]
+            row_start = int(block['start'][0])
+            row_stop = int(block['start'][-1] + block['count'][-1])
+            classes = columns['cls'][row_start:row_stop]
+
+            rows = np.empty((row_stop - row_start, 6), dtype=np.float32)
+            rows[:, :4] = columns['boxes'][row_start:row_stop]
+            rows[:, 4] = columns['conf'][row_start:row_stop] / np.float32(65535)
+            rows[:, 5] = classes
+            cues = decode_cues(classes, columns['cue'][row_start:row_stop])
+
+            for index, offset, count, height, width in block.tolist():
+                offset -= row_start
+                yield LoggedFrame(index, (height, width, 3), rows[offset:offset + count], cues[offset:offset + count])
+
+    def size_bytes(self):
+        return self.store.size_bytes()
+
+def replay(log, processor=None, save=False, start=0, stop=None):
+    """Run logged frames through the violation rules; no video decoding and no model
+
+    `log` is a DetectionLog or a log directory, which is opened read-only
+    so a log still being written can be replayed. `processor` defaults to a fresh LocalTrafficProcessor on an in-memory
+    DB; pass one to replay into tuned rules. Rules that read the frame
+    only for its size get a blank zero-stride image of the logged size,
+    and the helmet and traffic-light checks read the logged cues. With
+    save=True violations are inserted (without evidence images) into the
+    processor's DB. Returns the violations and replay throughput.
+    """
+    from local_processor import LocalTrafficProcessor, record_violation
+
+    if isinstance(log, str):
+        log = DetectionLog(log, readonly=True)
+    processor = processor or LocalTrafficProcessor(record_clips=False, db_path=':memory:', drift_db=None)
+    blanks = {}
+    violations = []
+    frames = boxes = 0
+
+    began = time.perf_counter()
+    for logged in log.frames(start, stop):
+        blank = blanks.get(logged.shape)
+        if blank is None:
+            blank = blanks[logged.shape] = np.broadcast_to(np.zeros(1, dtype=np.uint8), logged.shape)
+        found = processor.detect_violations_from_detections(blank, logged.detections, logged.index, logged.cues,
+                                                            live=False)
+        violations.extend(found)
+        frames += 1
+        boxes += len(logged.detections)
+    seconds = time.perf_counter() - began
+
+    if save:
+        with processor.conn:
+            for violation in violations:
+                record_violation(processor.conn, violation, None, f"replay-{violation['frame']}")
+
+    by_type = {}
+    for violation in violations:
+        by_type[violation['type']] = by_type.get(violation['type'], 0) + 1
+    return {
+        'frames': frames,
+        'boxes': boxes,
+        'seconds': seconds,
+        'frames_per_second': frames / seconds if seconds else 0.0,
+        'violations': violations,
+        'violations_by_type': by_type
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a detection log into the violation rules")
+    parser.add_argument("log_dir")
+    parser.add_argument("--start", type=int, default=0, help="first logged frame (position in the log)")
+    parser.add_argument("--stop", type=int, default=None)
+    parser.add_argument("--save", metavar="DB", help="also store the violations in this database")
+    args = parser.parse_args()
+
+    log = DetectionLog(args.log_dir, readonly=True)
+    processor = None
+    if args.save:
+        from local_processor import LocalTrafficProcessor
+        processor = LocalTrafficProcessor(record_clips=False, db_path=args.save, drift_db=None)
+    result = replay(log, processor, save=bool(args.save), start=args.start, stop=args.stop)
+    print(f"{len(log)} frames logged, {log.row_count} boxes, {log.size_bytes() / 1e6:.1f} MB")
+    print(f"Replayed {result['frames']} frames in {result['seconds']:.2f}s "
+          f"({result['frames_per_second']:.0f} frames/s)")
+    print(json.dumps(result['violations_by_type'], indent=2))
@@ -0,0 +1,211 @@
+"""
+Streaming per-camera, per-hour detection sketches for drift monitoring
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+SKETCH_DB = 'outputs/drift/sketches.db'
+
+NUM_CLASSES = 80  # COCO; higher class ids grow the histogram
+CONFIDENCE_BINS = 100  # quantiles to within 0.01
+SIZE_BINS = 16  # half-octave bins of sqrt(box area / frame area)
+QUANTILES = (0.1, 0.5, 0.9)
+
+def ensure_sketch_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS drift_sketches (
+            camera_id TEXT,
+            hour INTEGER,
+            frames INTEGER,
+            detections INTEGER,
+            classes BLOB,
+            confidences BLOB,
+            sizes BLOB,
+            PRIMARY KEY (camera_id, hour)
+        )
+    ''')
+
+def _add_counts(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    a = a.copy()
+    a[:len(b)] += b
+    return a
+
+class DriftSketch:
+    """Fixed-size histograms of what a detector saw: classes, confidences and box sizes
+
+    Sketches merge by addition, so any set of cameras and hours can be
+    combined without keeping individual detections.
+    """
+
+    def __init__(self, frames=0, detections=0, classes=None, confidences=None, sizes=None):
+        self.frames = frames
+        self.detections = detections
+        self.classes = classes if classes is not None else np.zeros(NUM_CLASSES, dtype=np.int64)
+        self.confidences = confidences if confidences is not None else np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+        self.sizes = sizes if sizes is not None else np.zeros(SIZE_BINS, dtype=np.int64)
+
+    def update(self, detections, frame_shape):
+        """Add one frame's (N, 6) [x1, y1, x2, y2, confidence, class_id] detections"""
+        self.frames += 1
+        if len(detections) == 0:
+            return
+        detections = np.asarray(detections, dtype=np.float32)
+        self.detections += len(detections)
+
+        classes = np.bincount(detections[:, 5].astype(np.int64).clip(0), minlength=len(self.classes))
+        self.classes = _add_counts(self.classes, classes)
+
+        confidence_bins = (detections[:, 4] * CONFIDENCE_BINS).astype(np.int64).clip(0, CONFIDENCE_BINS - 1)
+        self.confidences += np.bincount(confidence_bins, minlength=CONFIDENCE_BINS)
+
+        areas = (detections[:, 2] - detections[:, 0]) * (detections[:, 3] - detections[:, 1])
+        relative = np.sqrt(np.maximum(areas, 1.0) / (frame_shape[0] * frame_shape[1]))
+        size_bins = (-2 * np.log2(relative)).astype(np.int64).clip(0, SIZE_BINS - 1)
+        self.sizes += np.bincount(size_bins, minlength=SIZE_BINS)
+
+    def merge(self, other):
+        self.frames += other.frames
+        self.detections += other.detections
+        self.classes = _add_counts(self.classes, other.classes)
+        self.confidences += other.confidences
+        self.sizes += other.sizes
+        return self
+
+    @property
+    def detection_rate(self):
+        return self.detections / self.frames if self.frames else 0.0
+
+    def confidence_quantiles(self, quantiles=QUANTILES):
+        """Approximate confidence quantiles (bin midpoints)"""
+        total = self.confidences.sum()
+        if total == 0:
+            return [0.0 for _ in quantiles]
+        cumulative = np.cumsum(self.confidences)
+        return [(np.searchsorted(cumulative, q * total) + 0.5) / CONFIDENCE_BINS for q in quantiles]
+
+    def to_row(self):
+        return (self.frames, self.detections, self.classes.tobytes(),
+                self.confidences.tobytes(), self.sizes.tobytes())
+
+    @classmethod
+    def from_row(cls, frames, detections, classes, confidences, sizes):
+        return cls(frames, detections, np.frombuffer(classes, dtype=np.int64).copy(),
+                   np.frombuffer(confidences, dtype=np.int64).copy(), np.frombuffer(sizes, dtype=np.int64).copy())
+
+class DriftMonitor:
+    """Sketches updated from the rule pass and added to the sketch DB every flush_interval seconds
+
+    Only sketches changed since the last flush are held in memory. A
+    final flush() may come from another thread than the updates; flush()
+    opens its own connection.
+    """
+
+    def __init__(self, db_path=SKETCH_DB, flush_interval=60.0):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.pending = {}  # (camera_id, hour) -> DriftSketch
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def update(self, camera_id, detections, frame_shape, timestamp=None):
+        key = (camera_id, int((timestamp if timestamp is not None else time.time()) // 3600))
+        with self.lock:
+            sketch = self.pending.get(key)
+            if sketch is None:
+                sketch = self.pending[key] = DriftSketch()
+            sketch.update(detections, frame_shape)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            # Write lock up front: processors in other threads or processes
+            # merge into the same rows, and must not read-merge-write past us
+            conn.execute("BEGIN IMMEDIATE")
+            ensure_sketch_table(conn)
+            for (camera_id, hour), sketch in pending.items():
+                row = conn.execute(
+                    "SELECT frames, detections, classes, confidences, sizes FROM drift_sketches "
+                    "WHERE camera_id = ? AND hour = ?", (camera_id, hour)
+                ).fetchone()
+                if row:
+                    sketch = DriftSketch.from_row(*row).merge(sketch)
+                conn.execute("INSERT OR REPLACE INTO drift_sketches VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (camera_id, hour, *sketch.to_row()))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+def load_sketch(conn, camera_id, start_hour, end_hour):
+    """Merged sketch of one camera over hours start_hour <= hour < end_hour"""
+    sketch = DriftSketch()
+    for row in conn.execute(
+        "SELECT frames, detections, classes, confidences, sizes FROM drift_sketches "
+        "WHERE camera_id = ? AND hour >= ? AND hour < ?", (camera_id, start_hour, end_hour)
+    ):
+        sketch.merge(DriftSketch.from_row(*row))
+    return sketch
+
+def _divergence(current, baseline):
+    # KL divergence of smoothed histograms
+    size = max(len(current), len(baseline))
+    p = np.pad(current, (0, size - len(current))) + 1e-3
+    q = np.pad(baseline, (0, size - len(baseline))) + 1e-3
+    p, q = p / p.sum(), q / q.sum()
+    return float(np.sum(p * np.log(p / q)))
+
+def compare_sketches(current, baseline):
+    """Drift metrics between two sketches, in the same shape as ModelAuditor.calculate_model_drift"""
+    confidence_drift = max(abs(c - b) for c, b in zip(current.confidence_quantiles(), baseline.confidence_quantiles()))
+    detection_drift = min(1.0, abs(current.detection_rate - baseline.detection_rate) / max(baseline.detection_rate, 1e-6))
+    distribution_drift = _divergence(current.classes, baseline.classes)
+    size_drift = _divergence(current.sizes, baseline.sizes)
+    drift_score = (confidence_drift + detection_drift + distribution_drift + size_drift) / 4
+
+    return {
+        "confidence_drift": confidence_drift,
+        "detection_drift": detection_drift,
+        "distribution_drift": distribution_drift,
+        "size_drift": size_drift,
+        "overall_drift_score": drift_score,
+        "drift_level": "High" if drift_score > 0.3 else "Medium" if drift_score > 0.1 else "Low",
+        "frames": current.frames,
+        "baseline_frames": baseline.frames
+    }
+
+def camera_drift(db_path=SKETCH_DB, recent_hours=3, baseline_hours=168, now=None):
+    """{camera_id: drift metrics} comparing each camera's last recent_hours with the baseline_hours before them
+
+    Cameras without frames in both windows are left out.
+    """
+    if not os.path.exists(db_path):
+        return {}
+    current_hour = int((now if now is not None else time.time()) // 3600) + 1
+    split = current_hour - recent_hours
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_sketch_table(conn)
+        cameras = [row[0] for row in conn.execute(
+            "SELECT DISTINCT camera_id FROM drift_sketches WHERE hour >= ?", (split - baseline_hours,))]
+        drift = {}
+        for camera_id in cameras:
+            current = load_sketch(conn, camera_id, split, current_hour)
+            baseline = load_sketch(conn, camera_id, split - baseline_hours, split)
+            if current.frames and baseline.frames:
+                drift[camera_id] = compare_sketches(current, baseline)
+        return drift
+    finally:
+        conn.close()
@@ -0,0 +1,114 @@
+"""
+Batched, cached model evaluation over a dataset manifest
+"""
+
+import json
+import os
+import cv2
+from cache_utils import ResultCache, file_digest, model_digest
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def load_dataset_manifest(manifest_path=None, image_dir="data/samples"):
+    """Dataset entries as dicts with at least 'path'
+
+    The manifest is JSONL, one {"path": ..., ...} object per line, with
+    relative paths resolved against the manifest's directory. Extra keys
+    such as "group" are passed through. Without a manifest every image in
+    image_dir is an entry.
+    """
+    if manifest_path:
+        base = os.path.dirname(manifest_path)
+        entries = []
+        with open(manifest_path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry['path'] = os.path.join(base, entry['path'])
+                    entries.append(entry)
+        return entries
+    return [{'path': os.path.join(image_dir, name)} for name in sorted(os.listdir(image_dir))
+            if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+class EvaluationHarness:
+    """Run a detector over dataset entries, reusing cached predictions
+
+    Predictions are cached by (weights hash, image content hash, inference
+    params), so only new or changed images, or a new model, are scored.
+    Image hashes are themselves cached by path, size and mtime, so unchanged
+    files are not re-read. The model is loaded only when something needs scoring.
+    """
+
+    def __init__(self, model_path="yolov8n.pt", cache_path="outputs/audit_reports/prediction_cache.db",
+                 batch_size=8, conf=0.25, imgsz=640):
+        self.model_path = model_path
+        self.model_hash = model_digest(model_path)
+        self.cache = ResultCache(cache_path)
+        self.batch_size = batch_size
+        self.params = {'conf': conf, 'imgsz': imgsz}
+        self._model = None
+        self.scored = 0
+        self.cached = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            from ultralytics import YOLO
+            self._model = YOLO(self.model_path)
+        return self._model
+
+    @property
+    def class_names(self):
+        key = f"{self.model_hash}:names"
+        names = self.cache.get(key)
+        if names is None:
+            names = {str(class_id): name for class_id, name in self.model.names.items()}
+            self.cache.set(key, names)
+        return {int(class_id): name for class_id, name in names.items()}
+
+    def image_hash(self, path):
+        stat = os.stat(path)
+        key = f"digest:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        digest = self.cache.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            self.cache.set(key, digest)
+        return digest
+
+    def prediction_key(self, image_hash):
+        return f"{self.model_hash}:{image_hash}:{json.dumps(self.params, sort_keys=True)}"
+
+    def predict(self, entries):
+        """{path: [[x1, y1, x2, y2, confidence, class_id], ...]} for every readable entry"""
+        keys = {entry['path']: self.prediction_key(self.image_hash(entry['path'])) for entry in entries
+                if os.path.exists(entry['path'])}
+        cached = self.cache.get_many(set(keys.values()))
+        predictions = {path: cached[key] for path, key in keys.items() if key in cached}
+        self.cached += len(predictions)
+
+        missing = [path for path in keys if path not in predictions]
+        for start in range(0, len(missing), self.batch_size):
+            paths, images = [], []
+            for path in missing[start:start + self.batch_size]:
+                image = cv2.imread(path)
+                if image is not None:
+                    paths.append(path)
+                    images.append(image)
+            if not images:
+                continue
+
+            results = self.model(images, verbose=False, **self.params)
+            scored = {}
+            for path, result in zip(paths, results):
+                boxes = result.boxes
+                rows = [] if boxes is None or len(boxes) == 0 else [
+                    [*xyxy, confidence, class_id] for xyxy, confidence, class_id in zip(
+                        boxes.xyxy.cpu().numpy().tolist(), boxes.conf.cpu().numpy().tolist(),
+                        boxes.cls.cpu().numpy().astype(int).tolist())
+                ]
+                predictions[path] = rows
+                scored[keys[path]] = rows
+            self.cache.set_many(scored)
+            self.scored += len(scored)
+
+        return predictions
@@ -3,41 +3,76 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
 import torch
 import torch.nn.functional as F
 from sklearn.metrics import accuracy_score
 import os
 from datetime import datetime
 import json
+from image_processor import letterbox
+
+def _matched_score(original, boxes):
+    """Summed confidence of the original detections found again (same class, IoU >= 0.5) in `boxes`"""
+    if boxes is None or len(boxes) == 0:
+        return 0.0
+    xyxy, cls, conf = boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy()
+    original_xyxy, original_cls, _ = original
+    
+    ix1 = np.maximum(original_xyxy[:, None, 0], xyxy[None, :, 0])
+    iy1 = np.maximum(original_xyxy[:, None, 1], xyxy[None, :, 1])
+    ix2 = np.minimum(original_xyxy[:, None, 2], xyxy[None, :, 2])
+    iy2 = np.minimum(original_xyxy[:, None, 3], xyxy[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area = lambda b: (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    iou = inter / (area(original_xyxy)[:, None] + area(xyxy)[None, :] - inter + 1e-9)
+    
+    matched = (iou >= 0.5) & (original_cls[:, None] == cls[None, :])
+    return float(np.where(matched, conf[None, :], 0.0).max(axis=1).sum())
 
 class ModelExplainer:
     def __init__(self, model_path="yolov8n.pt"):
         self.model = YOLO(model_path)
         
-    def generate_grad_cam(self, image, target_class=None):
-        """Generate Grad-CAM style heatmap for YOLO detections"""
+    def generate_grad_cam(self, image, target_class=None, mode='boxes', results=None):
+        """Generate a heatmap for YOLO detections
+
+        mode='boxes' draws a confidence-weighted Gaussian over each detection
+        box, evaluated only within 3 sigma of its centre. mode='gradient' is
+        a Grad-CAM over a backbone layer, see gradient_cam. Returns
+        (image, heatmap) with the heatmap normalized to [0, 1].
+        """
+        if mode == 'gradient':
+            heatmap, _ = self.gradient_cam(image, target_class)
+            return image, heatmap
+        
         # Run inference
-        results = self.model(image)
+        if results is None:
+            results = self.model(image)
         
+        heatmap = np.zeros((image.shape[0], image.shape[1]), dtype=np.float32)
         if results[0].boxes is None or len(results[0].boxes) == 0:
-            return image, np.zeros((image.shape[0], image.shape[1]))
-        
-        # Create attention heatmap based on detection boxes
-        heatmap = np.zeros((image.shape[0], image.shape[1]))
+            return image, heatmap
         
+        h, w = heatmap.shape
         for box in results[0].boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
+            if target_class is not None and int(box.cls[0]) != target_class:
+                continue
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
             confidence = float(box.conf[0])
             
-            # Create gaussian heatmap around detection
-            center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
-            sigma_x, sigma_y = (x2 - x1) // 4, (y2 - y1) // 4
+            # Gaussian around the detection; sigma floored at one pixel for tiny boxes
+            center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+            sigma_x, sigma_y = max((x2 - x1) / 4, 1.0), max((y2 - y1) / 4, 1.0)
             
-            y_coords, x_coords = np.ogrid[:image.shape[0], :image.shape[1]]
-            gaussian = np.exp(-((x_coords - center_x)**2 / (2 * sigma_x**2) + 
-                              (y_coords - center_y)**2 / (2 * sigma_y**2)))
+            wx1, wx2 = max(0, int(center_x - 3 * sigma_x)), min(w, int(center_x + 3 * sigma_x) + 1)
+            wy1, wy2 = max(0, int(center_y - 3 * sigma_y)), min(h, int(center_y + 3 * sigma_y) + 1)
+            if wx1 >= wx2 or wy1 >= wy2:
+                continue
             
-            heatmap += gaussian * confidence
+            gaussian_x = np.exp(-(np.arange(wx1, wx2, dtype=np.float32) - center_x) ** 2 / (2 * sigma_x ** 2))
+            gaussian_y = np.exp(-(np.arange(wy1, wy2, dtype=np.float32) - center_y) ** 2 / (2 * sigma_y ** 2))
+            heatmap[wy1:wy2, wx1:wx2] += np.outer(gaussian_y, gaussian_x).astype(np.float32) * confidence
         
         # Normalize heatmap
         if heatmap.max() > 0:
@@ -45,38 +80,141 @@ class ModelExplainer:
         
         return image, heatmap
     
-    def create_lime_explanation(self, image, num_samples=100):
-        """LIME-style explanation by perturbing image regions"""
-        h, w = image.shape[:2]
-        segment_size = 32  # Size of segments to perturb
+    def gradient_cam(self, image, target_class=None, conf=0.25, iou=0.45, cam_layer=None, imgsz=640):
+        """Grad-CAM from the detection forward pass itself
+
+        A hook on `cam_layer` (default: the SPPF block closing the backbone)
+        keeps its activations. The raw head output of the same pass is
+        filtered by `conf` and NMS into the detections. The summed class
+        scores of those detections (only `target_class` if given) are
+        back-propagated once. Returns (heatmap, detections): the heatmap is
+        image-sized in [0, 1], and detections is an (N, 6) array of
+        [x1, y1, x2, y2, confidence, class_id] in image coordinates.
+        """
+        import torchvision
         
-        # Get original prediction
-        original_results = self.model(image)
-        original_detections = len(original_results[0].boxes) if original_results[0].boxes is not None else 0
-        
-        # Create segments
-        segments = []
-        importances = []
-        
-        for y in range(0, h, segment_size):
-            for x in range(0, w, segment_size):
-                # Create masked image
-                masked_image = image.copy()
-                y_end = min(y + segment_size, h)
-                x_end = min(x + segment_size, w)
-                
-                # Mask this segment
-                masked_image[y:y_end, x:x_end] = 0
+        net = self.model.model
+        net.eval()
+        layers = net.model
+        if cam_layer is None:
+            cam_layer = next((index for index, layer in enumerate(layers) if type(layer).__name__ == 'SPPF'),
+                             layers[-1].f[-1])
+        
+        captured = {}
+        def keep_activation(module, inputs, output):
+            captured['activation'] = output
+            output.register_hook(lambda grad: captured.__setitem__('gradient', grad))
+        handle = layers[cam_layer].register_forward_hook(keep_activation)
+        
+        canvas, scale, (pad_x, pad_y) = letterbox(image, imgsz)
+        parameter = next(net.parameters())
+        tensor = torch.from_numpy(canvas[:, :, ::-1].copy()).permute(2, 0, 1)[None]
+        # Gradients must flow even if the loaded weights are frozen
+        tensor = tensor.to(parameter.device, parameter.dtype).div(255).requires_grad_(True)
+        
+        h, w = image.shape[:2]
+        heatmap = np.zeros((h, w), dtype=np.float32)
+        try:
+            with torch.enable_grad():
+                output = net(tensor)
+                predictions = (output[0] if isinstance(output, (list, tuple)) else output)[0]
+                scores = predictions[4:]  # (classes, anchors), boxes are xywh in predictions[:4]
                 
-                # Get prediction on masked image
-                masked_results = self.model(masked_image)
-                masked_detections = len(masked_results[0].boxes) if masked_results[0].boxes is not None else 0
+                best, classes = scores.detach().max(0)
+                candidates = (best > conf).nonzero().squeeze(1)
+                xywh = predictions[:4, candidates].detach().T
+                boxes = torch.cat((xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2), 1)
+                kept = torchvision.ops.batched_nms(boxes, best[candidates], classes[candidates], iou)
+                anchors = candidates[kept]
                 
-                # Calculate importance (how much detection drops when this region is masked)
-                importance = original_detections - masked_detections
+                detections = torch.cat((boxes[kept], best[anchors, None], classes[anchors, None].float()), 1).cpu().numpy()
+                detections[:, [0, 2]] = (detections[:, [0, 2]] - pad_x) / scale
+                detections[:, [1, 3]] = (detections[:, [1, 3]] - pad_y) / scale
                 
-                segments.append((x, y, x_end, y_end))
-                importances.append(importance)
+                if target_class is not None:
+                    anchors = anchors[classes[anchors] == target_class]
+                if len(anchors) == 0 or 'activation' not in captured:
+                    return heatmap, detections
+                scores[classes[anchors], anchors].sum().backward()
+        finally:
+            handle.remove()
+        
+        activation = captured['activation'].detach()[0]
+        weights = captured['gradient'][0].mean(dim=(1, 2))
+        cam = F.relu((weights[:, None, None] * activation).sum(0))
+        cam = F.interpolate(cam[None, None], size=(imgsz, imgsz), mode='bilinear', align_corners=False)[0, 0]
+        
+        # Crop the letterbox padding and map back to the image size
+        new_w, new_h = int(round(w * scale)), int(round(h * scale))
+        cam = cam[pad_y:pad_y + new_h, pad_x:pad_x + new_w].cpu().numpy().astype(np.float32)
+        heatmap = cv2.resize(cam, (w, h), interpolation=cv2.INTER_LINEAR)
+        if heatmap.max() > 0:
+            heatmap = heatmap / heatmap.max()
+        return heatmap, detections
+    
+    def create_lime_explanation(self, image, num_samples=100, results=None, coarse_size=128, min_size=32,
+                                refine_threshold=0.1, margin=0.25, batch_size=16):
+        """Occlusion explanation around the detections, refined coarse-to-fine
+
+        Only grid cells touching a detection box (grown by `margin`) are
+        masked. Masked variants are scored in batches of `batch_size`, and a
+        cell is split into quarters only when masking it drops the detection
+        score by at least `refine_threshold` of the original, down to
+        `min_size` pixels. num_samples caps the number of masked images scored.
+        The score of an image is the summed confidence of the original
+        detections it still finds (same class, IoU >= 0.5).
+        """
+        h, w = image.shape[:2]
+        
+        # Get original prediction
+        if results is None:
+            results = self.model(image, verbose=False)
+        boxes = results[0].boxes
+        if boxes is None or len(boxes) == 0:
+            return [], []
+        original = (boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy())
+        original_score = float(original[2].sum())
+        
+        # Coarse cells covering the detections and their surroundings
+        segments = set()
+        for x1, y1, x2, y2 in original[0]:
+            grow_x, grow_y = (x2 - x1) * margin, (y2 - y1) * margin
+            gx1, gy1 = max(0, int((x1 - grow_x) // coarse_size)), max(0, int((y1 - grow_y) // coarse_size))
+            gx2, gy2 = int(min(w - 1, x2 + grow_x) // coarse_size), int(min(h - 1, y2 + grow_y) // coarse_size)
+            for gy in range(gy1, gy2 + 1):
+                for gx in range(gx1, gx2 + 1):
+                    x, y = gx * coarse_size, gy * coarse_size
+                    segments.add((x, y, min(x + coarse_size, w), min(y + coarse_size, h)))
+        
+        leaves = {}
+        refined = {}
+        pending = sorted(segments, key=lambda segment: (segment[1], segment[0]))
+        budget = num_samples
+        while pending and budget > 0:
+            level, pending = pending[:budget], pending[budget:]
+            budget -= len(level)
+            drops = self._occlusion_drops(image, level, original, original_score, batch_size)
+            
+            for segment, drop in zip(level, drops):
+                leaves[segment] = drop
+                x, y, x_end, y_end = segment
+                width, height = x_end - x, y_end - y
+                if drop >= refine_threshold * original_score and max(width, height) > min_size:
+                    half_w, half_h = max(width // 2, 1), max(height // 2, 1)
+                    children = [child for child in (
+                        (x, y, x + half_w, y + half_h), (x + half_w, y, x_end, y + half_h),
+                        (x, y + half_h, x + half_w, y_end), (x + half_w, y + half_h, x_end, y_end)
+                    ) if child[2] > child[0] and child[3] > child[1]]
+                    refined[segment] = children
+                    pending.extend(children)
+        
+        # A refined segment is replaced by its children once they were all
+        # scored; if the budget ran out first it keeps its own score
+        for segment in [parent for parent, children in refined.items() if all(child in leaves for child in children)]:
+            del leaves[segment]
+        
+        segments = list(leaves)
+        importances = [leaves[segment] for segment in segments]
         
         # Normalize importances
         if importances:
@@ -86,8 +224,21 @@ class ModelExplainer:
         
         return segments, importances
     
-    def visualize_explanations(self, image_path, save_dir="outputs/explainability"):
-        """Generate and save all explanation visualizations"""
+    def _occlusion_drops(self, image, segments, original, original_score, batch_size):
+        """Score drop for each segment masked out, one forward pass per batch"""
+        drops = []
+        batch = np.empty((min(batch_size, len(segments)),) + image.shape, dtype=image.dtype)
+        for start in range(0, len(segments), batch_size):
+            chunk = segments[start:start + batch_size]
+            for index, (x, y, x_end, y_end) in enumerate(chunk):
+                batch[index] = image
+                batch[index, y:y_end, x:x_end] = 0
+            masked_results = self.model(list(batch[:len(chunk)]), verbose=False)
+            drops.extend(original_score - _matched_score(original, result.boxes) for result in masked_results)
+        return drops
+    
+    def visualize_explanations(self, image_path, save_dir="outputs/explainability", cam_mode='boxes'):
+        """Generate and save all explanation visualizations (cam_mode is 'boxes' or 'gradient')"""
         os.makedirs(save_dir, exist_ok=True)
         
         image = cv2.imread(image_path)
@@ -96,15 +247,18 @@ class ModelExplainer:
         
         image_name = os.path.splitext(os.path.basename(image_path))[0]
         
-        # 1. Original image with detections
-        results = self.model(image)
+        # 1-2. Detections and heatmap; in gradient mode both come from the
+        # Grad-CAM pass, so the image goes through the model only once
+        if cam_mode == 'gradient':
+            heatmap, detections = self.gradient_cam(image)
+            results = [Results(image, path=image_path, names=self.model.names, boxes=torch.from_numpy(detections))]
+        else:
+            results = self.model(image)
+            _, heatmap = self.generate_grad_cam(image, mode=cam_mode, results=results)
         annotated_image = results[0].plot()
         
-        # 2. Grad-CAM visualization
-        _, heatmap = self.generate_grad_cam(image)
-        
         # 3. LIME explanation
-        segments, importances = self.create_lime_explanation(image)
+        segments, importances = self.create_lime_explanation(image, results=results)
         
         # Create visualization plots
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
@@ -118,7 +272,7 @@ class ModelExplainer:
         # Grad-CAM heatmap
         axes[0, 1].imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
         im = axes[0, 1].imshow(heatmap, alpha=0.6, cmap='jet')
-        axes[0, 1].set_title('Attention Heatmap (Grad-CAM Style)')
+        axes[0, 1].set_title('Grad-CAM Heatmap' if cam_mode == 'gradient' else 'Attention Heatmap (Grad-CAM Style)')
         axes[0, 1].axis('off')
         plt.colorbar(im, ax=axes[0, 1], fraction=0.046, pad=0.04)
         
@@ -21,7 +21,7 @@ class FargateProcessor:
         for r in results:
             for box in r.boxes:
                 if box.cls == 2:  # car class
-                    vehicles.append(box)
+                    vehicles.append(box.xyxy[0].tolist())
                 elif box.cls == 9:  # traffic light class
                     traffic_lights.append(box)
         
@@ -0,0 +1,71 @@
+"""
+Sampled frame reader shared by the video processors
+"""
+
+import itertools
+import cv2
+
+class FrameSource:
+    """Yield sampled frames of a video without retrieving the ones in between
+
+    Sampling is by frame stride or by a wall-clock interval in seconds.
+    Frames that are skipped only go through grab(), which still decodes
+    them but skips retrieve() and its color conversion; gaps of at least
+    `seek_threshold` frames are jumped with a direct seek instead.
+    Without an end_frame the video is read until decoding fails, since the
+    container's frame count may be missing (0) or short.
+    """
+
+    def __init__(self, path, stride=1, interval=None, start_frame=0, end_frame=None, seek_threshold=90):
+        self.path = path
+        self.stride = max(1, int(stride))
+        self.interval = interval
+        self.start_frame = start_frame
+        self.seek_threshold = seek_threshold
+
+        cap = cv2.VideoCapture(path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # as reported; only a hint
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        self.end_frame = end_frame or None
+
+    def sample_frames(self):
+        """Frame indices to read, in order; unbounded without an end_frame"""
+        if self.interval:
+            last = None
+            for k in itertools.count():
+                frame_num = self.start_frame + int(round(k * self.interval * self.fps))
+                if self.end_frame is not None and frame_num >= self.end_frame:
+                    return
+                if last is None or frame_num > last:
+                    yield frame_num
+                    last = frame_num
+        elif self.end_frame is None:
+            yield from itertools.count(self.start_frame, self.stride)
+        else:
+            yield from range(self.start_frame, self.end_frame, self.stride)
+
+    def __iter__(self):
+        cap = cv2.VideoCapture(self.path)
+        position = 0
+        try:
+            for frame_num in self.sample_frames():
+                gap = frame_num - position
+                if gap >= self.seek_threshold or gap < 0:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+                else:
+                    for _ in range(gap):
+                        if not cap.grab():
+                            return
+                position = frame_num
+
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                position += 1
+                yield frame_num, frame_num / self.fps, frame
+        finally:
+            cap.release()
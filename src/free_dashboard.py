@@ -1,14 +1,13 @@
 import streamlit as st
 import sqlite3
-import pandas as pd
-import cv2
-import numpy as np
 import os
 import shutil
-import time
-from PIL import Image
 from datetime import datetime
-from license_plate_recognition import LicensePlateRecognizer, process_frame_with_plates
+from ocr_engines import get_easyocr_reader, warm_easyocr_reader, ocr_status
+from violation_db import ensure_violations_table, insert_violation
+
+# cv2, numpy, pandas, PIL, ultralytics and the video pipeline are imported on
+# the pages that use them so the dashboard shell starts quickly
 
 st.set_page_config(
     page_title="AI Traffic Monitor",
@@ -210,6 +209,8 @@ st.markdown("""
 
 def detect_traffic_light_color(light_region):
     """Improved traffic light color detection"""
+    import cv2
+    
     if light_region.size == 0:
         return False, False, False
     
@@ -265,6 +266,8 @@ def is_valid_vehicle_detection(bbox, confidence, vehicle_class):
     return True
 
 def load_violations():
+    import pandas as pd
+    
     conn = sqlite3.connect('current_session.db')
     try:
         df = pd.read_sql_query("SELECT * FROM violations ORDER BY timestamp DESC", conn)
@@ -287,30 +290,28 @@ def load_violations():
     conn.close()
     return df
 
-def save_violation_to_db(violation_type, vehicle_id, image_path=None, location="Live Detection", gps_coords="0.0,0.0", camera_id="Live Camera"):
-    """Save a violation to the database"""
+def count_violations():
+    """Number of violations in the current session without loading pandas"""
+    conn = sqlite3.connect('current_session.db')
+    try:
+        return conn.execute("SELECT COUNT(*) FROM violations").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+def save_violation_to_db(violation_type, vehicle_id, image_path=None, location="Live Detection", gps_coords="0.0,0.0", camera_id="Live Camera", clip_path=None):
+    """Save a violation to the database and return its row id (None if it could not be saved)"""
     conn = sqlite3.connect('current_session.db')
     try:
         # Ensure table exists
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS violations (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                violation_type TEXT,
-                image_path TEXT,
-                vehicle_id TEXT,
-                location TEXT,
-                gps_coords TEXT,
-                camera_id TEXT
-            )
-        ''')
+        ensure_violations_table(conn)
 
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        conn.execute('''
-            INSERT INTO violations (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, violation_type, image_path or '', vehicle_id, location, gps_coords, camera_id))
+        violation_id = insert_violation(conn, timestamp, violation_type, image_path or '', vehicle_id,
+                                        location, gps_coords, camera_id, clip_path)
         conn.commit()
+        return violation_id
     except Exception as e:
         st.error(f"Error saving violation to database: {e}")
     finally:
@@ -361,9 +362,14 @@ def main():
         # System info
         st.markdown("---")
         st.markdown("### 📈 System Status")
-        df = load_violations()
-        st.metric("Total Records", len(df))
+        st.metric("Total Records", count_violations())
         st.metric("Session Active", "✅ Online")
+        
+        # Load the plate OCR networks in the background once a page that reads plates is open
+        if page in ("📷 Process Images", "📺 Live Detection"):
+            warm_easyocr_reader()
+        status = ocr_status()
+        st.metric("Plate OCR", {'ready': "✅ Ready", 'warming': "⏳ Warming", 'failed': "❌ Unavailable"}.get(status, "💤 Idle"))
     
     if page == "📊 Dashboard":
         st.markdown("## 📊 Smart Analytics Dashboard")
@@ -431,7 +437,25 @@ def main():
         else:
             from violation_display import display_violations_summary
             display_violations_summary(df)
-    
+
+        if not df.empty:
+            st.markdown("### 🔁 Repeat Offenders")
+            from offender_stats import top_offenders
+            from violation_categories import VIOLATION_CATEGORIES
+            from violation_db import connect
+            conn = connect()
+            try:
+                offenders = top_offenders(conn, 'plate', limit=10)
+                if not offenders:
+                    st.info("No repeat offenders yet.")
+                for offender in offenders:
+                    counts = " · ".join(f"{VIOLATION_CATEGORIES[category]['color']} {count}"
+                                        for category, count in offender['counts'].items() if count)
+                    st.write(f"**{offender['label']}** — {offender['total']} violations ({counts}) · "
+                             f"worst: {offender['worst_category']} · {offender['first_seen']} → {offender['last_seen']}")
+            finally:
+                conn.close()
+
     elif page == "📊 Analytics":
         from modern_dashboard import show_advanced_analytics, show_system_health
         
@@ -474,14 +498,20 @@ def main():
                 </div>
                 """.format(uploaded_file.name, uploaded_file.size / 1024 / 1024), unsafe_allow_html=True)
                 
+                use_all_cores = st.checkbox("⚡ Use all CPU cores", help="Split long videos into segments processed in parallel; violations get no video clips")
+                
                 if st.button("🚀 Start Analysis", use_container_width=True):
                     with st.spinner("🔄 Analyzing video..."):
                         with open(f"data/samples/{uploaded_file.name}", "wb") as f:
                             f.write(uploaded_file.getbuffer())
                         
-                        from local_processor import LocalTrafficProcessor
-                        processor = LocalTrafficProcessor()
-                        processor.process_video(f"data/samples/{uploaded_file.name}")
+                        if use_all_cores:
+                            from segment_processor import process_video_parallel
+                            process_video_parallel(f"data/samples/{uploaded_file.name}")
+                        else:
+                            from local_processor import LocalTrafficProcessor
+                            processor = LocalTrafficProcessor()
+                            processor.process_video(f"data/samples/{uploaded_file.name}")
                     
                     st.success("✅ Analysis complete!")
                     
@@ -535,6 +565,9 @@ def main():
                     st.rerun()
     
     elif page == "📷 Process Images":
+        import cv2
+        import numpy as np
+        
         st.markdown("## 📷 Image Analysis")
         
         st.markdown("""
@@ -570,8 +603,11 @@ def main():
                 st.info(f"... and {len(uploaded_files) - 4} more images")
             
             if st.button("🔍 Analyze All Images", use_container_width=True):
-                import easyocr
-                reader = easyocr.Reader(['en'])
+                if ocr_status() != 'ready':
+                    with st.spinner("🔤 Plate OCR warming up..."):
+                        reader = get_easyocr_reader()
+                else:
+                    reader = get_easyocr_reader()
                 
                 results = []
                 progress_bar = st.progress(0)
@@ -736,11 +772,34 @@ def main():
                             )
             
             st.markdown("---")
-        
+
+        # Plate lookup over this session and every archive
+        st.markdown("### 🔎 License Plate Search")
+        plate_col, distance_col = st.columns([3, 1])
+        with plate_col:
+            plate_query = st.text_input("Plate number", placeholder="e.g. MH12AB1234")
+        with distance_col:
+            max_distance = st.selectbox("Allowed OCR errors", [0, 1, 2], index=1)
+
+        if plate_query:
+            from plate_index import search_archives
+            matches = search_archives(plate_query, max_distance=max_distance)
+            if matches:
+                st.write(f"Found {len(matches)} matching reads")
+                for match in matches:
+                    label = "exact" if match['distance'] == 0 else f"{match['distance']} edit(s)"
+                    st.write(f"🚗 **{match['plate_number']}** ({label}) — {match['violation_type']} at "
+                             f"{match['location']} on {match['timestamp']} · {match['database']}")
+            else:
+                st.info("No matching plates found.")
+            st.markdown("---")
+
         from violation_display import display_violation_details_page
         display_violation_details_page(df)
     
     elif page == "📺 Live Detection":
+        import cv2
+        
         st.markdown("## 📺 Live Detection System")
         
         # Detection source selection
@@ -786,6 +845,9 @@ def main():
                     st.session_state.camera_active = False
             
             else:
+                if 'live_camera' in st.session_state:
+                    from camera_detection import stop_live_camera
+                    stop_live_camera()
                 st.info("📹 Click 'Start Camera' to begin live detection")
         
         else:
@@ -804,9 +866,14 @@ def main():
         
         if detection_source == "🎥 Upload Video" and uploaded_file:
             import tempfile
-            import time
             from ultralytics import YOLO
             from screenshot_handler import capture_violation_screenshot
+            from plate_queue import PlateOCRQueue
+            from clip_buffer import ClipRingBuffer
+            from frame_source import FrameSource
+            from video_worker import VideoWorker, poll_worker
+            from detection_cache import DetectionCache
+            from local_processor import detect_frames, detect_frames_settings
             
             # Save uploaded file
             tfile = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
@@ -830,7 +897,8 @@ def main():
                     st.session_state.start_detection = False
                     st.session_state.stop_detection = True
             with col3:
-                speed = st.slider("🏃 Speed (FPS)", 1, 30, 10, help="Processing speed")
+                refresh_hz = st.slider("🔄 UI Refresh (Hz)", 2, 5, 4, help="How often the preview and counters update")
+                frame_step = st.number_input("⏭️ Frame Step", 1, 30, 1, help="Analyze every Nth frame; skipped frames are grabbed but not converted")
             with col4:
                 max_frames = st.number_input("🎬 Max Frames", 0, 1000, 0, help="0 = Full video")
                 if max_frames == 0:
@@ -856,79 +924,128 @@ def main():
                 """, unsafe_allow_html=True)
                 violations_placeholder = st.empty()
             
+            upload_worker = st.session_state.get('upload_worker')
+            if st.session_state.get('stop_detection', False) and upload_worker is not None:
+                # Stop pressed: the rerun interrupted the page loop, so end the worker too
+                upload_worker.stop()
+                st.session_state.upload_worker = None
+                st.session_state.stop_detection = False
+                st.warning(f"⏹️ Analysis stopped after {upload_worker.processed} frames.")
+            
             if st.session_state.get('start_detection', False):
-                model = YOLO('yolov8n.pt')
-                plate_recognizer = LicensePlateRecognizer()
-                cap = cv2.VideoCapture(video_path)
-                
-                frame_count = 0
-                violations_found = 0
-                live_violations = []
-                violated_vehicles = set()  # Track vehicles that already have violations
-                detected_plates = []  # Track license plates
-                
                 progress_bar = st.progress(0)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
                 
-                while cap.isOpened() and frame_count < min(max_frames, total_frames):
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
+                if upload_worker is None:
+                    weights = 'yolov8n.pt'
+                    model = None  # loaded on the first cache miss
                     
-                    # Smart processing: resize frame for faster detection
-                    processing_frame = cv2.resize(frame, (640, 480))  # Smaller size = faster
-                    results = model(processing_frame, conf=0.35, device='cpu')  # Slightly higher confidence
-                    annotated_frame = frame.copy()  # Keep original size for display
+                    def run_model(frames):
+                        nonlocal model
+                        if model is None:
+                            model = YOLO(weights)
+                        return detect_frames(model, frames)
                     
-                    # Initialize violation detection flag
-                    violation_detected_this_frame = False
+                    try:
+                        detection_cache = DetectionCache.for_media(video_path, detect_frames_settings(weights))
+                    except BlockingIOError:
+                        # Another session is analysing this video; detect without the cache
+                        detection_cache = None
+                    source = FrameSource(video_path, stride=frame_step, end_frame=max_frames)
+                    video_fps = source.fps
+                    clip_buffer = ClipRingBuffer(fps=video_fps / frame_step)
+                    # For the progress bar only; the source reads on if the container under-reports
+                    total_frames = min(max_frames, source.total_frames) if source.total_frames else max_frames
                     
-                    # Draw detections and check violations
-                    current_violations = 0
-                    traffic_lights = []
-                    vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
-                    persons = []
+                    violations_found = 0
+                    live_violations = []
+                    violated_vehicles = set()  # Track vehicles that already have violations
+                    detected_plates = []  # Plates read back from the OCR queue
+                    violation_frames = {}
+                    vehicle_positions = {}
+                    category_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+                    type_counts = {}
                     
-                    # COCO class mapping
-                    vehicle_classes = {
-                        2: ('cars', 'Car', (0, 255, 0)),
-                        3: ('motorcycles', 'Motorcycle', (255, 0, 255)),
-                        5: ('buses', 'Bus', (0, 255, 255)),
-                        7: ('trucks', 'Truck', (255, 255, 0))
-                    }
+                    def plate_read(violation_id, plate_number, confidence):
+                        detected_plates.append({
+                            'frame': violation_frames.get(violation_id),
+                            'plate_number': plate_number,
+                            'confidence': confidence,
+                            'time': datetime.now().strftime('%H:%M:%S')
+                        })
                     
-                    # Scale coordinates back to original frame size
-                    scale_x = frame.shape[1] / 640
-                    scale_y = frame.shape[0] / 480
+                    # Plates are read off the detection thread, only for violators
+                    plate_queue = PlateOCRQueue(on_plate=plate_read)
                     
-                    for r in results:
-                        for box in r.boxes:
-                            # Scale coordinates back to original size
-                            x1, y1, x2, y2 = box.xyxy[0].int().tolist()
-                            x1, x2 = int(x1 * scale_x), int(x2 * scale_x)
-                            y1, y2 = int(y1 * scale_y), int(y2 * scale_y)
-                            conf = float(box.conf)
-                            cls = int(box.cls)
-                            
+                    def queue_plate(violation_id, frame_count, frame, bbox):
+                        if violation_id is None:
+                            return
+                        # Mapped first: the OCR thread may report the plate before submit returns
+                        violation_frames[violation_id] = frame_count
+                        if not plate_queue.submit_vehicle(violation_id, frame, bbox):
+                            violation_frames.pop(violation_id, None)
+                    
+                    def sampled_frames():
+                        try:
+                            yield from source
+                        finally:
+                            clip_buffer.flush()
+                            plate_queue.close()
+                            if detection_cache is not None:
+                                detection_cache.close()
+                    
+                    def analyze_frame(frame_count, video_time, frame):
+                        """Detection, rules and annotation for one frame; runs on the worker thread"""
+                        nonlocal violations_found
+                        from violation_categories import get_violation_category
+                        from screenshot_handler import capture_violation_screenshot
+                        seen = len(live_violations)
+                        
+                        clip_buffer.add_frame(frame, frame_count / video_fps)
+                        
+                        # Detection at 640x480, conf 0.35; frames analysed before are replayed from the cache
+                        if detection_cache is not None:
+                            detections = detection_cache.detect(frame_count, frame, run_model)
+                        else:
+                            detections = run_model([frame])[0]
+                        annotated_frame = frame.copy()  # Keep original size for display
+                        
+                        # Draw detections and check violations
+                        current_violations = 0
+                        traffic_lights = []
+                        vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
+                        persons = []
+                        
+                        # COCO class mapping
+                        vehicle_classes = {
+                            2: ('cars', 'Car', (0, 255, 0)),
+                            3: ('motorcycles', 'Motorcycle', (255, 0, 255)),
+                            5: ('buses', 'Bus', (0, 255, 255)),
+                            7: ('trucks', 'Truck', (255, 255, 0))
+                        }
+                        
+                        # Rows are already scaled back to the original frame size
+                        for x1, y1, x2, y2, conf, cls in detections.tolist():
+                            x1, y1, x2, y2, cls = int(x1), int(y1), int(x2), int(y2), int(cls)
+                        
                             if cls in vehicle_classes and is_valid_vehicle_detection([x1, y1, x2, y2], conf, cls):
                                 vehicle_type, label, default_color = vehicle_classes[cls]
                                 vehicles[vehicle_type].append((x1, y1, x2, y2, conf))
-                                
+                            
                                 # Default green color for normal vehicles
                                 cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), default_color, 2)
                                 cv2.putText(annotated_frame, f"{label} {conf:.2f}", (x1, y1-10), 
                                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, default_color, 2)
-                            
+                        
                             elif cls == 0:  # person
                                 persons.append((x1, y1, x2, y2, conf))
                                 cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (255, 0, 0), 1)
                                 cv2.putText(annotated_frame, "Person", (x1, y1-10), 
                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
-                            
+                        
                             elif cls == 9:  # traffic light
                                 light_region = frame[y1:y2, x1:x2]
                                 is_red, is_yellow, is_green = detect_traffic_light_color(light_region)
-                                
+                            
                                 if is_red:
                                     color = (0, 0, 255)
                                     label = "🔴 RED"
@@ -945,271 +1062,290 @@ def main():
                                     color = (128, 128, 128)
                                     label = "⚪ SIGNAL"
                                     traffic_lights.append((x1, y1, x2, y2, conf, 'unknown'))
-                                
+                            
                                 cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
                                 cv2.putText(annotated_frame, label, (x1, y1-10), 
                                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                    
-                    # Check helmet violations for motorcycles
-                    for mx1, my1, mx2, my2, mconf in vehicles['motorcycles']:
-                        # Create unique vehicle ID based on position
-                        vehicle_id = f"bike_{int(mx1/50)}_{int(my1/50)}"
                         
-                        # Skip if this vehicle already has a violation
-                        if vehicle_id in violated_vehicles:
-                            continue
+                        # Violators are followed so their plates get read from several frames
+                        plate_queue.follow(frame, [box for boxes in vehicles.values() for box in boxes])
+                        
+                        # Check helmet violations for motorcycles
+                        for mx1, my1, mx2, my2, mconf in vehicles['motorcycles']:
+                            # Create unique vehicle ID based on position
+                            vehicle_id = f"bike_{int(mx1/50)}_{int(my1/50)}"
+                        
+                            # Skip if this vehicle already has a violation
+                            if vehicle_id in violated_vehicles:
+                                continue
                             
-                        helmet_violation = False
-                        for px1, py1, px2, py2, pconf in persons:
-                            # Check if person overlaps with motorcycle
-                            if (px1 < mx2 and px2 > mx1 and py1 < my2 and py2 > my1):
-                                # Simple helmet check - look for dark pixels in head region
-                                head_height = int((py2 - py1) * 0.2)
-                                head_region = frame[py1:py1 + head_height, px1:px2]
+                            helmet_violation = False
+                            for px1, py1, px2, py2, pconf in persons:
+                                # Check if person overlaps with motorcycle
+                                if (px1 < mx2 and px2 > mx1 and py1 < my2 and py2 > my1):
+                                    # Simple helmet check - look for dark pixels in head region
+                                    head_height = int((py2 - py1) * 0.2)
+                                    head_region = frame[py1:py1 + head_height, px1:px2]
                                 
-                                if head_region.size > 0:
-                                    gray = cv2.cvtColor(head_region, cv2.COLOR_BGR2GRAY)
-                                    mask = (gray < 80).astype('uint8')
-                                    dark_pixels = cv2.countNonZero(mask)
-                                    total_pixels = gray.shape[0] * gray.shape[1]
+                                    if head_region.size > 0:
+                                        gray = cv2.cvtColor(head_region, cv2.COLOR_BGR2GRAY)
+                                        mask = (gray < 80).astype('uint8')
+                                        dark_pixels = cv2.countNonZero(mask)
+                                        total_pixels = gray.shape[0] * gray.shape[1]
                                     
-                                    if dark_pixels < total_pixels * 0.3:
-                                        helmet_violation = True
-                                        break
+                                        if dark_pixels < total_pixels * 0.3:
+                                            helmet_violation = True
+                                            break
                         
-                        if helmet_violation:
-                            violated_vehicles.add(vehicle_id)  # Mark this vehicle as violated
-                            current_violations += 1
-                            violations_found += 1
-                            # Change vehicle border to RED for violation
-                            cv2.rectangle(annotated_frame, (mx1, my1), (mx2, my2), (0, 0, 255), 4)
-                            cv2.putText(annotated_frame, "🚨 NO HELMET VIOLATION", (mx1, my1-10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                            if helmet_violation:
+                                violated_vehicles.add(vehicle_id)  # Mark this vehicle as violated
+                                current_violations += 1
+                                violations_found += 1
+                                # Change vehicle border to RED for violation
+                                cv2.rectangle(annotated_frame, (mx1, my1), (mx2, my2), (0, 0, 255), 4)
+                                cv2.putText(annotated_frame, "🚨 NO HELMET VIOLATION", (mx1, my1-10), 
+                                          cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                             
-                            violation_detected_this_frame = True
+                                # Capture screenshot for video upload detection
+                                screenshot_path = capture_violation_screenshot(annotated_frame, 'No Helmet Violation', vehicle_id)
                             
-                            # Capture screenshot for video upload detection
-                            from screenshot_handler import capture_violation_screenshot
-                            screenshot_path = capture_violation_screenshot(annotated_frame, 'No Helmet Violation', vehicle_id)
+                                # Add to live violations list
+                                live_violations.append({
+                                    'frame': frame_count,
+                                    'type': 'No Helmet Violation',
+                                    'vehicle': 'Motorcycle',
+                                    'confidence': f'{mconf:.1f}%',
+                                    'time': datetime.now().strftime('%H:%M:%S')
+                                })
+
+                                # Save to database with screenshot
+                                clip_path = clip_buffer.trigger('No Helmet Violation', vehicle_id, frame_count / video_fps)
+                                violation_id = save_violation_to_db('No Helmet Violation', vehicle_id, screenshot_path, "Live Detection", clip_path=clip_path)
+                                queue_plate(violation_id, frame_count, frame, (mx1, my1, mx2, my2))
+                        
+                        # Check speeding violations (simplified for live detection)
+                        
+                        for vehicle_type, vehicle_list in vehicles.items():
+                            for vx1, vy1, vx2, vy2, vconf in vehicle_list:
+                                vehicle_center = ((vx1 + vx2) / 2, (vy1 + vy2) / 2)
+                                vehicle_id = f"{vehicle_type[:-1]}_{int(vx1/50)}_{int(vy1/50)}"
                             
-                            # Add to live violations list
-                            live_violations.append({
-                                'frame': frame_count,
-                                'type': 'No Helmet Violation',
-                                'vehicle': 'Motorcycle',
-                                'confidence': f'{mconf:.1f}%',
-                                'time': datetime.now().strftime('%H:%M:%S')
-                            })
+                                if vehicle_id in vehicle_positions:
+                                    prev_pos, prev_frame = vehicle_positions[vehicle_id]
+                                    distance_pixels = ((vehicle_center[0] - prev_pos[0])**2 + (vehicle_center[1] - prev_pos[1])**2)**0.5
+                                    frame_diff = frame_count - prev_frame
+                                
+                                    if frame_diff > 0 and distance_pixels > 40 and vehicle_id not in violated_vehicles:
+                                        estimated_speed = (distance_pixels / frame_diff) * 2
+                                        if estimated_speed > 30:  # Speed threshold
+                                            violated_vehicles.add(vehicle_id)
+                                            current_violations += 1
+                                            violations_found += 1
+                                            # Change vehicle border to RED for violation
+                                            cv2.rectangle(annotated_frame, (vx1, vy1), (vx2, vy2), (0, 0, 255), 4)
+                                            cv2.putText(annotated_frame, "🚨 SPEEDING VIOLATION", (vx1, vy1-10), 
+                                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                                        
+                                            live_violations.append({
+                                                'frame': frame_count,
+                                                'type': 'Speeding Violation',
+                                                'vehicle': vehicle_type[:-1].title(),
+                                                'confidence': f'{vconf:.1f}%',
+                                                'time': datetime.now().strftime('%H:%M:%S')
+                                            })
 
-                            # Save to database with screenshot
-                            save_violation_to_db('No Helmet Violation', vehicle_id, screenshot_path, "Live Detection")
-                    
-                    # Check speeding violations (simplified for live detection)
-                    if not hasattr(st.session_state, 'vehicle_positions'):
-                        st.session_state.vehicle_positions = {}
-                    
-                    for vehicle_type, vehicle_list in vehicles.items():
-                        for vx1, vy1, vx2, vy2, vconf in vehicle_list:
-                            vehicle_center = ((vx1 + vx2) / 2, (vy1 + vy2) / 2)
-                            vehicle_id = f"{vehicle_type[:-1]}_{int(vx1/50)}_{int(vy1/50)}"
+                                            # Capture screenshot
+                                            screenshot_path = capture_violation_screenshot(annotated_frame, 'Speeding Violation', vehicle_id)
+                                        
+                                            # Save to database with screenshot
+                                            clip_path = clip_buffer.trigger('Speeding Violation', vehicle_id, frame_count / video_fps)
+                                            violation_id = save_violation_to_db('Speeding Violation', vehicle_id, screenshot_path, "Live Detection", clip_path=clip_path)
+                                            queue_plate(violation_id, frame_count, frame, (vx1, vy1, vx2, vy2))
+                            
+                                vehicle_positions[vehicle_id] = (vehicle_center, frame_count)
+                        
+                        # Check wrong way violations
+                        for vehicle_type, vehicle_list in vehicles.items():
+                            for vx1, vy1, vx2, vy2, vconf in vehicle_list:
+                                vehicle_id = f"{vehicle_type[:-1]}_{int(vx1/50)}_{int(vy1/50)}"
+                                current_pos = ((vx1 + vx2) / 2, (vy1 + vy2) / 2)
                             
-                            if vehicle_id in st.session_state.vehicle_positions:
-                                prev_pos, prev_frame = st.session_state.vehicle_positions[vehicle_id]
-                                distance_pixels = ((vehicle_center[0] - prev_pos[0])**2 + (vehicle_center[1] - prev_pos[1])**2)**0.5
-                                frame_diff = frame_count - prev_frame
+                                if vehicle_id in vehicle_positions:
+                                    prev_pos, prev_frame = vehicle_positions[vehicle_id]
                                 
-                                if frame_diff > 0 and distance_pixels > 40 and vehicle_id not in violated_vehicles:
-                                    estimated_speed = (distance_pixels / frame_diff) * 2
-                                    if estimated_speed > 30:  # Speed threshold
+                                    # Check if moving upward (wrong way)
+                                    if current_pos[1] < prev_pos[1] - 25 and vehicle_id not in violated_vehicles:
                                         violated_vehicles.add(vehicle_id)
                                         current_violations += 1
                                         violations_found += 1
                                         # Change vehicle border to RED for violation
                                         cv2.rectangle(annotated_frame, (vx1, vy1), (vx2, vy2), (0, 0, 255), 4)
-                                        cv2.putText(annotated_frame, "🚨 SPEEDING VIOLATION", (vx1, vy1-10), 
+                                        cv2.putText(annotated_frame, "🚨 WRONG WAY VIOLATION", (vx1, vy1-10), 
                                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                                        
+                                    
                                         live_violations.append({
                                             'frame': frame_count,
-                                            'type': 'Speeding Violation',
+                                            'type': 'Wrong Way Violation',
                                             'vehicle': vehicle_type[:-1].title(),
                                             'confidence': f'{vconf:.1f}%',
                                             'time': datetime.now().strftime('%H:%M:%S')
                                         })
 
-                                        violation_detected_this_frame = True
-                                        
                                         # Capture screenshot
-                                        screenshot_path = capture_violation_screenshot(annotated_frame, 'Speeding Violation', vehicle_id)
-                                        
-                                        # Save to database with screenshot
-                                        save_violation_to_db('Speeding Violation', vehicle_id, screenshot_path, "Live Detection")
-                            
-                            st.session_state.vehicle_positions[vehicle_id] = (vehicle_center, frame_count)
-                    
-                    # Check wrong way violations
-                    for vehicle_type, vehicle_list in vehicles.items():
-                        for vx1, vy1, vx2, vy2, vconf in vehicle_list:
-                            vehicle_id = f"{vehicle_type[:-1]}_{int(vx1/50)}_{int(vy1/50)}"
-                            current_pos = ((vx1 + vx2) / 2, (vy1 + vy2) / 2)
-                            
-                            if vehicle_id in st.session_state.vehicle_positions:
-                                prev_pos, prev_frame = st.session_state.vehicle_positions[vehicle_id]
-                                
-                                # Check if moving upward (wrong way)
-                                if current_pos[1] < prev_pos[1] - 25 and vehicle_id not in violated_vehicles:
-                                    violated_vehicles.add(vehicle_id)
-                                    current_violations += 1
-                                    violations_found += 1
-                                    # Change vehicle border to RED for violation
-                                    cv2.rectangle(annotated_frame, (vx1, vy1), (vx2, vy2), (0, 0, 255), 4)
-                                    cv2.putText(annotated_frame, "🚨 WRONG WAY VIOLATION", (vx1, vy1-10), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                                        screenshot_path = capture_violation_screenshot(annotated_frame, 'Wrong Way Violation', vehicle_id)
                                     
-                                    live_violations.append({
-                                        'frame': frame_count,
-                                        'type': 'Wrong Way Violation',
-                                        'vehicle': vehicle_type[:-1].title(),
-                                        'confidence': f'{vconf:.1f}%',
-                                        'time': datetime.now().strftime('%H:%M:%S')
-                                    })
-
-                                    violation_detected_this_frame = True
-                                    
-                                    # Capture screenshot
-                                    screenshot_path = capture_violation_screenshot(annotated_frame, 'Wrong Way Violation', vehicle_id)
-                                    
-                                    # Save to database with screenshot
-                                    save_violation_to_db('Wrong Way Violation', vehicle_id, screenshot_path, "Live Detection")
-                    
-                    # Check tailgating violations
-                    all_vehicles = []
-                    for vehicle_type, vehicle_list in vehicles.items():
-                        for vx1, vy1, vx2, vy2, vconf in vehicle_list:
-                            all_vehicles.append({
-                                'bbox': (vx1, vy1, vx2, vy2),
-                                'type': vehicle_type[:-1],
-                                'conf': vconf
-                            })
-                    
-                    for i, vehicle1 in enumerate(all_vehicles):
-                        for j, vehicle2 in enumerate(all_vehicles[i+1:], i+1):
-                            v1x1, v1y1, v1x2, v1y2 = vehicle1['bbox']
-                            v2x1, v2y1, v2x2, v2y2 = vehicle2['bbox']
+                                        # Save to database with screenshot
+                                        clip_path = clip_buffer.trigger('Wrong Way Violation', vehicle_id, frame_count / video_fps)
+                                        violation_id = save_violation_to_db('Wrong Way Violation', vehicle_id, screenshot_path, "Live Detection", clip_path=clip_path)
+                                        queue_plate(violation_id, frame_count, frame, (vx1, vy1, vx2, vy2))
+                        
+                        # Check tailgating violations
+                        all_vehicles = []
+                        for vehicle_type, vehicle_list in vehicles.items():
+                            for vx1, vy1, vx2, vy2, vconf in vehicle_list:
+                                all_vehicles.append({
+                                    'bbox': (vx1, vy1, vx2, vy2),
+                                    'type': vehicle_type[:-1],
+                                    'conf': vconf
+                                })
+                        
+                        for i, vehicle1 in enumerate(all_vehicles):
+                            for j, vehicle2 in enumerate(all_vehicles[i+1:], i+1):
+                                v1x1, v1y1, v1x2, v1y2 = vehicle1['bbox']
+                                v2x1, v2y1, v2x2, v2y2 = vehicle2['bbox']
                             
-                            center1 = ((v1x1 + v1x2) / 2, (v1y1 + v1y2) / 2)
-                            center2 = ((v2x1 + v2x2) / 2, (v2y1 + v2y2) / 2)
-                            distance = ((center1[0] - center2[0])**2 + (center1[1] - center2[1])**2)**0.5
+                                center1 = ((v1x1 + v1x2) / 2, (v1y1 + v1y2) / 2)
+                                center2 = ((v2x1 + v2x2) / 2, (v2y1 + v2y2) / 2)
+                                distance = ((center1[0] - center2[0])**2 + (center1[1] - center2[1])**2)**0.5
                             
-                            if distance < 70 and abs(center1[0] - center2[0]) < 40:
-                                vehicle_id = f"{vehicle1['type']}_{int(v1x1/50)}_{int(v1y1/50)}"
-                                if vehicle_id not in violated_vehicles:
-                                    violated_vehicles.add(vehicle_id)
-                                    current_violations += 1
-                                    violations_found += 1
-                                    # Change vehicle border to RED for violation
-                                    cv2.rectangle(annotated_frame, (v1x1, v1y1), (v1x2, v1y2), (0, 0, 255), 4)
-                                    cv2.putText(annotated_frame, "🚨 TAILGATING VIOLATION", (v1x1, v1y1-10), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                                if distance < 70 and abs(center1[0] - center2[0]) < 40:
+                                    vehicle_id = f"{vehicle1['type']}_{int(v1x1/50)}_{int(v1y1/50)}"
+                                    if vehicle_id not in violated_vehicles:
+                                        violated_vehicles.add(vehicle_id)
+                                        current_violations += 1
+                                        violations_found += 1
+                                        # Change vehicle border to RED for violation
+                                        cv2.rectangle(annotated_frame, (v1x1, v1y1), (v1x2, v1y2), (0, 0, 255), 4)
+                                        cv2.putText(annotated_frame, "🚨 TAILGATING VIOLATION", (v1x1, v1y1-10), 
+                                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                                     
-                                    live_violations.append({
-                                        'frame': frame_count,
-                                        'type': 'Tailgating Violation',
-                                        'vehicle': vehicle1['type'].title(),
-                                        'confidence': f'{vehicle1["conf"]:.1f}%',
-                                        'time': datetime.now().strftime('%H:%M:%S')
-                                    })
+                                        live_violations.append({
+                                            'frame': frame_count,
+                                            'type': 'Tailgating Violation',
+                                            'vehicle': vehicle1['type'].title(),
+                                            'confidence': f'{vehicle1["conf"]:.1f}%',
+                                            'time': datetime.now().strftime('%H:%M:%S')
+                                        })
 
-                                    violation_detected_this_frame = True
-                                    
-                                    # Capture screenshot
-                                    screenshot_path = capture_violation_screenshot(annotated_frame, 'Tailgating Violation', vehicle_id)
+                                        # Capture screenshot
+                                        screenshot_path = capture_violation_screenshot(annotated_frame, 'Tailgating Violation', vehicle_id)
                                     
-                                    # Save to database with screenshot
-                                    save_violation_to_db('Tailgating Violation', vehicle_id, screenshot_path, "Live Detection")
-                                    break
-                    
-                    # Check red light violations with improved detection
-                    red_lights_detected = any(light[5] == 'red' for light in traffic_lights if len(light) > 5)
-                    
-                    if red_lights_detected:
-                        for vehicle_type, vehicle_list in vehicles.items():
-                            for vx1, vy1, vx2, vy2, vconf in vehicle_list:
-                                vehicle_id = f"{vehicle_type}_{int(vx1/50)}_{int(vy1/50)}"
+                                        # Save to database with screenshot
+                                        clip_path = clip_buffer.trigger('Tailgating Violation', vehicle_id, frame_count / video_fps)
+                                        violation_id = save_violation_to_db('Tailgating Violation', vehicle_id, screenshot_path, "Live Detection", clip_path=clip_path)
+                                        queue_plate(violation_id, frame_count, frame, vehicle1['bbox'])
+                                        break
+                        
+                        # Check red light violations with improved detection
+                        red_lights_detected = any(light[5] == 'red' for light in traffic_lights if len(light) > 5)
+                        
+                        if red_lights_detected:
+                            for vehicle_type, vehicle_list in vehicles.items():
+                                for vx1, vy1, vx2, vy2, vconf in vehicle_list:
+                                    vehicle_id = f"{vehicle_type}_{int(vx1/50)}_{int(vy1/50)}"
                                 
-                                if vehicle_id in violated_vehicles:
-                                    continue
+                                    if vehicle_id in violated_vehicles:
+                                        continue
                                     
-                                # Check if vehicle is in intersection area
-                                if vy2 > frame.shape[0] * 0.7:
-                                    violated_vehicles.add(vehicle_id)
-                                    current_violations += 1
-                                    violations_found += 1
-                                    # Change vehicle border to RED for violation
-                                    cv2.rectangle(annotated_frame, (vx1, vy1), (vx2, vy2), (0, 0, 255), 4)
-                                    cv2.putText(annotated_frame, f"🚨 RED LIGHT VIOLATION", 
-                                              (vx1, vy1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                                    # Check if vehicle is in intersection area
+                                    if vy2 > frame.shape[0] * 0.7:
+                                        violated_vehicles.add(vehicle_id)
+                                        current_violations += 1
+                                        violations_found += 1
+                                        # Change vehicle border to RED for violation
+                                        cv2.rectangle(annotated_frame, (vx1, vy1), (vx2, vy2), (0, 0, 255), 4)
+                                        cv2.putText(annotated_frame, f"🚨 RED LIGHT VIOLATION", 
+                                                  (vx1, vy1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                                     
-                                    live_violations.append({
-                                        'frame': frame_count,
-                                        'type': 'Red Light Violation',
-                                        'vehicle': vehicle_type[:-1].title(),
-                                        'confidence': f'{vconf:.1f}%',
-                                        'time': datetime.now().strftime('%H:%M:%S')
-                                    })
+                                        live_violations.append({
+                                            'frame': frame_count,
+                                            'type': 'Red Light Violation',
+                                            'vehicle': vehicle_type[:-1].title(),
+                                            'confidence': f'{vconf:.1f}%',
+                                            'time': datetime.now().strftime('%H:%M:%S')
+                                        })
 
-                                    violation_detected_this_frame = True
-                                    
-                                    # Capture screenshot
-                                    screenshot_path = capture_violation_screenshot(annotated_frame, 'Red Light Violation', vehicle_id)
+                                        # Capture screenshot
+                                        screenshot_path = capture_violation_screenshot(annotated_frame, 'Red Light Violation', vehicle_id)
                                     
-                                    # Save to database with screenshot
-                                    save_violation_to_db('Red Light Violation', vehicle_id, screenshot_path, "Live Detection")
-                                    break
-                    
-                    # License plate detection ONLY when violation detected
-                    if violation_detected_this_frame:
-                        plates_data = plate_recognizer.recognize_license_plate(frame)
-                        if plates_data:
-                            annotated_frame = plate_recognizer.draw_plates(annotated_frame, plates_data)
-                            for plate in plates_data:
-                                detected_plates.append({
-                                    'frame': frame_count,
-                                    'plate_number': plate['plate_number'],
-                                    'confidence': plate['confidence'],
-                                    'time': datetime.now().strftime('%H:%M:%S')
-                                })
-                    
-                    # Add violation alert
-                    if current_violations > 0:
-                        cv2.rectangle(annotated_frame, (10, 10), (400, 50), (0, 0, 255), -1)
-                        cv2.putText(annotated_frame, f"VIOLATIONS: {current_violations}", 
-                                  (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                    
-                    # Display frame
-                    video_placeholder.image(annotated_frame, channels="BGR", use_container_width=True)
+                                        # Save to database with screenshot
+                                        clip_path = clip_buffer.trigger('Red Light Violation', vehicle_id, frame_count / video_fps)
+                                        violation_id = save_violation_to_db('Red Light Violation', vehicle_id, screenshot_path, "Live Detection", clip_path=clip_path)
+                                        queue_plate(violation_id, frame_count, frame, (vx1, vy1, vx2, vy2))
+                                        break
+                        
+                        # Add violation alert
+                        if current_violations > 0:
+                            cv2.rectangle(annotated_frame, (10, 10), (400, 50), (0, 0, 255), -1)
+                            cv2.putText(annotated_frame, f"VIOLATIONS: {current_violations}", 
+                                      (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                        
+                        
+                        for violation in live_violations[seen:]:
+                            category_counts[get_violation_category(violation['type'])] += 1
+                            type_counts[violation['type']] = type_counts.get(violation['type'], 0) + 1
+                        
+                        return annotated_frame, {
+                            'frame': frame_count,
+                            'total_frames': total_frames,
+                            'vehicle_counts': {name: len(found) for name, found in vehicles.items()},
+                            'traffic_lights': len(traffic_lights),
+                            'ocr_status': ocr_status(),
+                            'violations_found': violations_found,
+                            'current_violations': current_violations,
+                            'recent_plates': detected_plates[-3:],
+                            'recent_violations': live_violations[-5:],
+                            'live_violation_count': len(live_violations),
+                            'category_counts': dict(category_counts),
+                            'type_counts': dict(type_counts)
+                        }
+                        
+                    upload_worker = VideoWorker(sampled_frames(), analyze_frame).start()
+                    st.session_state.upload_worker = upload_worker
+                
+                from violation_categories import VIOLATION_CATEGORIES, get_violation_category, get_violation_emoji
+                
+                def render(snapshot):
+                    stats = snapshot['stats']
+                    if snapshot['jpeg']:
+                        video_placeholder.image(snapshot['jpeg'], use_container_width=True)
+                    if not stats:
+                        return
                     
                     # Update stats
                     with stats_placeholder.container():
+                        if stats['ocr_status'] == 'warming':
+                            st.caption("🔤 Plate OCR warming up; plates will be read once it is ready")
+                        
                         # Main stats row
                         col1, col2, col3, col4, col5 = st.columns(5)
                         with col1:
-                            st.metric("Frame", f"{frame_count}/{total_frames}")
+                            st.metric("Frame", f"{stats['frame']}/{stats['total_frames']}")
                         with col2:
-                            total_vehicles = sum(len(v) for v in vehicles.values())
+                            total_vehicles = sum(stats['vehicle_counts'].values())
                             st.metric("Total Vehicles", total_vehicles)
                         with col3:
-                            st.metric("Traffic Lights", len(traffic_lights))
+                            st.metric("Traffic Lights", stats['traffic_lights'])
                         with col4:
-                            st.metric("Total Violations", violations_found)
+                            st.metric("Total Violations", stats['violations_found'])
                         with col5:
-                            st.metric("Current Violations", current_violations)
+                            st.metric("Analysis FPS", f"{snapshot['fps']:.1f}")
                         
                         # License plates detected
-                        if detected_plates:
+                        if stats['recent_plates']:
                             st.write("**License Plates Detected:**")
-                            plate_cols = st.columns(min(len(detected_plates[-3:]), 3))
-                            for i, plate in enumerate(detected_plates[-3:]):
+                            plate_cols = st.columns(len(stats['recent_plates']))
+                            for i, plate in enumerate(stats['recent_plates']):
                                 with plate_cols[i]:
                                     st.write(f"🚗 {plate['plate_number']}")
                                     st.write(f"Frame: {plate['frame']}")
@@ -1220,28 +1356,21 @@ def main():
                             st.write("**Vehicle Breakdown:**")
                             vehicle_cols = st.columns(4)
                             with vehicle_cols[0]:
-                                st.write(f"🚗 Cars: {len(vehicles['cars'])}")
+                                st.write(f"🚗 Cars: {stats['vehicle_counts']['cars']}")
                             with vehicle_cols[1]:
-                                st.write(f"🏍️ Motorcycles: {len(vehicles['motorcycles'])}")
+                                st.write(f"🏍️ Motorcycles: {stats['vehicle_counts']['motorcycles']}")
                             with vehicle_cols[2]:
-                                st.write(f"🚌 Buses: {len(vehicles['buses'])}")
+                                st.write(f"🚌 Buses: {stats['vehicle_counts']['buses']}")
                             with vehicle_cols[3]:
-                                st.write(f"🚛 Trucks: {len(vehicles['trucks'])}")
+                                st.write(f"🚛 Trucks: {stats['vehicle_counts']['trucks']}")
                         
                         # Violation Categories (matching View Violations page)
-                        from violation_categories import VIOLATION_CATEGORIES, get_violation_category, get_violation_emoji
-                        
-                        violation_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-                        for violation in live_violations:
-                            category = get_violation_category(violation['type'])
-                            violation_counts[category] += 1
-                        
                         st.write("**📊 Violation Categories:**")
                         
                         # Show category counters in columns
                         cat_cols = st.columns(4)
                         for i, (category, data) in enumerate(VIOLATION_CATEGORIES.items()):
-                            count = violation_counts[category]
+                            count = stats['category_counts'][category]
                             with cat_cols[i]:
                                 if count > 0:
                                     st.write(f"{data['color']} **{category}**: {count}")
@@ -1250,26 +1379,18 @@ def main():
                     
                     # Update violations display with categories
                     with violations_placeholder.container():
-                        if live_violations:
-                            from violation_categories import VIOLATION_CATEGORIES, get_violation_category, get_violation_emoji
-                            
-                            # Category counters
-                            violation_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-                            for violation in live_violations:
-                                category = get_violation_category(violation['type'])
-                                violation_counts[category] += 1
-                            
+                        if stats['recent_violations']:
                             st.write("**📊 Live Violation Categories**")
                             for category, data in VIOLATION_CATEGORIES.items():
-                                count = violation_counts[category]
+                                count = stats['category_counts'][category]
                                 if count > 0:
                                     st.write(f"{data['color']} **{category}**: {count}")
                             
                             st.write("---")
-                            st.write(f"**🚨 Latest Violations ({len(live_violations)})**")
+                            st.write(f"**🚨 Latest Violations ({stats['live_violation_count']})**")
                             
                             # Show last 5 violations with categories
-                            for violation in live_violations[-5:]:
+                            for violation in stats['recent_violations']:
                                 emoji = get_violation_emoji(violation['type'])
                                 category = get_violation_category(violation['type'])
                                 color = VIOLATION_CATEGORIES[category]['color']
@@ -1283,29 +1404,23 @@ def main():
                             st.write("🟢 **No violations detected yet**")
                             st.info("Violations will appear here as they are detected in the video.")
                     
-                    progress = frame_count / total_frames
-                    progress_bar.progress(progress)
-                    
-                    frame_count += 1
-                    
-                    # Optimized playback speed
-                    time.sleep(max(0.01, 1.0 / speed))  # Minimum 0.01s delay
-                    
-                    # Check if stop was pressed
-                    if st.session_state.get('stop_detection', False):
-                        break
+                    progress_bar.progress(min(1.0, (stats['frame'] + 1) / stats['total_frames']))
+                
+                # The page only polls; inference speed is set by the model, not the browser
+                snapshot = poll_worker(upload_worker, render, refresh_hz=refresh_hz)
+                st.session_state.upload_worker = None
+                
+                if snapshot['error']:
+                    st.error(f"❌ Analysis failed: {snapshot['error']}")
                 
-                cap.release()
-                st.success(f"✅ Analysis complete! Found {violations_found} violations in {frame_count} frames.")
+                stats = snapshot['stats']
+                violations_found = stats.get('violations_found', 0)
+                st.success(f"✅ Analysis complete! Found {violations_found} violations in {snapshot['processed']} frames.")
                 
                 # Show final violations summary
-                if live_violations:
+                if stats.get('type_counts'):
                     st.subheader("📋 Final Violations Summary")
-                    violation_types = {}
-                    for v in live_violations:
-                        violation_types[v['type']] = violation_types.get(v['type'], 0) + 1
-                    
-                    for vtype, count in violation_types.items():
+                    for vtype, count in stats['type_counts'].items():
                         st.write(f"• {vtype}: {count} violations")
                 st.session_state.start_detection = False
                 st.session_state.stop_detection = False
@@ -1340,6 +1455,9 @@ def main():
             """, unsafe_allow_html=True)
     
     elif page == "🗄️ Archive History":
+        import pandas as pd
+        from PIL import Image
+        
         st.markdown("## 🗄️ Archive Management")
         
         # Find all archive files
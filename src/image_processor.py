@@ -4,6 +4,29 @@ from ultralytics import YOLO
 from datetime import datetime
 import os
 import numpy as np
+import time
+from violation_db import ensure_violations_table, insert_violation
+from telemetry import FRAMES, stage_timer
+
+INFERENCE_TIMER = stage_timer('inference')
+RULES_TIMER = stage_timer('rules')
+EVIDENCE_TIMER = stage_timer('evidence_write')
+
+def letterbox(image, size=640):
+    """Fit image into a size x size gray canvas, keeping aspect ratio
+
+    Returns (canvas, scale, (pad_x, pad_y)) so boxes can be mapped back with
+    (x - pad_x) / scale.
+    """
+    height, width = image.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = cv2.resize(
+        image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    return canvas, scale, (pad_x, pad_y)
 
 class ImageViolationProcessor:
     def __init__(self):
@@ -12,18 +35,7 @@ class ImageViolationProcessor:
         
     def setup_database(self):
         self.conn = sqlite3.connect('current_session.db')
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS violations (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                violation_type TEXT,
-                image_path TEXT,
-                vehicle_id TEXT,
-                location TEXT,
-                gps_coords TEXT,
-                camera_id TEXT
-            )
-        ''')
+        ensure_violations_table(self.conn)
         
     def process_image(self, image_path, output_path=None):
         """Process single image and detect violations"""
@@ -45,7 +57,38 @@ class ImageViolationProcessor:
     
     def detect_violations_in_image(self, image):
         """Detect all violations in a single image"""
-        results = self.model(image, conf=0.25)
+        return self.detect_violations_from_detections(image, self.run_detector([image])[0])
+    
+    def run_detector(self, images, imgsz=None):
+        """Run YOLO on a list of images and return one (N, 6) array per image
+        
+        Rows are [x1, y1, x2, y2, confidence, class_id] in original image
+        coordinates. With imgsz, images are letterboxed to the same square
+        size first so the whole list goes through the model as one batch.
+        """
+        if imgsz:
+            boxed = [letterbox(image, imgsz) for image in images]
+            with INFERENCE_TIMER.time():
+                results = self.model([canvas for canvas, _, _ in boxed], conf=0.25, imgsz=imgsz, verbose=False)
+        else:
+            boxed = [(None, 1.0, (0, 0))] * len(images)
+            with INFERENCE_TIMER.time():
+                results = self.model(images, conf=0.25)
+        
+        all_detections = []
+        for (_, scale, (pad_x, pad_y)), r in zip(boxed, results):
+            detections = np.zeros((len(r.boxes), 6), dtype=np.float32)
+            if len(r.boxes):
+                boxes = r.boxes.xyxy.cpu().numpy()
+                detections[:, :4] = (boxes - np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)) / scale
+                detections[:, 4] = r.boxes.conf.cpu().numpy()
+                detections[:, 5] = r.boxes.cls.cpu().numpy()
+            all_detections.append(detections)
+        return all_detections
+    
+    def detect_violations_from_detections(self, image, detections):
+        """Apply the violation rules to detections produced by run_detector"""
+        start = time.perf_counter()
         violations = []
         
         vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
@@ -55,20 +98,19 @@ class ImageViolationProcessor:
         # COCO class mapping
         vehicle_classes = {2: 'cars', 3: 'motorcycles', 5: 'buses', 7: 'trucks'}
         
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls)
-                bbox = box.xyxy[0].tolist()
-                conf = float(box.conf)
-                
-                if cls in vehicle_classes and self.is_valid_vehicle(bbox, conf, cls):
-                    vehicles[vehicle_classes[cls]].append({
-                        'bbox': bbox, 'confidence': conf, 'type': vehicle_classes[cls][:-1]
-                    })
-                elif cls == 9:  # traffic light
-                    traffic_lights.append({'bbox': bbox, 'confidence': conf})
-                elif cls == 0:  # person
-                    persons.append({'bbox': bbox, 'confidence': conf})
+        for x1, y1, x2, y2, conf, cls in detections:
+            cls = int(cls)
+            bbox = [float(x1), float(y1), float(x2), float(y2)]
+            conf = float(conf)
+            
+            if cls in vehicle_classes and self.is_valid_vehicle(bbox, conf, cls):
+                vehicles[vehicle_classes[cls]].append({
+                    'bbox': bbox, 'confidence': conf, 'type': vehicle_classes[cls][:-1]
+                })
+            elif cls == 9:  # traffic light
+                traffic_lights.append({'bbox': bbox, 'confidence': conf})
+            elif cls == 0:  # person
+                persons.append({'bbox': bbox, 'confidence': conf})
         
         # Check violations
         violations.extend(self.check_red_light_violations(image, vehicles, traffic_lights))
@@ -77,6 +119,8 @@ class ImageViolationProcessor:
         violations.extend(self.check_crosswalk_violations(image, vehicles, persons))
         violations.extend(self.check_parking_violations(image, vehicles))
         
+        RULES_TIMER.observe(time.perf_counter() - start)
+        FRAMES.inc()
         return violations
     
     def check_red_light_violations(self, image, vehicles, traffic_lights):
@@ -285,16 +329,18 @@ class ImageViolationProcessor:
         image_path = f"outputs/violations/{image_name}"
         
         os.makedirs('outputs/violations', exist_ok=True)
-        cv2.imwrite(image_path, annotated_image)
+        with EVIDENCE_TIMER.time():
+            cv2.imwrite(image_path, annotated_image)
         
-        self.conn.execute(
-            "INSERT INTO violations (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (timestamp, 
-             f"{violation['type']} ({violation['vehicle_type']})", 
-             image_path, 
-             f"{violation['vehicle_type']}_static", 
-             f"Image: {os.path.basename(original_path)}", 
-             "0.0, 0.0",
-             "IMG_UPLOAD")
-        )
-        self.conn.commit()
\ No newline at end of file
+        insert_violation(self.conn, *violation_row(violation, image_path, original_path, timestamp))
+        self.conn.commit()
+
+def violation_row(violation, image_path, original_path, timestamp):
+    """Column values for insert_violation for a violation found in a still image"""
+    return (timestamp,
+            f"{violation['type']} ({violation['vehicle_type']})",
+            image_path,
+            f"{violation['vehicle_type']}_static",
+            f"Image: {os.path.basename(original_path)}",
+            "0.0, 0.0",
+            "IMG_UPLOAD")
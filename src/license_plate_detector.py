@@ -1,36 +1,53 @@
 import cv2
-import pytesseract
 import re
 import numpy as np
+from ocr_engines import get_tesseract_reader
 
 class LicensePlateDetector:
     def __init__(self):
         # Set tesseract path (adjust for your system)
         # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        pass
+        # One Tesseract backend per process with the --psm 8 whitelist config loaded once
+        self.ocr = get_tesseract_reader()
     
     def detect_license_plate(self, vehicle_region):
         """Extract license plate from vehicle region"""
+        return self.detect_license_plates([vehicle_region])[0]
+    
+    def detect_license_plates(self, regions):
+        """Read many candidate regions with one OCR batch; returns a plate or None per region"""
         try:
-            # Preprocess image for better OCR
-            processed = self.preprocess_for_ocr(vehicle_region)
+            # Preprocess images for better OCR
+            processed = [self.preprocess_for_ocr(region) for region in regions]
             
             # Extract text using OCR
-            text = pytesseract.image_to_string(
-                processed, 
-                config='--psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-            )
-            
-            # Clean and validate plate number
-            plate_number = self.clean_plate_text(text)
-            
-            if self.is_valid_plate(plate_number):
-                return plate_number
-            
+            texts = self.ocr.read_batch(processed)
         except Exception as e:
             print(f"OCR Error: {e}")
+            return [None] * len(regions)
+        
+        plates = []
+        for text in texts:
+            # Clean and validate plate number
+            plate_number = self.clean_plate_text(text)
+            plates.append(plate_number if self.is_valid_plate(plate_number) else None)
+        return plates
+    
+    def read_vehicle_plates(self, vehicle_images):
+        """Best plate for each vehicle image, reading every candidate region in one batch"""
+        candidates = []
+        for index, vehicle_image in enumerate(vehicle_images):
+            if vehicle_image is None or vehicle_image.size == 0:
+                continue
+            for plate_region, _ in self.find_plate_region(vehicle_image):
+                candidates.append((index, plate_region))
         
-        return None
+        plates = [None] * len(vehicle_images)
+        results = self.detect_license_plates([region for _, region in candidates])
+        for (index, _), plate_number in zip(candidates, results):
+            if plate_number and plates[index] is None:
+                plates[index] = plate_number
+        return plates
     
     def preprocess_for_ocr(self, image):
         """Enhance image for better OCR results"""
@@ -115,7 +132,7 @@ if __name__ == "__main__":
     if image is not None:
         plate_regions = detector.find_plate_region(image)
         
-        for plate_img, bbox in plate_regions:
-            plate_number = detector.detect_license_plate(plate_img)
+        plate_numbers = detector.detect_license_plates([plate_img for plate_img, _ in plate_regions])
+        for plate_number in plate_numbers:
             if plate_number:
                 print(f"Detected plate: {plate_number}")
\ No newline at end of file
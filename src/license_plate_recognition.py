@@ -1,13 +1,38 @@
 import cv2
 import numpy as np
-import easyocr
 import re
 from ultralytics import YOLO
+from ocr_engines import get_easyocr_reader, ocr_status
+from telemetry import stage_timer
+
+PLATE_HEIGHT = 64  # crops are resized to this height before batched recognition
+PLATE_MAX_WIDTH = 512
+PLATE_GAP = 16  # blank rows between stacked crops
+
+OCR_TIMER = stage_timer('ocr')
 
 class LicensePlateRecognizer:
-    def __init__(self):
-        self.reader = easyocr.Reader(['en'])
-        self.yolo_model = YOLO('yolov8n.pt')
+    def __init__(self, wait_for_ocr=True):
+        # The EasyOCR reader is shared per process and loaded on first use;
+        # with wait_for_ocr=False, recognition returns nothing until it is ready
+        self.wait_for_ocr = wait_for_ocr
+        self._yolo_model = None
+        self.ocr_calls = 0
+    
+    @property
+    def yolo_model(self):
+        # Loaded on first plate search; OCR-only users never pay for it
+        if self._yolo_model is None:
+            self._yolo_model = YOLO('yolov8n.pt')
+        return self._yolo_model
+    
+    @property
+    def reader(self):
+        return get_easyocr_reader(wait=self.wait_for_ocr)
+    
+    @property
+    def ocr_ready(self):
+        return ocr_status() == 'ready'
         
     def detect_license_plates(self, image):
         """Detect license plate regions using YOLO"""
@@ -54,21 +79,73 @@ class LicensePlateRecognizer:
     
     def extract_text(self, processed_plate):
         """Extract text from preprocessed plate"""
+        return self.extract_text_with_confidence(processed_plate)[0]
+    
+    def extract_text_with_confidence(self, processed_plate):
+        """Extract text from preprocessed plate along with its mean OCR confidence"""
         if processed_plate is None:
-            return ""
+            return "", 0.0
             
         try:
+            self.ocr_calls += 1
             results = self.reader.readtext(processed_plate)
             
             # Combine all detected text
             text = ""
+            confidences = []
             for (bbox, detected_text, confidence) in results:
                 if confidence > 0.5:  # Only high confidence detections
                     text += detected_text + " "
+                    confidences.append(confidence)
             
-            return text.strip()
+            return text.strip(), sum(confidences) / len(confidences) if confidences else 0.0
         except:
-            return ""
+            return "", 0.0
+    
+    def extract_texts_batch(self, processed_plates):
+        """Recognize many preprocessed plates with one OCR call
+        
+        The plate boxes are already known, so the crops are stacked into one
+        image and passed straight to the recognizer as horizontal boxes,
+        skipping EasyOCR's text detector. Returns (text, confidence) per plate.
+        """
+        texts = [("", 0.0)] * len(processed_plates)
+        crops = []
+        for index, plate in enumerate(processed_plates):
+            if plate is None or plate.size == 0:
+                continue
+            height, width = plate.shape[:2]
+            new_width = max(1, min(PLATE_MAX_WIDTH, int(width * PLATE_HEIGHT / height)))
+            crops.append((index, cv2.resize(plate, (new_width, PLATE_HEIGHT), interpolation=cv2.INTER_AREA)))
+        if not crops:
+            return texts
+        
+        row = PLATE_HEIGHT + PLATE_GAP
+        canvas = np.zeros((row * len(crops), max(crop.shape[1] for _, crop in crops)), dtype=np.uint8)
+        boxes = []
+        for slot, (_, crop) in enumerate(crops):
+            canvas[slot * row:slot * row + PLATE_HEIGHT, :crop.shape[1]] = crop
+            boxes.append([0, crop.shape[1], slot * row, slot * row + PLATE_HEIGHT])
+        
+        try:
+            self.ocr_calls += 1
+            with OCR_TIMER.time():
+                results = self.reader.recognize(canvas, horizontal_list=boxes, free_list=[],
+                                                batch_size=len(boxes), detail=1)
+        except Exception:
+            return [self.extract_text_with_confidence(plate) for plate in processed_plates]
+        
+        # EasyOCR returns results sorted by position; map them back by row
+        pieces = {}
+        for bbox, detected_text, confidence in results:
+            slot = int(bbox[0][1]) // row
+            if 0 <= slot < len(crops) and confidence > 0.5:  # Only high confidence detections
+                pieces.setdefault(slot, []).append((detected_text, confidence))
+        
+        for slot, found in pieces.items():
+            texts[crops[slot][0]] = (" ".join(text for text, _ in found),
+                                     sum(conf for _, conf in found) / len(found))
+        return texts
     
     def clean_plate_text(self, text):
         """Clean and format license plate text"""
@@ -88,16 +165,18 @@ class LicensePlateRecognizer:
         """Main function to recognize license plates"""
         plates_data = []
         
+        # Don't hold up live loops while the OCR networks are still loading
+        if not self.wait_for_ocr and self.reader is None:
+            return plates_data
+        
         # Detect potential plate regions
         detected_plates = self.detect_license_plates(image)
         
-        for plate_info in detected_plates:
-            # Preprocess plate region
-            processed = self.preprocess_plate(plate_info['roi'])
-            
-            # Extract text
-            raw_text = self.extract_text(processed)
-            
+        # Preprocess every plate region, then read them all in one batch
+        processed = [self.preprocess_plate(plate_info['roi']) for plate_info in detected_plates]
+        texts = self.extract_texts_batch(processed)
+        
+        for plate_info, (raw_text, _) in zip(detected_plates, texts):
             # Clean text
             plate_number = self.clean_plate_text(raw_text)
             
@@ -1,96 +1,205 @@
 import cv2
+import math
+import numpy as np
 import sqlite3
+import time
 from ultralytics import YOLO
 from datetime import datetime
 import os
+from violation_db import DB_PATH, ensure_violations_table, insert_violation
+from clip_buffer import ClipRingBuffer
+from frame_source import FrameSource
+from detection_cache import DetectionCache, detector_settings
+from detection_log import LIGHT_COLORS, DetectionLog
+from drift_monitor import DriftMonitor, SKETCH_DB
+from telemetry import FRAMES, stage_timer
 try:
     from license_plate_detector import LicensePlateDetector
 except ImportError:
     LicensePlateDetector = None
 
+# Frames are resized to this before detection, same as Live Detection
+DETECTOR_INPUT = (640, 480)
+DETECTOR_CONF = 0.35
+
+# Riders whose head region is less dark than this are flagged for no helmet
+HELMET_DARK_FRACTION = 0.3
+
+INFERENCE_TIMER = stage_timer('inference')
+RULES_TIMER = stage_timer('rules')
+EVIDENCE_TIMER = stage_timer('evidence_write')
+
+def detect_frames(model, frames):
+    """Run YOLO on a batch of frames and return one (N, 6) float32 array per frame
+    
+    Rows are [x1, y1, x2, y2, confidence, class_id] in original frame coordinates.
+    """
+    processing_frames = [cv2.resize(frame, DETECTOR_INPUT) for frame in frames]
+    with INFERENCE_TIMER.time():
+        results = model(processing_frames, conf=DETECTOR_CONF, device='cpu')
+    return results_to_detections(frames, results)
+
+def results_to_detections(frames, results):
+    """(N, 6) float32 rows per frame from YOLO results on the DETECTOR_INPUT-sized copies"""
+    all_detections = []
+    for frame, r in zip(frames, results):
+        detections = np.zeros((len(r.boxes), 6), dtype=np.float32)
+        if len(r.boxes):
+            # Scale coordinates back to original frame size
+            scale = np.array([frame.shape[1] / DETECTOR_INPUT[0], frame.shape[0] / DETECTOR_INPUT[1]] * 2, dtype=np.float32)
+            boxes = r.boxes.xyxy.cpu().numpy().astype(np.int32)
+            detections[:, :4] = np.trunc(boxes * scale)
+            detections[:, 4] = r.boxes.conf.cpu().numpy()
+            detections[:, 5] = r.boxes.cls.cpu().numpy()
+        all_detections.append(detections)
+    return all_detections
+
+def detect_frames_settings(weights):
+    """What detect_frames output depends on, for keying cached detections
+
+    weights is the weights path, or a loaded model (keyed by its ckpt_path);
+    passing the path keys the cache without loading the model.
+    """
+    if not isinstance(weights, str):
+        weights = getattr(weights, 'ckpt_path', None) or 'yolov8n.pt'
+    return detector_settings(weights, input_size=list(DETECTOR_INPUT), conf=DETECTOR_CONF)
+
 class LocalTrafficProcessor:
-    def __init__(self):
-        self.model = YOLO('yolov8n.pt')  # Downloads automatically
+    def __init__(self, record_clips=True, clip_fps=10, model=None, db_path=DB_PATH, detection_log=None,
+                 camera_id=None, drift_db=SKETCH_DB, model_path='yolov8n.pt'):
+        # A model can be passed in so several processors share one copy; otherwise
+        # it is loaded on first detection, so rule-only callers (and fully
+        # cached videos) never load it
+        self._model = model
+        self.model_path = getattr(model, 'ckpt_path', None) or model_path
+        self.db_path = db_path
         self.setup_database()
         self.violated_vehicles = set()  # Track vehicles that already have violations
         self.vehicle_positions = {}  # Track vehicle positions for speed/movement analysis
         self.frame_rate = 30  # Assume 30 FPS for speed calculation
-        self.plate_detector = LicensePlateDetector() if LicensePlateDetector else None
-        
+        self.plate_detector = None
+        if LicensePlateDetector:
+            try:
+                self.plate_detector = LicensePlateDetector()
+            except Exception as e:
+                print(f"Plate reading disabled: {e}")
+        if self.plate_detector and not self.plate_detector.ocr.available:
+            self.plate_detector = None
+        self.record_clips = record_clips
+        self.clip_fps = clip_fps
+        self.clip_buffer = None
+        # A DetectionLog receiving every analysed frame's detections, for replaying rule changes
+        self.detection_log = detection_log
+        # With a camera_id, every rule pass adds its detections to that camera's
+        # drift sketch. Offline media (no camera_id) is kept out of the sketches,
+        # which bucket by wall-clock hour and would skew the live baselines.
+        self.camera_id = camera_id
+        self.drift = DriftMonitor(drift_db) if drift_db and camera_id else None
+        
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = YOLO(self.model_path)  # Downloads automatically
+        return self._model
+    
     def setup_database(self):
-        self.conn = sqlite3.connect('current_session.db')
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS violations (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                violation_type TEXT,
-                image_path TEXT,
-                vehicle_id TEXT,
-                location TEXT,
-                gps_coords TEXT,
-                camera_id TEXT
-            )
-        ''')
-        
-    def process_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
-        frame_count = 0
-        
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            if frame_count % 30 == 0:  # Process every 30th frame
-                violations = self.detect_violations(frame, frame_count)
-                for violation in violations:
-                    self.save_violation(violation, frame)
+        self.conn = sqlite3.connect(self.db_path)
+        ensure_violations_table(self.conn)
+        
+    def process_video(self, video_path, sample_every=30, use_cache=True, log_dir=None):
+        # Detections of a video seen before are replayed from the cache;
+        # the model only runs on frames not analysed with these settings
+        cache = None
+        if use_cache:
+            try:
+                cache = DetectionCache.for_media(video_path, detect_frames_settings(self.model_path))
+            except BlockingIOError:
+                print("Detection cache in use by another run; detecting without it")
+        # A log opened for log_dir stands in for the caller's log during this video only
+        caller_log = self.detection_log
+        if log_dir:
+            self.detection_log = DetectionLog(log_dir)
+        
+        # Buffer a thinned-out copy of the stream so violations get a short clip
+        source = FrameSource(video_path)
+        video_fps = source.fps
+        clip_step = max(1, int(round(video_fps / self.clip_fps)))
+        if self.record_clips:
+            self.clip_buffer = ClipRingBuffer(fps=video_fps / clip_step)
+            # Only decode the frames that feed the clip buffer or the detector
+            source.stride = math.gcd(sample_every, clip_step)
+        else:
+            source.stride = sample_every
+        
+        try:
+            for frame_count, video_time, frame in source:
+                if self.clip_buffer and frame_count % clip_step == 0:
+                    self.clip_buffer.add_frame(frame, video_time)
                     
-            frame_count += 1
-        cap.release()
+                if frame_count % sample_every == 0:  # Process every 30th frame
+                    if cache is not None:
+                        detections = cache.detect(frame_count, frame, self.run_detector)
+                        violations = self.detect_violations_from_detections(frame, detections, frame_count)
+                    else:
+                        violations = self.detect_violations(frame, frame_count)
+                    if violations and self.plate_detector:
+                        self.read_plates(frame, violations)
+                    for violation in violations:
+                        self.save_violation(violation, frame, video_time)
+        finally:
+            if self.drift is not None:
+                self.drift.flush()
+            if cache is not None:
+                cache.close()
+            if log_dir:
+                self.detection_log.close()
+                self.detection_log = caller_log
+            if self.clip_buffer:
+                self.clip_buffer.flush()
+                self.clip_buffer = None
+        
+    def read_plates(self, frame, violations):
+        """Read the plates of all violating vehicles in a frame with one OCR batch"""
+        crops = []
+        for violation in violations:
+            if 'vehicle_position' not in violation:
+                crops.append(None)
+                continue
+            x1, y1, x2, y2 = [max(0, int(coord)) for coord in violation['vehicle_position']]
+            crops.append(frame[y1:y2, x1:x2])
         
+        for violation, plate_number in zip(violations, self.plate_detector.read_vehicle_plates(crops)):
+            if plate_number:
+                violation['plate_number'] = plate_number
+    
     def detect_violations(self, frame, frame_num):
-        # Use same processing as Live Detection
-        processing_frame = cv2.resize(frame, (640, 480))
-        results = self.model(processing_frame, conf=0.35, device='cpu')
-        violations = []
-        
-        vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
-        traffic_lights = []
-        persons = []
-        
-        # COCO class mapping
-        vehicle_classes = {
-            2: 'cars',      # car
-            3: 'motorcycles', # motorcycle  
-            5: 'buses',     # bus
-            7: 'trucks'     # truck
-        }
+        detections = self.run_detector([frame])[0]
+        return self.detect_violations_from_detections(frame, detections, frame_num)
+    
+    def run_detector(self, frames):
+        """Run YOLO on a batch of frames and return one (N, 6) array per frame
         
-        # Scale coordinates back to original frame size
-        scale_x = frame.shape[1] / 640
-        scale_y = frame.shape[0] / 480
-        
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls)
-                # Scale coordinates back to original size
-                x1, y1, x2, y2 = box.xyxy[0].int().tolist()
-                x1, x2 = int(x1 * scale_x), int(x2 * scale_x)
-                y1, y2 = int(y1 * scale_y), int(y2 * scale_y)
-                bbox = [x1, y1, x2, y2]
-                conf = float(box.conf)
-                
-                if cls in vehicle_classes and self.is_valid_vehicle_detection(bbox, conf, cls):
-                    vehicles[vehicle_classes[cls]].append({
-                        'bbox': bbox,
-                        'confidence': conf,
-                        'type': vehicle_classes[cls][:-1]  # Remove 's'
-                    })
-                elif cls == 9:  # traffic light
-                    traffic_lights.append({'bbox': bbox, 'confidence': conf})
-                elif cls == 0:  # person
-                    persons.append({'bbox': bbox, 'confidence': conf})
+        Rows are [x1, y1, x2, y2, confidence, class_id] in original frame coordinates.
+        """
+        return detect_frames(self.model, frames)
+    
+    def detect_violations_from_detections(self, frame, detections, frame_num, cues=None, live=True):
+        """Apply the violation rules to detections produced by run_detector
+        
+        cues holds per-row pixel readings (see frame_cues) when replaying a
+        DetectionLog; live frames are read directly, or through frame_cues
+        when the frame is being logged. live=False (replays) leaves the
+        detection log, drift sketch and frame/rules metrics alone.
+        """
+        start = time.perf_counter()
+        violations = []
+        if live and self.detection_log is not None:
+            if cues is None:
+                cues = self.frame_cues(frame, detections)
+            self.detection_log.append(frame_num, frame.shape, detections, cues)
+        if live and self.drift is not None:
+            self.drift.update(self.camera_id, detections, frame.shape)
+        vehicles, traffic_lights, persons = self.group_detections(detections, cues)
         
         # Check helmet violations for motorcycles
         for motorcycle in vehicles['motorcycles']:
@@ -155,8 +264,64 @@ class LocalTrafficProcessor:
         violations.extend(self.check_tailgating_violations(vehicles, frame_num))
         violations.extend(self.check_crosswalk_violations(frame, vehicles, persons, frame_num))
         
+        if live:
+            RULES_TIMER.observe(time.perf_counter() - start)
+            FRAMES.inc()
         return violations
     
+    def group_detections(self, detections, cues=None):
+        """Split detection rows into valid vehicles by type, traffic lights and persons
+        
+        With cues, lights carry their 'color' and persons their 'head_dark' fraction.
+        """
+        vehicles = {'cars': [], 'motorcycles': [], 'buses': [], 'trucks': []}
+        traffic_lights = []
+        persons = []
+        
+        # COCO class mapping
+        vehicle_classes = {
+            2: 'cars',      # car
+            3: 'motorcycles', # motorcycle  
+            5: 'buses',     # bus
+            7: 'trucks'     # truck
+        }
+        
+        for row, (x1, y1, x2, y2, conf, cls) in enumerate(detections):
+            cls = int(cls)
+            bbox = [int(x1), int(y1), int(x2), int(y2)]
+            conf = float(conf)
+            
+            if cls in vehicle_classes and self.is_valid_vehicle_detection(bbox, conf, cls):
+                vehicles[vehicle_classes[cls]].append({
+                    'bbox': bbox,
+                    'confidence': conf,
+                    'type': vehicle_classes[cls][:-1]  # Remove 's'
+                })
+            elif cls == 9:  # traffic light
+                traffic_lights.append({'bbox': bbox, 'confidence': conf})
+                if cues is not None:
+                    traffic_lights[-1]['color'] = LIGHT_COLORS[0 if np.isnan(cues[row]) else int(cues[row])]
+            elif cls == 0:  # person
+                persons.append({'bbox': bbox, 'confidence': conf})
+                if cues is not None:
+                    persons[-1]['head_dark'] = None if np.isnan(cues[row]) else float(cues[row])
+        
+        return vehicles, traffic_lights, persons
+    
+    def frame_cues(self, frame, detections):
+        """What the rules read from pixels, one value per row: head darkness for persons,
+        LIGHT_COLORS index for traffic lights, NaN otherwise"""
+        cues = np.full(len(detections), np.nan, dtype=np.float32)
+        for row, (x1, y1, x2, y2, _, cls) in enumerate(detections):
+            bbox = [int(x1), int(y1), int(x2), int(y2)]
+            if int(cls) == 0:
+                dark = self.head_dark_fraction(frame, bbox)
+                if dark is not None:
+                    cues[row] = dark
+            elif int(cls) == 9:
+                cues[row] = LIGHT_COLORS.index(self.detect_traffic_light_color(frame[bbox[1]:bbox[3], bbox[0]:bbox[2]]))
+        return cues
+    
     def detect_traffic_light_color(self, light_region):
         """Improved traffic light color detection"""
         if light_region.size == 0:
@@ -193,6 +358,10 @@ class LocalTrafficProcessor:
     def detect_red_light(self, frame, traffic_lights):
         """Check if any traffic light is red"""
         for light in traffic_lights:
+            if 'color' in light:
+                if light['color'] == 'red':
+                    return True
+                continue
             x1, y1, x2, y2 = [int(coord) for coord in light['bbox']]
             light_region = frame[y1:y2, x1:x2]
             
@@ -273,9 +442,6 @@ class LocalTrafficProcessor:
     def check_lane_violations(self, frame, vehicles, frame_num):
         """Detect lane violations using edge detection"""
         violations = []
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        
         frame_width = frame.shape[1]
         center_line = frame_width // 2
         
@@ -461,49 +627,60 @@ class LocalTrafficProcessor:
             
             # Check if person overlaps with motorcycle area
             if (px1 < mx2 and px2 > mx1 and py1 < my2 and py2 > my1):
-                # Extract head region (top 20% of person)
-                head_height = int((py2 - py1) * 0.2)
-                head_region = frame[int(py1):int(py1 + head_height), int(px1):int(px2)]
+                if 'head_dark' in person:
+                    dark = person['head_dark']
+                else:
+                    dark = self.head_dark_fraction(frame, person['bbox'])
                 
-                if head_region.size > 0:
-                    # Simple helmet detection using color analysis
-                    # Helmets are usually dark colored (black, blue, etc.)
-                    gray = cv2.cvtColor(head_region, cv2.COLOR_BGR2GRAY)
-                    mask = (gray < 80).astype('uint8')
-                    dark_pixels = cv2.countNonZero(mask)
-                    total_pixels = gray.shape[0] * gray.shape[1]
-                    
-                    # If less than 30% dark pixels, likely no helmet
-                    if dark_pixels < total_pixels * 0.3:
-                        return True
+                # If less than 30% dark pixels, likely no helmet
+                if dark is not None and dark < HELMET_DARK_FRACTION:
+                    return True
         return False
     
-    def save_violation(self, violation, frame):
+    def head_dark_fraction(self, frame, bbox):
+        """Share of dark pixels in the top 20% of a person box, or None if it is empty"""
+        px1, py1, px2, py2 = bbox
+        head_height = int((py2 - py1) * 0.2)
+        head_region = frame[int(py1):int(py1 + head_height), int(px1):int(px2)]
+        if head_region.size == 0:
+            return None
+        
+        # Simple helmet detection using color analysis
+        # Helmets are usually dark colored (black, blue, etc.)
+        gray = cv2.cvtColor(head_region, cv2.COLOR_BGR2GRAY)
+        dark_pixels = cv2.countNonZero((gray < 80).astype('uint8'))
+        return dark_pixels / (gray.shape[0] * gray.shape[1])
+    
+    def save_violation(self, violation, frame, video_time=None):
         timestamp = datetime.now().isoformat().replace(':', '-')
+        
+        image_path = self.write_violation_image(violation, frame, timestamp)
+        if image_path is None:
+            return
+        
+        # Clip only once the row is certain to be stored, so no clip is left without one
+        if self.clip_buffer is not None and video_time is not None:
+            violation['clip_path'] = self.clip_buffer.trigger(
+                violation['type'], violation.get('vehicle_type', 'vehicle'), video_time)
+        
+        record_violation(self.conn, violation, image_path, timestamp)
+        self.conn.commit()
+        print(f"Violation saved: {violation['type']} ({violation.get('vehicle_type', 'unknown')}) at {timestamp}")
+    
+    def write_violation_image(self, violation, frame, timestamp):
+        """Write the annotated evidence image and return its path (None on failure)"""
         image_path = f"outputs/violations/{timestamp}.jpg"
         
         os.makedirs('outputs/violations', exist_ok=True)
         
         # Create annotated frame with violation highlighted
-        annotated_frame = self.create_violation_screenshot(frame, violation)
-        
-        success = cv2.imwrite(image_path, annotated_frame)
+        with EVIDENCE_TIMER.time():
+            annotated_frame = self.create_violation_screenshot(frame, violation)
+            success = cv2.imwrite(image_path, annotated_frame)
         if not success:
             print(f"Failed to save image: {image_path}")
-            return
-        
-        self.conn.execute(
-            "INSERT INTO violations (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (timestamp, 
-             f"{violation['type']} ({violation.get('vehicle_type', 'unknown')})", 
-             image_path, 
-             f"{violation.get('vehicle_type', 'vehicle')}_{violation['frame']}", 
-             violation.get('location', 'Unknown Location'), 
-             violation.get('gps_coords', '0.0, 0.0'),
-             violation.get('camera_id', 'CAM_UNKNOWN'))
-        )
-        self.conn.commit()
-        print(f"Violation saved: {violation['type']} ({violation.get('vehicle_type', 'unknown')}) at {timestamp}")
+            return None
+        return image_path
     
     def create_violation_screenshot(self, frame, violation):
         """Create annotated screenshot highlighting the violation"""
@@ -525,6 +702,21 @@ class LocalTrafficProcessor:
         
         return annotated
 
+def record_violation(conn, violation, image_path, timestamp):
+    """Insert a processor violation dict into the violations table (caller commits)"""
+    return insert_violation(
+        conn,
+        timestamp,
+        f"{violation['type']} ({violation.get('vehicle_type', 'unknown')})",
+        image_path,
+        f"{violation.get('vehicle_type', 'vehicle')}_{violation['frame']}",
+        violation.get('location', 'Unknown Location'),
+        violation.get('gps_coords', '0.0, 0.0'),
+        violation.get('camera_id', 'CAM_UNKNOWN'),
+        violation.get('clip_path'),
+        violation.get('plate_number')
+    )
+
 # Usage
 if __name__ == "__main__":
     processor = LocalTrafficProcessor()
@@ -0,0 +1,189 @@
+"""
+Process-wide OCR engines, built on first use or warmed in the background
+"""
+
+import threading
+from telemetry import stage_timer
+
+_lock = threading.Lock()
+_readers = {}
+_ready = {}
+_errors = {}
+
+def get_easyocr_reader(languages=('en',), wait=True):
+    """Return the shared easyocr.Reader for these languages, building it on first use
+
+    With wait=False this never blocks: it starts a background warm-up if
+    needed and returns None until the reader is ready.
+    """
+    key = tuple(languages)
+    if not wait:
+        warm_easyocr_reader(key)
+        with _lock:
+            return _readers.get(key)
+
+    with _lock:
+        if key in _readers:
+            return _readers[key]
+        event = _ready.get(key)
+        building = event is None
+        if building:
+            event = _ready[key] = threading.Event()
+
+    if building:
+        try:
+            import easyocr
+            reader = easyocr.Reader(list(key))
+        except Exception as e:
+            with _lock:
+                _errors[key] = e
+                del _ready[key]  # let a later call retry
+            event.set()
+            raise
+        with _lock:
+            _readers[key] = reader
+            _errors.pop(key, None)
+        event.set()
+        return reader
+
+    event.wait()
+    with _lock:
+        if key in _readers:
+            return _readers[key]
+        raise RuntimeError(f"EasyOCR failed to load: {_errors.get(key)}")
+
+def warm_easyocr_reader(languages=('en',)):
+    """Start loading the shared reader on a daemon thread
+
+    No-op if it is already loading or loaded, or if a previous load failed
+    (a blocking get_easyocr_reader call retries).
+    """
+    key = tuple(languages)
+    with _lock:
+        if key in _readers or key in _ready or key in _errors:
+            return
+
+    def warm():
+        try:
+            get_easyocr_reader(key)
+        except Exception as e:
+            print(f"Plate OCR warm-up failed: {e}")
+
+    threading.Thread(target=warm, daemon=True).start()
+
+def ocr_status(languages=('en',)):
+    """'ready', 'warming', 'failed' or 'cold' for the shared reader"""
+    key = tuple(languages)
+    with _lock:
+        if key in _readers:
+            return 'ready'
+        if key in _ready:
+            return 'warming'
+        if key in _errors:
+            return 'failed'
+        return 'cold'
+
+PLATE_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+OCR_TIMER = stage_timer('ocr')
+
+class TesseractReader:
+    """Long-lived Tesseract backend with the plate config loaded once
+
+    Uses tesserocr's in-process PyTessBaseAPI when it is installed. Otherwise
+    a batch is written to a temp directory and read by a single tesseract
+    process over a list file, so the spawn cost is paid once per batch rather
+    than once per region.
+    """
+
+    def __init__(self, psm=8, whitelist=PLATE_WHITELIST, lang='eng'):
+        self.psm = psm
+        self.whitelist = whitelist
+        self.lang = lang
+        self.lock = threading.Lock()
+        self.api = None
+
+        # The CLI is also the fallback once the in-process API is closed
+        try:
+            import pytesseract
+            self.command = pytesseract.pytesseract.tesseract_cmd
+        except ImportError:
+            self.command = 'tesseract'
+
+        try:
+            from tesserocr import PyTessBaseAPI
+            api = PyTessBaseAPI(lang=lang, psm=psm)
+            api.SetVariable('tessedit_char_whitelist', whitelist)
+            self.api = api
+        except ImportError:
+            pass
+        except Exception as e:
+            # Installed but unusable, e.g. missing traineddata for `lang`
+            print(f"tesserocr unavailable, using the tesseract CLI: {e}")
+
+    @property
+    def available(self):
+        import shutil
+        return self.api is not None or shutil.which(self.command) is not None
+
+    def read(self, image):
+        return self.read_batch([image])[0]
+
+    def read_batch(self, images):
+        """Text for each grayscale or BGR image, in order"""
+        if not images:
+            return []
+        with OCR_TIMER.time():
+            return self._read_batch(images)
+
+    def _read_batch(self, images):
+        if self.api is not None:
+            from PIL import Image
+            texts = []
+            with self.lock:  # the API object is not thread-safe
+                for image in images:
+                    self.api.SetImage(Image.fromarray(image[:, :, ::-1] if image.ndim == 3 else image))
+                    texts.append(self.api.GetUTF8Text())
+            return texts
+        return self._read_batch_cli(images)
+
+    def _read_batch_cli(self, images):
+        import cv2
+        import os
+        import subprocess
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as workdir:
+            paths = []
+            for index, image in enumerate(images):
+                path = os.path.join(workdir, f"{index:05d}.png")
+                cv2.imwrite(path, image)
+                paths.append(path)
+            list_path = os.path.join(workdir, 'images.txt')
+            with open(list_path, 'w') as f:
+                f.write('\n'.join(paths) + '\n')
+
+            output = subprocess.run(
+                [self.command, list_path, 'stdout', '-l', self.lang, '--psm', str(self.psm),
+                 '-c', f'tessedit_char_whitelist={self.whitelist}'],
+                capture_output=True, text=True, check=True
+            ).stdout
+
+        # One page per image, separated by form feeds
+        pages = output.split('\f')
+        return [pages[i] if i < len(pages) else '' for i in range(len(images))]
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+
+_tesseract = None
+
+def get_tesseract_reader():
+    """The shared plate TesseractReader for this process"""
+    global _tesseract
+    with _lock:
+        if _tesseract is None:
+            _tesseract = TesseractReader()
+        return _tesseract
@@ -0,0 +1,105 @@
+"""
+Repeat-offender counters kept up to date as violations are inserted
+"""
+
+from plate_index import plate_key
+from violation_categories import VIOLATION_CATEGORIES, get_violation_category
+
+# Same order as the critical/high/medium/low count columns
+CATEGORIES = tuple(VIOLATION_CATEGORIES)
+
+def ensure_offender_table(conn):
+    """Create the offender counters table and its top-offenders index if they are missing
+
+    One row per offender, keyed by kind and offender; only plates are
+    counted (kind 'plate', normalized plate key), since no caller stores a
+    stable per-vehicle id. Returns True if the table was just created, so
+    existing violations still need counting.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'offender_stats'"
+    ).fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS offender_stats (
+            kind TEXT,
+            offender TEXT,
+            label TEXT,
+            total INTEGER,
+            critical INTEGER,
+            high INTEGER,
+            medium INTEGER,
+            low INTEGER,
+            first_seen TEXT,
+            last_seen TEXT,
+            worst_priority INTEGER,
+            PRIMARY KEY (kind, offender)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_offender_top ON offender_stats(kind, total DESC, last_seen DESC)")
+    if exists:
+        # Older databases also counted frame/position ids as 'track' offenders
+        conn.execute("DELETE FROM offender_stats WHERE kind = 'track'")
+    return not exists
+
+def record_offence(conn, kind, offender, label, violation_type, timestamp):
+    """Count one violation against an offender without committing"""
+    category = get_violation_category(violation_type)
+    counts = [int(category == name) for name in CATEGORIES]
+    conn.execute(
+        "INSERT INTO offender_stats (kind, offender, label, total, critical, high, medium, low, "
+        "first_seen, last_seen, worst_priority) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (kind, offender) DO UPDATE SET "
+        "label = excluded.label, total = total + 1, "
+        "critical = critical + excluded.critical, high = high + excluded.high, "
+        "medium = medium + excluded.medium, low = low + excluded.low, "
+        "first_seen = min(first_seen, excluded.first_seen), last_seen = max(last_seen, excluded.last_seen), "
+        "worst_priority = min(worst_priority, excluded.worst_priority)",
+        (kind, offender, label, *counts, timestamp, timestamp, VIOLATION_CATEGORIES[category]['priority'])
+    )
+
+def remove_offence(conn, kind, offender, violation_type):
+    """Take one violation back off an offender without committing; first/last seen are left as they were"""
+    category = get_violation_category(violation_type)
+    counts = [int(category == name) for name in CATEGORIES]
+    conn.execute(
+        "UPDATE offender_stats SET total = total - 1, critical = critical - ?, high = high - ?, "
+        "medium = medium - ?, low = low - ? WHERE kind = ? AND offender = ?",
+        (*counts, kind, offender)
+    )
+    conn.execute("DELETE FROM offender_stats WHERE kind = ? AND offender = ? AND total <= 0", (kind, offender))
+
+def record_violation_offences(conn, violation_type, timestamp, plate_number=None):
+    """Count a violation against its plate, when one was read"""
+    key = plate_key(plate_number)
+    if key:
+        record_offence(conn, 'plate', key, plate_number, violation_type, timestamp)
+
+def top_offenders(conn, kind='plate', limit=10, min_total=2):
+    """Offenders with the most violations, newest first among ties
+
+    Reads the first `limit` entries of the index, so the cost does not grow
+    with the number of violations stored.
+    """
+    priorities = {data['priority']: category for category, data in VIOLATION_CATEGORIES.items()}
+    rows = conn.execute(
+        "SELECT offender, label, total, critical, high, medium, low, first_seen, last_seen, worst_priority "
+        "FROM offender_stats WHERE kind = ? AND total >= ? ORDER BY total DESC, last_seen DESC LIMIT ?",
+        (kind, min_total, limit)
+    ).fetchall()
+    return [{
+        'offender': offender,
+        'label': label,
+        'total': total,
+        'counts': dict(zip(CATEGORIES, (critical, high, medium, low))),
+        'first_seen': first_seen,
+        'last_seen': last_seen,
+        'worst_category': priorities.get(worst_priority, 'MEDIUM')
+    } for offender, label, total, critical, high, medium, low, first_seen, last_seen, worst_priority in rows]
+
+def rebuild_offender_stats(conn):
+    """Recount every offender from the violations table without committing; for databases written before the counters existed"""
+    conn.execute("DELETE FROM offender_stats")
+    rows = conn.execute("SELECT violation_type, timestamp, plate_number FROM violations").fetchall()
+    for violation_type, timestamp, plate_number in rows:
+        record_violation_offences(conn, violation_type or '', timestamp, plate_number)
+    return len(rows)
@@ -0,0 +1,93 @@
+"""
+Per-track plate OCR cache with crop-quality gating and per-character voting
+"""
+
+import cv2
+from collections import defaultdict
+
+def crop_quality(crop):
+    """Return (sharpness, area) for a plate crop; sharpness is the variance of the Laplacian"""
+    if crop is None or crop.size == 0:
+        return 0.0, 0
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var()), crop.shape[0] * crop.shape[1]
+
+def vote_plate(readings):
+    """Merge (text, confidence) readings into one plate by per-character voting
+
+    Readings are grouped by length and the length with the most total
+    confidence wins; each position then takes the character with the most
+    confidence. Returns (plate, agreement) where agreement is the mean share
+    of the winning character's weight per position, or ("", 0.0).
+    """
+    by_length = defaultdict(list)
+    for text, confidence in readings:
+        if text:
+            by_length[len(text)].append((text, confidence))
+    if not by_length:
+        return "", 0.0
+
+    group = max(by_length.values(), key=lambda texts: sum(conf for _, conf in texts))
+
+    plate = []
+    agreement = 0.0
+    for position in range(len(group[0][0])):
+        weights = defaultdict(float)
+        for text, confidence in group:
+            weights[text[position]] += confidence
+        char, weight = max(weights.items(), key=lambda item: item[1])
+        plate.append(char)
+        agreement += weight / sum(weights.values())
+
+    return "".join(plate), agreement / len(plate)
+
+class PlateTrackCache:
+    """Remember plate readings per tracked vehicle and decide when to OCR again
+
+    A track is read on first sight and afterwards only when a crop is clearly
+    sharper or larger than the best one read so far, up to max_reads times.
+    """
+
+    def __init__(self, sharpness_gain=1.25, area_gain=1.2, max_reads=5):
+        self.sharpness_gain = sharpness_gain
+        self.area_gain = area_gain
+        self.max_reads = max_reads
+        self.tracks = {}
+
+    def should_read(self, track_id, sharpness, area):
+        track = self.tracks.get(track_id)
+        if track is None:
+            return True
+        if len(track['readings']) >= self.max_reads:
+            return False
+        return (sharpness > track['best_sharpness'] * self.sharpness_gain or
+                area > track['best_area'] * self.area_gain)
+
+    def add_reading(self, track_id, text, confidence, sharpness, area):
+        track = self.tracks.setdefault(track_id, {'readings': [], 'best_sharpness': 0.0, 'best_area': 0})
+        track['best_sharpness'] = max(track['best_sharpness'], sharpness)
+        track['best_area'] = max(track['best_area'], area)
+        if text:
+            track['readings'].append((text, confidence))
+        else:
+            # Count failed reads against the budget without letting them vote
+            track['readings'].append(("", 0.0))
+
+    def best(self, track_id):
+        """The voted plate for a track as {'plate_number', 'confidence', 'reads'}, or None"""
+        track = self.tracks.get(track_id)
+        if not track:
+            return None
+        plate, agreement = vote_plate(track['readings'])
+        if not plate:
+            return None
+        votes = [confidence for text, confidence in track['readings'] if len(text) == len(plate)]
+        return {
+            'plate_number': plate,
+            'confidence': agreement * sum(votes) / len(votes),
+            'reads': len(track['readings'])
+        }
+
+    def drop(self, track_ids):
+        for track_id in track_ids:
+            self.tracks.pop(track_id, None)
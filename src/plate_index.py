@@ -0,0 +1,211 @@
+"""
+Plate reads linked to violations, with a trigram index for fuzzy search
+"""
+
+import os
+import re
+import sqlite3
+
+# Characters OCR swaps for one another collapse to one symbol in the search key
+CONFUSIONS = str.maketrans({
+    'O': '0', 'Q': '0', 'D': '0',
+    'I': '1', 'L': '1',
+    'Z': '2',
+    'S': '5',
+    'G': '6',
+    'B': '8',
+})
+
+GRAM_SIZE = 3
+
+def ensure_plates_table(conn):
+    """Create the plate tables and indexes if they are missing
+
+    Distinct keys are stored once in plate_keys and only they are n-gram
+    indexed, so repeated reads of the same plate cost one row in plates.
+    plate_gram_counts holds each gram's posting size so searches can start
+    from the rarest grams.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS plate_keys (
+            id INTEGER PRIMARY KEY,
+            plate_key TEXT UNIQUE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS plate_grams (
+            gram TEXT,
+            key_id INTEGER,
+            PRIMARY KEY (gram, key_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS plates (
+            id INTEGER PRIMARY KEY,
+            violation_id INTEGER REFERENCES violations(id),
+            plate_number TEXT,
+            key_id INTEGER REFERENCES plate_keys(id),
+            confidence REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS plate_gram_counts (
+            gram TEXT PRIMARY KEY,
+            keys INTEGER
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_plates_key ON plates(key_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_plates_violation ON plates(violation_id)")
+
+def plate_key(text):
+    """Normalize a plate for matching: uppercase alphanumerics with OCR look-alikes merged"""
+    return re.sub(r'[^A-Z0-9]', '', (text or '').upper()).translate(CONFUSIONS)
+
+def plate_grams(key):
+    """Trigrams of a key padded with start/end markers; a plate of n characters has n grams"""
+    padded = f'^{key}$'
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def add_plate(conn, violation_id, plate_number, confidence=None):
+    """Record one plate read for a violation without committing; returns the plates row id or None"""
+    key = plate_key(plate_number)
+    if not key:
+        return None
+
+    cursor = conn.execute("INSERT OR IGNORE INTO plate_keys (plate_key) VALUES (?)", (key,))
+    if cursor.rowcount:
+        key_id = cursor.lastrowid
+        grams = [(gram,) for gram in plate_grams(key)]
+        conn.executemany("INSERT OR IGNORE INTO plate_grams (gram, key_id) VALUES (?, ?)",
+                         [(gram, key_id) for gram, in grams])
+        conn.executemany("INSERT OR IGNORE INTO plate_gram_counts (gram, keys) VALUES (?, 0)", grams)
+        conn.executemany("UPDATE plate_gram_counts SET keys = keys + 1 WHERE gram = ?", grams)
+    else:
+        key_id = conn.execute("SELECT id FROM plate_keys WHERE plate_key = ?", (key,)).fetchone()[0]
+
+    cursor = conn.execute(
+        "INSERT INTO plates (violation_id, plate_number, key_id, confidence) VALUES (?, ?, ?, ?)",
+        (violation_id, plate_number, key_id, confidence)
+    )
+    return cursor.lastrowid
+
+def index_violation_plates(conn):
+    """Index plate_number values of violations that have no plates row yet; returns how many"""
+    rows = conn.execute(
+        "SELECT id, plate_number FROM violations "
+        "WHERE plate_number IS NOT NULL AND plate_number != '' "
+        "AND id NOT IN (SELECT violation_id FROM plates WHERE violation_id IS NOT NULL)"
+    ).fetchall()
+    added = 0
+    for violation_id, plate_number in rows:
+        if add_plate(conn, violation_id, plate_number) is not None:
+            added += 1
+    return added
+
+def _candidate_keys(conn, key, max_distance):
+    grams = plate_grams(key)
+    # One edit touches at most GRAM_SIZE grams, so a key within max_distance
+    # edits keeps at least one of any GRAM_SIZE * max_distance + 1 query grams.
+    # Probing only the rarest ones keeps candidate lists short even when
+    # common prefixes (state codes) are shared by most plates.
+    probe_count = GRAM_SIZE * max_distance + 1
+    if probe_count <= len(grams):
+        placeholders = ','.join('?' * len(grams))
+        counts = dict(conn.execute(
+            f"SELECT gram, keys FROM plate_gram_counts WHERE gram IN ({placeholders})", tuple(grams)
+        ).fetchall())
+        if len(counts) < len(grams) - GRAM_SIZE * max_distance:
+            return []
+        probes = sorted(grams, key=lambda gram: counts.get(gram, 0))[:probe_count]
+        placeholders = ','.join('?' * len(probes))
+        return conn.execute(
+            f"SELECT DISTINCT k.id, k.plate_key FROM plate_grams g JOIN plate_keys k ON k.id = g.key_id "
+            f"WHERE g.gram IN ({placeholders}) AND length(k.plate_key) BETWEEN ? AND ?",
+            (*probes, len(key) - max_distance, len(key) + max_distance)
+        ).fetchall()
+    # Query too short for the gram bound to prune anything; filter keys by length
+    return conn.execute(
+        "SELECT id, plate_key FROM plate_keys WHERE length(plate_key) BETWEEN ? AND ?",
+        (len(key) - max_distance, len(key) + max_distance)
+    ).fetchall()
+
+def search_plates(conn, query, max_distance=1, limit=100):
+    """Find violations whose plate matches query within max_distance edits of the normalized key
+
+    Returns dicts with plate_number, distance, confidence and the violation's
+    id, timestamp, type, location and camera, closest matches first.
+    """
+    key = plate_key(query)
+    if not key:
+        return []
+
+    distances = {}
+    for key_id, candidate in _candidate_keys(conn, key, max_distance):
+        distance = edit_distance(key, candidate)
+        if distance <= max_distance:
+            distances[key_id] = distance
+    if not distances:
+        return []
+
+    # Fetch closest distances first so a hot plate cannot crowd out the limit
+    matches = []
+    for distance in sorted(set(distances.values())):
+        key_ids = [key_id for key_id, found in distances.items() if found == distance]
+        placeholders = ','.join('?' * len(key_ids))
+        rows = conn.execute(
+            f"SELECT p.plate_number, p.confidence, v.id, v.timestamp, v.violation_type, v.location, v.camera_id "
+            f"FROM plates p LEFT JOIN violations v ON v.id = p.violation_id "
+            f"WHERE p.key_id IN ({placeholders}) ORDER BY v.timestamp DESC LIMIT ?",
+            (*key_ids, limit - len(matches))
+        ).fetchall()
+        matches.extend({
+            'plate_number': plate_number,
+            'distance': distance,
+            'confidence': confidence,
+            'violation_id': violation_id,
+            'timestamp': timestamp,
+            'violation_type': violation_type,
+            'location': location,
+            'camera_id': camera_id
+        } for plate_number, confidence, violation_id, timestamp, violation_type, location, camera_id in rows)
+        if len(matches) >= limit:
+            break
+    return matches
+
+def find_session_databases(directory='.'):
+    """The current session, legacy violations.db and every archive in a directory"""
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith('archive_violations_') and name.endswith('.db'))
+    names = ['current_session.db', 'violations.db'] + names
+    return [os.path.join(directory, name) for name in names if os.path.exists(os.path.join(directory, name))]
+
+def search_archives(query, db_paths=None, max_distance=1, limit=100):
+    """Search the plate index of every session database; each match also gets a 'database' key"""
+    matches = []
+    for db_path in db_paths if db_paths is not None else find_session_databases():
+        conn = sqlite3.connect(db_path)
+        try:
+            has_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'plate_keys'"
+            ).fetchone()
+            if not has_index:
+                continue
+            for match in search_plates(conn, query, max_distance, limit):
+                match['database'] = os.path.basename(db_path)
+                matches.append(match)
+        finally:
+            conn.close()
+    # Closest first, newest first within a distance ('%Y-%m-%d %H:%M:%S' sorts as text)
+    matches.sort(key=lambda match: match['timestamp'] or '', reverse=True)
+    matches.sort(key=lambda match: match['distance'])
+    return matches[:limit]
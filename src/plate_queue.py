@@ -0,0 +1,221 @@
+"""
+Deferred plate OCR for violating vehicles
+"""
+
+import queue
+import threading
+from plate_cache import PlateTrackCache, crop_quality
+from simple_tracker import SimpleTracker, box_iou
+from violation_db import DB_PATH, connect, update_plate_number
+from telemetry import counter, gauge
+
+PLATE_BAND = 0.7  # plates are searched in the bottom 30% of the vehicle box
+
+QUEUE_DEPTH = gauge('traffic_plate_queue_depth', 'Vehicle crops waiting for plate OCR')
+PLATES_READ = counter('traffic_plates_read_total', 'Vehicle crops read by the plate OCR queue')
+PLATES_DROPPED = counter('traffic_plate_queue_dropped_total', 'Vehicle crops dropped because the OCR queue was full')
+
+class PlateOCRQueue:
+    """Read plates of violators on a background thread and write them back to their rows
+
+    The detection loop calls submit() with the stored violation id and the
+    vehicle crop when a violation fires; that never blocks. The worker reads
+    queued crops in batches and fills in violations.plate_number by row id.
+    When the queue is full the crop is dropped and counted rather than
+    holding up detection.
+
+    Loops that also call follow() with every frame's vehicle boxes get more
+    than one look at each violator: the violating vehicle is tracked and
+    its later crops are queued too. The worker gates those through a
+    PlateTrackCache (OCR only on a sharper or larger crop, up to max_reads)
+    and writes the per-character vote back to all of the track's rows.
+    """
+
+    def __init__(self, recognizer=None, db_path=DB_PATH, batch_size=8, max_pending=256, on_plate=None,
+                 follow_crops=10):
+        self.recognizer = recognizer
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.on_plate = on_plate
+        self.queue = queue.Queue(maxsize=max_pending)
+
+        # Detection-thread state for follow(); the cache belongs to the worker
+        self.tracker = None
+        self.violators = {}  # track id -> violation ids
+        self.follow_crops = follow_crops
+        self.followed = {}  # track id -> crops queued
+        self.plate_cache = PlateTrackCache()
+        self.track_plates = {}  # track id -> {violation id: plate written}
+
+        self.submitted = 0
+        self.read = 0
+        self.dropped = 0
+
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def submit(self, violation_id, vehicle_crop, track_id=None):
+        """Queue a vehicle crop for OCR; returns False if it was dropped"""
+        if violation_id is None or vehicle_crop is None or vehicle_crop.size == 0:
+            return False
+        violation_ids = tuple(violation_id) if isinstance(violation_id, (list, tuple)) else (violation_id,)
+        return self._put((violation_ids, vehicle_crop, track_id))
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            PLATES_DROPPED.inc()
+            return False
+        self.submitted += 1
+        QUEUE_DEPTH.inc()
+        return True
+
+    def submit_vehicle(self, violation_id, frame, bbox):
+        """Crop the vehicle out of a frame (copied, so the caller may reuse the frame) and queue it
+
+        After follow() has seen this frame, the violation is tied to the
+        vehicle's track so later crops of it are read as well.
+        """
+        track_id = self._track_of(bbox) if violation_id is not None else None
+        if track_id is not None:
+            self.violators.setdefault(track_id, []).append(violation_id)
+            self.followed[track_id] = self.followed.get(track_id, 0) + 1
+            violation_id = self.violators[track_id]
+        return self.submit(violation_id, _crop(frame, bbox), track_id)
+
+    def follow(self, frame, vehicle_boxes):
+        """Track this frame's vehicles and queue new crops of violators; call once per analysed frame"""
+        if self.tracker is None:
+            self.tracker = SimpleTracker()
+        tracks = self.tracker.update([list(box[:4]) for box in vehicle_boxes])
+        for track_id in self.tracker.removed:
+            if self.violators.pop(track_id, None) is not None:
+                self.followed.pop(track_id, None)
+                try:
+                    # Lets the worker forget the track; skipped when the queue is full
+                    self.queue.put_nowait(((), None, track_id))
+                    QUEUE_DEPTH.inc()
+                except queue.Full:
+                    pass
+        for track_id, box in tracks.items():
+            ids = self.violators.get(track_id)
+            if ids and self.followed[track_id] < self.follow_crops:
+                if self.submit(ids, _crop(frame, box), track_id):
+                    self.followed[track_id] += 1
+
+    def _track_of(self, bbox):
+        if self.tracker is None:
+            return None
+        best, best_iou = None, self.tracker.iou_threshold
+        for track_id, track_box in self.tracker.trackers.items():
+            iou = box_iou(track_box, list(bbox[:4]))
+            if iou >= best_iou:
+                best, best_iou = track_id, iou
+        return best
+
+    def _worker(self):
+        # sqlite connections stay on the thread that opened them
+        conn = connect(self.db_path)
+        try:
+            stopping = False
+            while not stopping:
+                item = self.queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                try:
+                    self._read_batch(conn, batch)
+                except Exception as e:
+                    print(f"Plate OCR error: {e}")
+                QUEUE_DEPTH.dec(len(batch))
+        finally:
+            conn.close()
+
+    def _read_batch(self, conn, batch):
+        # Untracked crops are read once; tracked ones only when clearly better
+        # than what their track has read, keeping the best crop per track
+        to_read = []
+        tracked = {}  # track id -> (violation ids, best crop to read or None, its quality)
+        for violation_ids, crop, track_id in batch:
+            if track_id is None:
+                to_read.append((violation_ids, crop, None, None))
+            elif crop is None:
+                self.plate_cache.drop([track_id])
+                self.track_plates.pop(track_id, None)
+            else:
+                ids, best_crop, best_quality = tracked.get(track_id, ((), None, None))
+                ids = violation_ids if len(violation_ids) > len(ids) else ids
+                quality = crop_quality(crop[int(crop.shape[0] * PLATE_BAND):, :])
+                if self.plate_cache.should_read(track_id, *quality) and (best_quality is None or quality > best_quality):
+                    best_crop, best_quality = crop, quality
+                tracked[track_id] = (ids, best_crop, best_quality)
+        to_read.extend((ids, crop, track_id, quality) for track_id, (ids, crop, quality) in tracked.items()
+                       if crop is not None)
+
+        found = []
+        if to_read:
+            if self.recognizer is None:
+                from license_plate_recognition import LicensePlateRecognizer
+                self.recognizer = LicensePlateRecognizer()
+
+            processed = []
+            for _, crop, _, _ in to_read:
+                height = crop.shape[0]
+                processed.append(self.recognizer.preprocess_plate(crop[int(height * PLATE_BAND):, :]))
+            texts = self.recognizer.extract_texts_batch(processed)
+
+            for (violation_ids, _, track_id, quality), (raw_text, confidence) in zip(to_read, texts):
+                plate_number = self.recognizer.clean_plate_text(raw_text)
+                if track_id is not None:
+                    self.plate_cache.add_reading(track_id, plate_number, confidence, *quality)
+                elif plate_number:
+                    found.extend((violation_id, plate_number, confidence) for violation_id in violation_ids)
+
+        # Every row of a tracked violator carries the track's current vote
+        for track_id, (violation_ids, _, _) in tracked.items():
+            best = self.plate_cache.best(track_id)
+            if not best:
+                continue
+            written = self.track_plates.setdefault(track_id, {})
+            for violation_id in violation_ids:
+                if written.get(violation_id) != best['plate_number']:
+                    written[violation_id] = best['plate_number']
+                    found.append((violation_id, best['plate_number'], best['confidence']))
+
+        with conn:
+            for violation_id, plate_number, confidence in found:
+                update_plate_number(conn, violation_id, plate_number, confidence)
+        self.read += len(to_read)
+        PLATES_READ.inc(len(to_read))
+
+        if self.on_plate:
+            for violation_id, plate_number, confidence in found:
+                self.on_plate(violation_id, plate_number, confidence)
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'read': self.read,
+            'dropped': self.dropped,
+            'pending': self.queue.qsize()
+        }
+
+    def close(self, timeout=30.0):
+        """Finish the queued crops and stop the worker"""
+        self.queue.put(None)
+        self.thread.join(timeout=timeout)
+
+def _crop(frame, bbox):
+    x1, y1, x2, y2 = [max(0, int(coord)) for coord in bbox[:4]]
+    return frame[y1:y2, x1:x2].copy()
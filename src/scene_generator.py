@@ -0,0 +1,498 @@
+"""
+Synthetic traffic scenes with known ground truth for scale and load testing
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+import cv2
+import numpy as np
+
+# COCO ids, matching what run_detector returns
+CLASS_IDS = {'person': 0, 'car': 2, 'motorcycle': 3, 'bus': 5, 'truck': 7, 'traffic light': 9}
+TRAFFIC_LIGHT = CLASS_IDS['traffic light']
+
+# Vehicle footprint as (width, length) in lane widths
+VEHICLE_SHAPES = {'car': (0.55, 0.9), 'motorcycle': (0.25, 0.55), 'bus': (0.8, 2.4), 'truck': (0.8, 1.8)}
+VEHICLE_COLORS = {'car': (200, 120, 40), 'motorcycle': (150, 40, 150), 'bus': (40, 170, 220), 'truck': (60, 60, 170)}
+SIGNAL_COLORS = {'green': (0, 255, 0), 'yellow': (0, 255, 255), 'red': (0, 0, 255)}
+
+# Person track ids, kept clear of vehicle ids
+RIDER_IDS = 10**7
+PEDESTRIAN_IDS = 2 * 10**7
+
+# Scriptable violations, named as the rule engine reports them
+SCRIPTED_VIOLATIONS = ('red_light_violation', 'wrong_way_violation', 'speeding_violation', 'no_helmet_violation',
+                       'illegal_parking_violation', 'tailgating_violation')
+
+@dataclass
+class SceneConfig:
+    width: int = 1280
+    height: int = 720
+    fps: float = 10.0
+    frames: int = 300
+    lanes: int = 4  # all flowing down the frame; a parking shoulder sits to their right
+    vehicles: dict = field(default_factory=lambda: {'car': 12, 'motorcycle': 6, 'bus': 1, 'truck': 2})
+    pedestrians: int = 4
+    signal_cycle: tuple = (60, 10, 50)  # green, yellow, red frames
+    speed_limit: float = 12.0  # pixels per frame
+    gap: float = 12.0  # pixels kept to the vehicle ahead
+    parking_frames: int = 160  # stationary frames before parking counts as a violation
+    violations: list = field(default_factory=list)  # [{'type': 'red_light_violation', 'frame': 70}, ...]
+    detection_jitter: float = 0.0  # pixel noise added to reported boxes
+    seed: int = 0
+
+    @property
+    def road_left(self):
+        return int(self.width * 0.15)
+
+    @property
+    def lane_width(self):
+        return (self.width * 0.7) / (self.lanes + 1)  # + parking shoulder
+
+    @property
+    def stop_line(self):
+        # Just above the band the red-light rule watches
+        return int(self.height * 0.68)
+
+    @property
+    def crosswalk(self):
+        return int(self.height * 0.58), int(self.height * 0.66)
+
+    @property
+    def light_box(self):
+        return (self.road_left - 60, 40, self.road_left - 20, 160)
+
+    def signal(self, frame_index):
+        green, yellow, red = self.signal_cycle
+        phase = frame_index % (green + yellow + red)
+        return 'green' if phase < green else 'yellow' if phase < green + yellow else 'red'
+
+class SceneFrame:
+    """One generated frame: what a perfect detector would report plus the ground truth"""
+
+    def __init__(self, index, signal, detections, track_ids, violations, helmets):
+        self.index = index
+        self.signal = signal
+        self.detections = detections  # (N, 6) float32 [x1, y1, x2, y2, confidence, class_id]
+        self.track_ids = track_ids  # (N,) int64; -1 for the traffic light
+        self.violations = violations  # [{'type', 'track_id', 'frame'}] that happened in this frame
+        self.helmets = helmets  # {rider track id: wears helmet}
+
+    def truth(self):
+        return {
+            'frame': self.index,
+            'signal': self.signal,
+            'objects': [{'track_id': int(track_id), 'class_id': int(row[5]), 'bbox': [round(float(v), 1) for v in row[:4]]}
+                        for track_id, row in zip(self.track_ids, self.detections)],
+            'violations': self.violations
+        }
+
+class SceneGenerator:
+    """Simulate vehicles, riders and pedestrians on a signalised road, one frame at a time
+
+    Vehicles are held in flat arrays and advanced together; in each lane a
+    vehicle stops for the signal and keeps `gap` to the one ahead (a
+    running minimum over the lane), so hundreds of objects per frame stay
+    cheap. Vehicles leaving the frame re-enter at the top as new tracks.
+    Scripted violations change one vehicle's behaviour and are reported
+    in the frame where they happen.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or SceneConfig()
+        self.rng = np.random.default_rng(self.config.seed)
+        self.next_track = 0
+        self.frame_index = 0
+        self.park_start = {}  # track id -> frame it parked
+        self._background = None
+
+        columns = ('track', 'kind', 'lane', 'y', 'w', 'h', 'speed', 'direction', 'gap', 'follows',
+                   'ignores_signal', 'helmet', 'park_until', 'pending_event')
+        self.state = {name: [] for name in columns}
+        self.kinds = list(VEHICLE_SHAPES)
+
+        for kind, count in self.config.vehicles.items():
+            for _ in range(count):
+                self._spawn(kind, lane=self.rng.integers(self.config.lanes),
+                            y=self.rng.uniform(-self.config.height, self.config.height * 0.9))
+        self._arrays()
+        self._resolve_overlaps()
+
+        # Pedestrians walk across the crosswalk, waiting at the kerb while traffic flows
+        top, bottom = self.config.crosswalk
+        self.pedestrian_x = self.rng.uniform(0, self.config.width, self.config.pedestrians)
+        self.pedestrian_y = self.rng.uniform(top, max(top, bottom - 40), self.config.pedestrians)
+        self.pedestrian_dir = self.rng.choice([-1.0, 1.0], self.config.pedestrians)
+        self.pedestrian_ids = np.arange(self.config.pedestrians) + PEDESTRIAN_IDS
+
+        # Applied at their frame; a red-light script waits for the next red phase
+        self.scripts = sorted(self.config.violations, key=lambda script: script['frame'])
+        for script in self.scripts:
+            if script['type'] not in SCRIPTED_VIOLATIONS:
+                raise ValueError(f"Unknown scripted violation: {script['type']}")
+
+    # -- state -------------------------------------------------------------
+
+    def _spawn(self, kind, lane, y, speed=None, direction=1, gap=None, follows=True, ignores_signal=False,
+               helmet=True, park_until=-1, pending_event=None):
+        width, length = VEHICLE_SHAPES[kind]
+        values = {
+            'track': self.next_track, 'kind': self.kinds.index(kind), 'lane': lane, 'y': y,
+            'w': width * self.config.lane_width, 'h': length * self.config.lane_width,
+            'speed': speed if speed is not None else self.rng.uniform(0.5, 0.9) * self.config.speed_limit,
+            'direction': direction, 'gap': gap if gap is not None else self.config.gap, 'follows': follows,
+            'ignores_signal': ignores_signal, 'helmet': helmet, 'park_until': park_until,
+            'pending_event': pending_event or ''
+        }
+        for name, value in values.items():
+            if isinstance(self.state[name], list):
+                self.state[name].append(value)
+            else:
+                self.state[name] = np.append(self.state[name], value)
+        self.next_track += 1
+        return self.next_track - 1
+
+    def _arrays(self):
+        types = {'track': np.int64, 'kind': np.int64, 'lane': np.int64, 'follows': bool, 'ignores_signal': bool,
+                 'helmet': bool, 'park_until': np.int64, 'pending_event': object}
+        for name, values in self.state.items():
+            self.state[name] = np.array(values, dtype=types.get(name, np.float64))
+
+    def _lane_x(self, lanes):
+        return self.config.road_left + (lanes + 0.5) * self.config.lane_width
+
+    def _resolve_overlaps(self, stop_at_line=None):
+        """Pull following vehicles back so each keeps its gap to the one ahead in its lane"""
+        s = self.state
+        order = np.lexsort((-s['y'], s['lane']))
+        order = order[s['follows'][order]]
+        for lane in np.unique(s['lane'][order]):
+            members = order[s['lane'][order] == lane]
+            # Leader first; bottom_i <= top_{i-1} - gap_i, written as a running minimum
+            desired = s['y'][members] + s['h'][members]
+            if stop_at_line is not None:
+                desired = np.where(stop_at_line[members], np.minimum(desired, self.config.stop_line - 1), desired)
+            spacing = np.cumsum(np.concatenate([[0.0], s['h'][members][:-1] + s['gap'][members][1:]]))
+            bottoms = np.minimum.accumulate(desired + spacing) - spacing
+            s['y'][members] = bottoms - s['h'][members]
+
+    # -- scripts -----------------------------------------------------------
+
+    def _apply_script(self, script):
+        kind = script.get('vehicle', 'motorcycle' if script['type'] == 'no_helmet_violation' else 'car')
+        lane = script.get('lane', self.rng.integers(self.config.lanes))
+        s = self.state
+        event = script['type']
+
+        if event == 'red_light_violation':
+            # The first vehicle waiting at (or nearing) the stop line jumps the light
+            waiting = np.flatnonzero(s['follows'] & (s['direction'] > 0) & (s['y'] + s['h'] <= self.config.stop_line))
+            if len(waiting):
+                leader = waiting[np.argmax(s['y'][waiting] + s['h'][waiting])]
+                s['ignores_signal'][leader] = True
+                s['follows'][leader] = False
+                s['speed'][leader] = max(s['speed'][leader], 0.8 * self.config.speed_limit)
+                s['pending_event'][leader] = event
+                return
+            self._spawn(kind, lane, self.config.stop_line - VEHICLE_SHAPES[kind][1] * self.config.lane_width - 1,
+                        speed=0.8 * self.config.speed_limit, follows=False, ignores_signal=True, pending_event=event)
+        elif event == 'wrong_way_violation':
+            self._spawn(kind, lane, self.config.height, direction=-1, follows=False, pending_event=event)
+        elif event == 'speeding_violation':
+            self._spawn(kind, lane, -VEHICLE_SHAPES[kind][1] * self.config.lane_width,
+                        speed=2.5 * self.config.speed_limit, follows=False, ignores_signal=True, pending_event=event)
+        elif event == 'no_helmet_violation':
+            self._spawn('motorcycle', lane, -VEHICLE_SHAPES['motorcycle'][1] * self.config.lane_width,
+                        helmet=False, pending_event=event)
+        elif event == 'illegal_parking_violation':
+            # On the shoulder, in the stop band, for long enough to count
+            track_id = self._spawn(kind, self.config.lanes, self.config.height * 0.75, follows=False,
+                                   park_until=self.frame_index + script.get('duration', self.config.parking_frames + 40))
+            self.park_start[track_id] = self.frame_index
+        elif event == 'tailgating_violation':
+            # Right behind the last vehicle of a lane, at its speed; by default the
+            # lane whose queue ends nearest the frame, so it shows up soon
+            if 'lane' not in script:
+                lane = max(range(self.config.lanes), key=lambda k: min(
+                    s['y'][s['follows'] & (s['lane'] == k)], default=self.config.height))
+            members = np.flatnonzero(s['follows'] & (s['lane'] == lane))
+            last = members[np.argmin(s['y'][members])] if len(members) else None
+            top = min(s['y'][last], 0) if last is not None else 0
+            speed = s['speed'][last] if last is not None else None
+            length = VEHICLE_SHAPES[kind][1] * self.config.lane_width
+            self._spawn(kind, lane, top - length - 4, speed=speed, gap=4.0, pending_event=event)
+        self._arrays()
+
+    # -- simulation ----------------------------------------------------------
+
+    def step(self):
+        """Advance one frame and return its SceneFrame"""
+        cfg = self.config
+        index = self.frame_index
+        signal = cfg.signal(index)
+        events = []
+
+        waiting = []
+        while self.scripts and self.scripts[0]['frame'] <= index:
+            script = self.scripts.pop(0)
+            if script['type'] == 'red_light_violation' and signal != 'red':
+                waiting.append(script)
+            else:
+                self._apply_script(script)
+        self.scripts = waiting + self.scripts
+
+        s = self.state
+        bottoms_before = s['y'] + s['h']
+        moving = s['park_until'] < index
+        s['y'] = s['y'] + np.where(moving, s['speed'] * s['direction'], 0.0)
+
+        # Stop for yellow/red unless already over the line
+        stop = (signal != 'green') & (s['direction'] > 0) & ~s['ignores_signal'] & (bottoms_before <= cfg.stop_line)
+        self._resolve_overlaps(stop_at_line=stop)
+
+        bottoms = s['y'] + s['h']
+        visible = (bottoms > 0) & (s['y'] < cfg.height)
+
+        # Ground truth events
+        crossed = (bottoms_before <= cfg.stop_line) & (bottoms > cfg.stop_line)
+        for i in np.flatnonzero(s['pending_event'] != ''):
+            event = s['pending_event'][i]
+            if event == 'red_light_violation':
+                happened = crossed[i] and signal == 'red'
+                if crossed[i] and not happened:
+                    s['pending_event'][i] = ''  # crossed on green/yellow after all
+            elif event == 'tailgating_violation':
+                happened = visible[i] and s['y'][i] > 0
+            else:
+                happened = visible[i]
+            if happened:
+                events.append({'type': event, 'track_id': int(s['track'][i]), 'frame': index})
+                s['pending_event'][i] = ''
+        for track_id, start in list(self.park_start.items()):
+            if index - start == cfg.parking_frames:
+                events.append({'type': 'illegal_parking_violation', 'track_id': track_id, 'frame': index})
+                del self.park_start[track_id]
+
+        # Vehicles that left the frame re-enter at the top of a lane as new tracks
+        gone = np.flatnonzero(((s['direction'] > 0) & (s['y'] > cfg.height)) | ((s['direction'] < 0) & (bottoms < 0)))
+        for i in gone:
+            s['track'][i] = self.next_track
+            self.next_track += 1
+            s['y'][i] = -s['h'][i] - self.rng.uniform(0, cfg.height * 0.5)
+            s['lane'][i] = self.rng.integers(cfg.lanes)
+            s['direction'][i] = 1
+            s['speed'][i] = self.rng.uniform(0.5, 0.9) * cfg.speed_limit
+            s['gap'][i] = cfg.gap
+            s['follows'][i] = True
+            s['ignores_signal'][i] = False
+            s['helmet'][i] = True
+            s['park_until'][i] = -1
+            s['pending_event'][i] = ''
+
+        frame = self._observe(index, signal, visible, events)
+        self.frame_index += 1
+        return frame
+
+    def _observe(self, index, signal, visible, events):
+        cfg = self.config
+        s = self.state
+        idx = np.flatnonzero(visible)
+        x_center = self._lane_x(s['lane'][idx].astype(np.float64))
+        boxes = np.stack([x_center - s['w'][idx] / 2, s['y'][idx], x_center + s['w'][idx] / 2, s['y'][idx] + s['h'][idx]],
+                         axis=1) if len(idx) else np.zeros((0, 4))
+        kinds = np.array([CLASS_IDS[self.kinds[k]] for k in s['kind'][idx]], dtype=np.float64)
+        rows = [np.column_stack([boxes, self.rng.uniform(0.6, 0.95, len(idx)), kinds])]
+        track_ids = [s['track'][idx]]
+
+        # Riders sit over the front half of their motorcycle, head first
+        bikes = idx[s['kind'][idx] == self.kinds.index('motorcycle')]
+        helmets = {}
+        if len(bikes):
+            bx = self._lane_x(s['lane'][bikes].astype(np.float64))
+            rider_w = s['w'][bikes] * 1.2
+            riders = np.stack([bx - rider_w / 2, s['y'][bikes] - s['h'][bikes] * 0.3,
+                               bx + rider_w / 2, s['y'][bikes] + s['h'][bikes] * 0.5], axis=1)
+            rows.append(np.column_stack([riders, self.rng.uniform(0.6, 0.9, len(bikes)),
+                                         np.full(len(bikes), CLASS_IDS['person'])]))
+            rider_ids = s['track'][bikes] + RIDER_IDS
+            track_ids.append(rider_ids)
+            helmets = {int(rider): bool(helmet) for rider, helmet in zip(rider_ids, s['helmet'][bikes])}
+
+        # Pedestrians cross on red and wait at the kerb otherwise
+        if cfg.pedestrians:
+            if signal == 'red':
+                self.pedestrian_x += self.pedestrian_dir * 4
+                self.pedestrian_dir[(self.pedestrian_x < 0) | (self.pedestrian_x > cfg.width)] *= -1
+            px, py = self.pedestrian_x, self.pedestrian_y
+            rows.append(np.column_stack([px - 10, py, px + 10, py + 40, self.rng.uniform(0.6, 0.9, len(px)),
+                                         np.full(len(px), CLASS_IDS['person'])]))
+            track_ids.append(self.pedestrian_ids)
+
+        rows.append(np.array([[*cfg.light_box, 0.9, TRAFFIC_LIGHT]]))
+        track_ids.append(np.array([-1]))
+
+        detections = np.concatenate(rows).astype(np.float32)
+        if cfg.detection_jitter:
+            detections[:, :4] += self.rng.normal(0, cfg.detection_jitter, (len(detections), 4)).astype(np.float32)
+        return SceneFrame(index, signal, detections, np.concatenate(track_ids).astype(np.int64), events, helmets)
+
+    def frames(self):
+        """Yield cfg.frames SceneFrames"""
+        for _ in range(self.config.frames - self.frame_index):
+            yield self.step()
+
+    # -- rendering -----------------------------------------------------------
+
+    def background(self):
+        if self._background is None:
+            cfg = self.config
+            image = np.full((cfg.height, cfg.width, 3), (60, 110, 60), dtype=np.uint8)
+            right = int(cfg.road_left + cfg.lane_width * (cfg.lanes + 1))
+            cv2.rectangle(image, (cfg.road_left, 0), (right, cfg.height), (95, 95, 95), -1)
+            for lane in range(1, cfg.lanes + 1):
+                x = int(cfg.road_left + lane * cfg.lane_width)
+                for y in range(0, cfg.height, 40):
+                    cv2.line(image, (x, y), (x, y + 20), (230, 230, 230), 2)
+            top, bottom = cfg.crosswalk
+            for x in range(cfg.road_left, right, 30):
+                cv2.rectangle(image, (x, top), (x + 15, bottom), (235, 235, 235), -1)
+            cv2.line(image, (cfg.road_left, cfg.stop_line), (right, cfg.stop_line), (255, 255, 255), 4)
+            x1, y1, x2, y2 = cfg.light_box
+            cv2.rectangle(image, (x1, y1), (x2, y2), (30, 30, 30), -1)
+            self._background = image
+        return self._background
+
+    def render(self, scene_frame):
+        """BGR image of a SceneFrame, drawn so the color and helmet checks see what the truth says"""
+        image = self.background().copy()
+        x1, y1, x2, y2 = self.config.light_box
+        lamp_y = {'red': y1 + 20, 'yellow': (y1 + y2) // 2, 'green': y2 - 20}[scene_frame.signal]
+        cv2.circle(image, ((x1 + x2) // 2, lamp_y), 14, SIGNAL_COLORS[scene_frame.signal], -1)
+
+        colors = {CLASS_IDS[kind]: color for kind, color in VEHICLE_COLORS.items()}
+        for track_id, (bx1, by1, bx2, by2, _, class_id) in zip(scene_frame.track_ids, scene_frame.detections.tolist()):
+            class_id = int(class_id)
+            if class_id == TRAFFIC_LIGHT:
+                continue
+            top_left, bottom_right = (int(bx1), int(by1)), (int(bx2), int(by2))
+            if class_id == CLASS_IDS['person']:
+                cv2.rectangle(image, top_left, bottom_right, (120, 80, 160), -1)
+                head = int(by1 + (by2 - by1) * 0.2)
+                helmet = scene_frame.helmets.get(int(track_id), False)
+                cv2.rectangle(image, top_left, (int(bx2), head), (20, 20, 20) if helmet else (170, 200, 230), -1)
+            else:
+                cv2.rectangle(image, top_left, bottom_right, colors[class_id], -1)
+                cv2.rectangle(image, top_left, bottom_right, (20, 20, 20), 1)
+        return image
+
+def write_video(config, video_path, truth_path=None):
+    """Render a scene to video_path and its ground truth, one JSON line per frame, to truth_path"""
+    generator = SceneGenerator(config)
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), config.fps, (config.width, config.height))
+    truth = open(truth_path or video_path.rsplit('.', 1)[0] + '.truth.jsonl', 'w')
+    try:
+        for scene_frame in generator.frames():
+            writer.write(generator.render(scene_frame))
+            truth.write(json.dumps(scene_frame.truth()) + '\n')
+    finally:
+        writer.release()
+        truth.close()
+
+def write_detections(config, path):
+    """Write the detection stream with ground truth as JSON lines, without rendering"""
+    with open(path, 'w') as f:
+        for scene_frame in SceneGenerator(config).frames():
+            record = scene_frame.truth()
+            record['detections'] = scene_frame.detections.round(2).tolist()
+            f.write(json.dumps(record) + '\n')
+
+def stress_test(config, db_path=':memory:', render=True):
+    """Feed a scene through the tracker, the violation rules and the DB writer; no model involved
+
+    Returns per-stage seconds, object and violation counts, and the
+    violations found by type next to the scripted ground truth.
+    """
+    from local_processor import LocalTrafficProcessor, record_violation
+    from simple_tracker import SimpleTracker
+
+    generator = SceneGenerator(config)
+    processor = LocalTrafficProcessor(record_clips=False, db_path=db_path, drift_db=None)
+    tracker = SimpleTracker()
+    timings = {'generate': 0.0, 'render': 0.0, 'tracker': 0.0, 'rules': 0.0, 'db_insert': 0.0}
+    found, expected = {}, {}
+    objects = 0
+
+    for frame_index in range(config.frames):
+        start = time.perf_counter()
+        scene_frame = generator.step()
+        timings['generate'] += time.perf_counter() - start
+        objects += len(scene_frame.detections)
+        for event in scene_frame.violations:
+            expected[event['type']] = expected.get(event['type'], 0) + 1
+
+        start = time.perf_counter()
+        image = generator.render(scene_frame) if render else generator.background()
+        timings['render'] += time.perf_counter() - start
+
+        vehicle_rows = scene_frame.detections[np.isin(scene_frame.detections[:, 5], [2, 3, 5, 7])]
+        start = time.perf_counter()
+        tracker.update(vehicle_rows[:, :4].tolist())
+        timings['tracker'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        violations = processor.detect_violations_from_detections(image, scene_frame.detections, frame_index)
+        timings['rules'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for violation in violations:
+            found[violation['type']] = found.get(violation['type'], 0) + 1
+            record_violation(processor.conn, violation, None, f"synthetic-{frame_index}")
+        processor.conn.commit()
+        timings['db_insert'] += time.perf_counter() - start
+
+    return {
+        'frames': config.frames,
+        'objects_per_frame': objects / config.frames if config.frames else 0.0,
+        'seconds': timings,
+        'violations_found': found,
+        'violations_expected': expected
+    }
+
+def build_config(args):
+    violations = []
+    for item in args.violation:
+        kind, _, frame = item.partition('@')
+        violations.append({'type': kind if kind.endswith('_violation') else f"{kind}_violation", 'frame': int(frame or 0)})
+    return SceneConfig(width=args.width, height=args.height, fps=args.fps, frames=args.frames, lanes=args.lanes,
+                       vehicles={'car': args.cars, 'motorcycle': args.motorcycles, 'bus': args.buses,
+                                 'truck': args.trucks},
+                       pedestrians=args.pedestrians, violations=violations, seed=args.seed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic traffic scene generator")
+    parser.add_argument("mode", choices=["video", "detections", "stress"])
+    parser.add_argument("output", nargs="?", help="video (.mp4) or detection stream (.jsonl) path")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--lanes", type=int, default=4)
+    parser.add_argument("--cars", type=int, default=12)
+    parser.add_argument("--motorcycles", type=int, default=6)
+    parser.add_argument("--buses", type=int, default=1)
+    parser.add_argument("--trucks", type=int, default=2)
+    parser.add_argument("--pedestrians", type=int, default=4)
+    parser.add_argument("--violation", action="append", default=[],
+                        help="scripted violation as type@frame, e.g. red_light@75 (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = build_config(args)
+
+    if args.mode == "video":
+        write_video(config, args.output or "data/samples/synthetic_traffic.mp4")
+    elif args.mode == "detections":
+        write_detections(config, args.output or "outputs/synthetic_detections.jsonl")
+    else:
+        print(json.dumps(stress_test(config), indent=2))
@@ -1,6 +1,9 @@
 import cv2
 import os
 from datetime import datetime
+from telemetry import stage_timer
+
+EVIDENCE_TIMER = stage_timer('evidence_write')
 
 def capture_violation_screenshot(frame, violation_type, vehicle_id):
     """Capture and save violation screenshot"""
@@ -12,6 +15,7 @@ def capture_violation_screenshot(frame, violation_type, vehicle_id):
     os.makedirs("outputs/violations", exist_ok=True)
     
     # Save screenshot
-    cv2.imwrite(screenshot_path, frame)
+    with EVIDENCE_TIMER.time():
+        cv2.imwrite(screenshot_path, frame)
     
     return screenshot_path
\ No newline at end of file
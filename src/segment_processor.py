@@ -0,0 +1,168 @@
+"""
+Offline processing of long videos split into keyframe-aligned segments across a process pool
+"""
+
+import cv2
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from simple_tracker import box_iou
+
+SAMPLE_EVERY = 30  # same sampling as LocalTrafficProcessor.process_video
+WARMUP_SAMPLES = 5  # sampled frames replayed before a segment to prime tracking state
+STITCH_WINDOW = 3  # sampled frames on either side of a boundary checked for duplicates
+
+def find_keyframes(video_path):
+    """Return keyframe indices from ffprobe packet flags, or None if ffprobe is unavailable"""
+    if not shutil.which('ffprobe'):
+        return None
+
+    try:
+        output = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path],
+            capture_output=True, text=True, check=True
+        ).stdout
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    keyframes = []
+    for line in output.splitlines():
+        parts = line.split(',')
+        if len(parts) >= 2 and 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+            keyframes.append(int(round(float(parts[0]) * fps)))
+    return sorted(set(keyframes)) or None
+
+def plan_segments(total_frames, workers, keyframes=None):
+    """Split [0, total_frames) into about `workers` segments, snapping cuts to keyframes"""
+    cuts = []
+    for i in range(1, workers):
+        target = total_frames * i // workers
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        if 0 < target < total_frames and (not cuts or target > cuts[-1]):
+            cuts.append(target)
+
+    bounds = [0] + cuts + [total_frames]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+def _init_worker():
+    # One core per process; oversubscribed BLAS/OpenCV threads would cancel the speedup
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+def _process_segment(video_path, index, start, end):
+    """Run the rules over one segment, read violators' plates and write their evidence images
+
+    Violations are returned rather than inserted so the parent can merge
+    segments in order and drop boundary duplicates first.
+    """
+    from local_processor import LocalTrafficProcessor
+    from frame_source import FrameSource
+
+    processor = LocalTrafficProcessor(record_clips=False)
+
+    # Start a little early so speed/wrong-way/parking state and the
+    # already-violated set carry across the boundary
+    warmup_start = max(0, start - WARMUP_SAMPLES * SAMPLE_EVERY)
+    first = warmup_start + (-warmup_start) % SAMPLE_EVERY
+
+    found = []
+    for frame_num, _, frame in FrameSource(video_path, stride=SAMPLE_EVERY, start_frame=first, end_frame=end):
+        violations = processor.detect_violations(frame, frame_num)
+        if frame_num >= start:
+            if violations and processor.plate_detector:
+                processor.read_plates(frame, violations)
+            for violation in violations:
+                timestamp = f"{datetime.now().isoformat().replace(':', '-')}_s{index}_f{frame_num}"
+                image_path = processor.write_violation_image(violation, frame, timestamp)
+                if image_path:
+                    violation['image_path'] = image_path
+                    violation['timestamp'] = timestamp
+                    found.append(violation)
+
+    return index, found
+
+def stitch_segments(segment_results, segments):
+    """Merge per-segment violations in order, dropping repeats of the same vehicle at a boundary"""
+    merged = []
+    window = STITCH_WINDOW * SAMPLE_EVERY
+
+    for index, (start, _) in enumerate(segments):
+        for violation in segment_results.get(index, []):
+            duplicate = False
+            if index > 0 and violation['frame'] - start <= window:
+                for previous in reversed(merged):
+                    if start - previous['frame'] > window:
+                        break
+                    if (previous['type'] == violation['type'] and
+                            previous.get('vehicle_type') == violation.get('vehicle_type') and
+                            box_iou(previous['vehicle_position'], violation['vehicle_position']) > 0.3):
+                        duplicate = True
+                        break
+            if duplicate:
+                if os.path.exists(violation['image_path']):
+                    os.remove(violation['image_path'])
+            else:
+                merged.append(violation)
+
+    merged.sort(key=lambda v: v['frame'])
+    return merged
+
+def process_video_parallel(video_path, workers=None, db_path='current_session.db'):
+    """Process a long video on every core and store the merged violations
+
+    Plates are read in the workers as process_video reads them, but no
+    violation clips are recorded: clips need the frames around each
+    violation, which only a sequential pass over the video buffers.
+    """
+    from violation_db import connect
+    from local_processor import record_violation
+
+    workers = workers or os.cpu_count() or 1
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    segments = plan_segments(total_frames, workers, find_keyframes(video_path))
+    print(f"Processing {video_path} in {len(segments)} segments on {workers} workers")
+
+    segment_results = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [pool.submit(_process_segment, video_path, i, start, end)
+                   for i, (start, end) in enumerate(segments)]
+        for future in futures:
+            index, found = future.result()
+            segment_results[index] = found
+            print(f"  Segment {index + 1}/{len(segments)} done: {len(found)} violations")
+
+    violations = stitch_segments(segment_results, segments)
+
+    # One transaction for the whole merged result
+    conn = connect(db_path)
+    with conn:
+        for violation in violations:
+            record_violation(conn, violation, violation['image_path'], violation['timestamp'])
+    conn.close()
+
+    print(f"Saved {len(violations)} violations from {video_path}")
+    return violations
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python src/segment_processor.py VIDEO [WORKERS]")
+        sys.exit(1)
+    process_video_parallel(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
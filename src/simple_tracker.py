@@ -1,12 +1,65 @@
-import cv2
+def box_iou(a, b):
+    """Intersection over union of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
 
 class SimpleTracker:
-    def __init__(self):
+    """Greedy IoU tracker that keeps vehicle ids stable across frames
+
+    Detections are [x1, y1, x2, y2, ...] sequences or dicts with a 'bbox'.
+    A track survives up to max_missed updates without a match; ids of tracks
+    dropped in the last update are listed in `removed`.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
         self.trackers = {}
+        self.missed = {}
+        self.removed = []
         self.next_id = 0
-    
+
     def update(self, detections):
-        for detection in detections:
-            self.trackers[self.next_id] = detection
-            self.next_id += 1
-        return self.trackers
\ No newline at end of file
+        """Match detections to existing tracks and return {track_id: detection} for this frame"""
+        boxes = [detection['bbox'] if isinstance(detection, dict) else detection for detection in detections]
+
+        pairs = []
+        for track_id, track_box in self.trackers.items():
+            for index, box in enumerate(boxes):
+                iou = box_iou(track_box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, track_id, index))
+        pairs.sort(reverse=True)
+
+        assigned = {}
+        used_tracks = set()
+        for iou, track_id, index in pairs:
+            if track_id in used_tracks or index in assigned:
+                continue
+            assigned[index] = track_id
+            used_tracks.add(track_id)
+
+        current = {}
+        for index, detection in enumerate(detections):
+            track_id = assigned.get(index)
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+            self.trackers[track_id] = list(boxes[index][:4])
+            self.missed[track_id] = 0
+            current[track_id] = detection
+
+        self.removed = []
+        for track_id in list(self.trackers):
+            if track_id in current:
+                continue
+            self.missed[track_id] += 1
+            if self.missed[track_id] > self.max_missed:
+                del self.trackers[track_id]
+                del self.missed[track_id]
+                self.removed.append(track_id)
+
+        return current
@@ -0,0 +1,254 @@
+"""
+Headless multi-camera scheduler: one decode thread per source, one shared inference worker
+"""
+
+import cv2
+import glob
+import os
+import sys
+import threading
+import time
+from collections import deque
+from ultralytics import YOLO
+from local_processor import LocalTrafficProcessor
+from drift_monitor import DriftMonitor, SKETCH_DB
+from detection_log import DetectionLog
+from telemetry import counter, gauge, unregister, start_http_server, METRICS_PORT
+
+class CameraStream:
+    """Decode state for one source, with a small queue that drops stale frames"""
+
+    def __init__(self, source, camera_id, target_fps=5.0, queue_size=2, realtime=True):
+        self.source = source
+        self.camera_id = camera_id
+        self.target_fps = target_fps
+        self.frames = deque(maxlen=queue_size)  # (frame_num, frame)
+        self.realtime = realtime
+
+        self.decoded = 0
+        self.dropped = 0
+        self.processed = 0
+        self.violations = 0
+        self.finished = False
+        self.lock = threading.Lock()
+        self.processor = None  # created on the inference thread
+        self.thread = None
+
+        gauge('traffic_stream_queue_depth', 'Frames waiting for inference', camera=camera_id).set_function(
+            lambda: len(self.frames))
+        self.dropped_counter = counter('traffic_stream_dropped_frames_total',
+                                       'Frames dropped because inference fell behind', camera=camera_id)
+
+    def close(self):
+        """Unregister this stream's metrics; the queue gauge would otherwise keep the stream alive"""
+        unregister('traffic_stream_queue_depth', camera=self.camera_id)
+        unregister('traffic_stream_dropped_frames_total', camera=self.camera_id)
+
+    def is_file(self):
+        return isinstance(self.source, str) and not self.source.isdigit() and '://' not in self.source
+
+    def open_capture(self):
+        source = int(self.source) if isinstance(self.source, str) and self.source.isdigit() else self.source
+        return cv2.VideoCapture(source)
+
+    def push(self, frame_num, frame):
+        """Queue a frame for inference, dropping the oldest one when the worker is behind"""
+        with self.lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+                self.dropped_counter.inc()
+            self.frames.append((frame_num, frame))
+
+    def pop(self):
+        with self.lock:
+            if self.frames:
+                return self.frames.popleft()
+        return None
+
+    def stats(self):
+        return {
+            'camera_id': self.camera_id,
+            'source': str(self.source),
+            'decoded': self.decoded,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'violations': self.violations,
+            'queued': len(self.frames),
+            'finished': self.finished
+        }
+
+class StreamScheduler:
+    """Feed many sources into one batched YOLO worker with fair round-robin"""
+
+    def __init__(self, model_path='yolov8n.pt', batch_size=4, on_result=None, drift_db=SKETCH_DB, log_root=None):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.on_result = on_result  # called as on_result(stream, frame_num, frame, detections, violations)
+        # Per-camera, per-hour detection sketches for drift checks; None turns them off
+        self.drift = DriftMonitor(drift_db) if drift_db else None
+        # Per-camera detection logs under log_root for replaying rule changes; None turns them off
+        self.log_root = log_root
+        self.streams = []
+        self.next_stream = 0
+        self.running = False
+        self.frame_ready = threading.Event()
+        self.worker = None
+
+    def add_stream(self, source, camera_id=None, target_fps=5.0, queue_size=2):
+        """Register an RTSP URL, device index or video file"""
+        camera_id = camera_id or f"CAM_{len(self.streams) + 1:03d}"
+        stream = CameraStream(source, camera_id, target_fps, queue_size)
+        self.streams.append(stream)
+        return stream
+
+    def start(self):
+        self.running = True
+        for stream in self.streams:
+            stream.thread = threading.Thread(target=self._decode_loop, args=(stream,), daemon=True)
+            stream.thread.start()
+        self.worker = threading.Thread(target=self._inference_loop, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+        self.frame_ready.set()
+
+    def join(self, timeout=None):
+        if self.worker:
+            self.worker.join(timeout)
+
+    def stats(self):
+        return [stream.stats() for stream in self.streams]
+
+    def _decode_loop(self, stream):
+        """Read one source, keeping only frames that meet its frame-rate target"""
+        cap = stream.open_capture()
+        if not cap.isOpened():
+            print(f"Cannot open source: {stream.source}")
+            stream.finished = True
+            self.frame_ready.set()
+            return
+
+        source_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        interval = 1.0 / stream.target_fps if stream.target_fps else 0
+        pace = stream.is_file() and stream.realtime  # play files back like a live camera
+        started = time.time()
+        next_sample = 0.0
+        frame_num = 0
+
+        while self.running:
+            stream_time = frame_num / source_fps if stream.is_file() else time.time() - started
+
+            if stream_time < next_sample:
+                # Not due yet: grab only, skipping retrieve() and its color conversion
+                if not cap.grab():
+                    break
+                frame_num += 1
+                continue
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if pace:
+                delay = stream_time - (time.time() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            stream.decoded += 1
+            stream.push(frame_num, frame)
+            self.frame_ready.set()
+
+            next_sample = stream_time + interval
+            frame_num += 1
+
+        cap.release()
+        stream.finished = True
+        self.frame_ready.set()
+
+    def _next_batch(self):
+        """Take at most one frame per stream per pass, starting after the last stream served"""
+        batch = []
+        count = len(self.streams)
+        passes_without_frames = 0
+        index = self.next_stream
+
+        while len(batch) < self.batch_size and passes_without_frames < count:
+            stream = self.streams[index % count]
+            item = stream.pop()
+            if item is not None:
+                batch.append((stream, item[0], item[1]))
+                passes_without_frames = 0
+            else:
+                passes_without_frames += 1
+            index += 1
+
+        self.next_stream = index % count if count else 0
+        return batch
+
+    def _inference_loop(self):
+        model = YOLO(self.model_path)
+        for stream in self.streams:
+            # Per-stream rule state, one shared model and drift monitor; video
+            # files are offline media and stay out of the drift sketches
+            stream.processor = LocalTrafficProcessor(record_clips=False, model=model, camera_id=stream.camera_id,
+                                                     drift_db=None)
+            stream.processor.drift = None if stream.is_file() else self.drift
+            if self.log_root:
+                stream.processor.detection_log = DetectionLog(os.path.join(self.log_root, stream.camera_id))
+        detector = self.streams[0].processor if self.streams else None
+
+        try:
+            while self.running:
+                # Clear before polling: a frame queued or a stream finishing
+                # after the poll sets the event again, so the wait below
+                # returns at once instead of sleeping through it
+                self.frame_ready.clear()
+                batch = self._next_batch()
+                if not batch:
+                    if all(stream.finished for stream in self.streams):
+                        break
+                    self.frame_ready.wait(0.05)
+                    continue
+
+                all_detections = detector.run_detector([frame for _, _, frame in batch])
+
+                for (stream, frame_num, frame), detections in zip(batch, all_detections):
+                    violations = stream.processor.detect_violations_from_detections(frame, detections, frame_num)
+                    for violation in violations:
+                        violation['camera_id'] = stream.camera_id
+                        stream.processor.save_violation(violation, frame)
+
+                    stream.processed += 1
+                    stream.violations += len(violations)
+
+                    if self.on_result:
+                        self.on_result(stream, frame_num, frame, detections, violations)
+        finally:
+            if self.drift:
+                self.drift.flush()
+            for stream in self.streams:
+                if stream.processor.detection_log is not None:
+                    stream.processor.detection_log.close()
+                stream.close()
+            self.running = False
+
+# Usage
+if __name__ == "__main__":
+    sources = sys.argv[1:] or sorted(glob.glob("data/samples/*.mp4"))
+    if not sources:
+        print("No sources given and no sample videos found in data/samples/")
+        sys.exit(1)
+
+    scheduler = StreamScheduler()
+    start_http_server(METRICS_PORT)
+    print(f"Metrics on http://localhost:{METRICS_PORT}/metrics (JSON: /metrics.json)")
+    for source in sources:
+        scheduler.add_stream(source)
+
+    scheduler.start()
+    while scheduler.worker.is_alive():
+        scheduler.join(timeout=2.0)
+        for s in scheduler.stats():
+            print(f"{s['camera_id']}: decoded={s['decoded']} processed={s['processed']} "
+                  f"dropped={s['dropped']} violations={s['violations']}")
@@ -0,0 +1,269 @@
+"""
+In-process runtime metrics: counters, gauges and latency histograms
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PORT = 9108
+
+class Counter:
+    """Monotonic count; inc() is one attribute add"""
+    kind = 'counter'
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def get(self):
+        return self.value
+
+class Gauge:
+    """Current value, either set directly or read from a callback at export time"""
+    kind = 'gauge'
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, function):
+        """Report function() instead of the stored value; costs nothing until exported"""
+        self.function = function
+
+    def get(self):
+        if self.function is not None:
+            try:
+                return self.function()
+            except Exception:
+                return None
+        return self.value
+
+class Histogram:
+    """Latency distribution in fixed buckets; observe() is a bisect and two adds"""
+    kind = 'histogram'
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def get(self):
+        counts = list(self.counts)
+        count = sum(counts)
+        return {
+            'count': count,
+            'sum': self.sum,
+            'mean': self.sum / count if count else 0.0,
+            'p50': self._quantile(counts, count, 0.5),
+            'p95': self._quantile(counts, count, 0.95),
+            'p99': self._quantile(counts, count, 0.99)
+        }
+
+    def _quantile(self, counts, count, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class Registry:
+    """Named metrics with optional labels, exported as Prometheus text or a JSON snapshot
+
+    Look metrics up once (at import or construction) and keep the object;
+    recording then takes no lock and no dict lookup. Updates from
+    concurrent threads are not locked, so a rare increment may be lost.
+    """
+
+    def __init__(self):
+        self.metrics = {}  # name -> (kind, help, {labels tuple: metric})
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def _get(self, cls, name, help, labels, **params):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            kind, _, children = self.metrics.setdefault(name, (cls.kind, help, {}))
+            if kind != cls.kind:
+                raise ValueError(f"Metric {name} is already registered as a {kind}")
+            metric = children.get(key)
+            if metric is None:
+                metric = children[key] = cls(**params)
+            return metric
+
+    def counter(self, name, help='', **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help='', **labels):
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help='', buckets=DEFAULT_BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def unregister(self, name, **labels):
+        """Drop one labelled metric (and its gauge function) once whatever it measures is gone"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            entry = self.metrics.get(name)
+            if entry is None:
+                return
+            entry[2].pop(key, None)
+            if not entry[2]:
+                del self.metrics[name]
+
+    def snapshot(self):
+        """{name: {'type', 'help', 'values': [{'labels', 'value'}]}} plus the capture time"""
+        with self.lock:
+            items = [(name, kind, help, list(children.items())) for name, (kind, help, children) in self.metrics.items()]
+        metrics = {}
+        for name, kind, help, children in items:
+            metrics[name] = {
+                'type': kind,
+                'help': help,
+                'values': [{'labels': dict(key), 'value': metric.get()} for key, metric in children]
+            }
+        return {'timestamp': time.time(), 'uptime': time.time() - self.started, 'pid': os.getpid(), 'metrics': metrics}
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            items = [(name, kind, help, list(children.items())) for name, (kind, help, children) in self.metrics.items()]
+        for name, kind, help, children in items:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in children:
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(metric.bounds + ('+Inf',), list(metric.counts)):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {metric.sum}")
+                    lines.append(f"{name}_count{_labels(key)} {cumulative}")
+                else:
+                    value = metric.get()
+                    if value is not None:
+                        lines.append(f"{name}{_labels(key)} {value}")
+        return '\n'.join(lines) + '\n'
+
+def _labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{label}="{str(value)}"' for label, value in key) + '}'
+
+def process_rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        # Peak rather than current RSS where /proc is missing; KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+REGISTRY = Registry()
+REGISTRY.gauge('process_resident_memory_bytes', 'Resident memory of this process').set_function(process_rss_bytes)
+REGISTRY.gauge('process_uptime_seconds', 'Seconds since telemetry started').set_function(
+    lambda: time.time() - REGISTRY.started)
+
+def counter(name, help='', **labels):
+    return REGISTRY.counter(name, help, **labels)
+
+def gauge(name, help='', **labels):
+    return REGISTRY.gauge(name, help, **labels)
+
+def histogram(name, help='', buckets=DEFAULT_BUCKETS, **labels):
+    return REGISTRY.histogram(name, help, buckets, **labels)
+
+def unregister(name, **labels):
+    REGISTRY.unregister(name, **labels)
+
+def stage_timer(stage):
+    """Latency histogram of one pipeline stage (inference, rules, ocr, evidence_write, db_insert, ...)"""
+    return REGISTRY.histogram('traffic_stage_seconds', 'Latency of pipeline stages', stage=stage)
+
+# Shared pipeline metrics
+FRAMES = counter('traffic_frames_total', 'Frames run through the violation rules')
+VIOLATIONS = counter('traffic_violations_total', 'Violations stored')
+
+def start_http_server(port=METRICS_PORT, host='', registry=REGISTRY):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(registry.snapshot()).encode()
+                content_type = 'application/json'
+            elif self.path.startswith('/metrics'):
+                body = registry.prometheus_text().encode()
+                content_type = 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def fetch_snapshot(url, timeout=2.0):
+    """JSON snapshot from another process's /metrics.json endpoint"""
+    from urllib.request import urlopen
+    with urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
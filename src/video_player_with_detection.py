@@ -3,7 +3,8 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import tempfile
-import time
+from frame_source import FrameSource
+from video_worker import VideoWorker, poll_worker
 
 class RealTimeVideoProcessor:
     def __init__(self):
@@ -82,8 +83,8 @@ def main():
         with col3:
             stop_button = st.button("⏹️ Stop")
         
-        # Speed control
-        speed = st.sidebar.slider("Playback Speed", 0.1, 2.0, 1.0, 0.1)
+        # Preview refresh rate; analysis itself runs as fast as the model allows
+        refresh_hz = st.sidebar.slider("UI Refresh (Hz)", 2, 5, 4)
         
         # Detection settings
         st.sidebar.subheader("Detection Settings")
@@ -102,71 +103,77 @@ def main():
             st.session_state.playing = False
             st.session_state.paused = False
         
+        # The worker outlives page reruns, so follow the buttons here
+        worker = st.session_state.get('player_worker')
+        if worker is not None:
+            if not st.session_state.get('playing', False) or st.session_state.get('player_video') != uploaded_file.name:
+                worker.stop()
+                worker = st.session_state.player_worker = None
+            elif st.session_state.get('paused', False):
+                worker.pause()
+            else:
+                worker.resume()
+        
         # Main video display area
         video_placeholder = st.empty()
         stats_placeholder = st.empty()
         violations_placeholder = st.empty()
         
         if st.session_state.get('playing', False) and not st.session_state.get('paused', False):
-            processor = RealTimeVideoProcessor()
-            cap = cv2.VideoCapture(video_path)
-            
-            frame_count = 0
-            total_violations = 0
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            
-            while cap.isOpened() and st.session_state.get('playing', False):
-                if st.session_state.get('paused', False):
-                    time.sleep(0.1)
-                    continue
-                    
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            if worker is None:
+                processor = RealTimeVideoProcessor()
+                source = FrameSource(video_path)
+                total_frames = source.total_frames or 1
+                total_violations = 0
                 
-                # Process frame
-                annotated_frame, violations = processor.process_frame_with_overlay(frame)
+                def analyze_frame(frame_count, video_time, frame):
+                    nonlocal total_violations
+                    annotated_frame, violations = processor.process_frame_with_overlay(frame)
+                    total_violations += len(violations)
+                    return annotated_frame, {
+                        'frame': frame_count,
+                        'total_violations': total_violations,
+                        'violations': violations,
+                        'progress': min(1.0, frame_count / total_frames)
+                    }
                 
-                # Update violation count
-                total_violations += len(violations)
-                
-                # Display frame
-                video_placeholder.image(annotated_frame, channels="BGR", use_column_width=True)
+                worker = VideoWorker(source, analyze_frame).start()
+                st.session_state.player_worker = worker
+                st.session_state.player_video = uploaded_file.name
+            
+            def render(snapshot):
+                stats = snapshot['stats']
+                if snapshot['jpeg']:
+                    video_placeholder.image(snapshot['jpeg'], use_column_width=True)
+                if not stats:
+                    return
                 
                 # Display stats
                 with stats_placeholder.container():
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
-                        st.metric("Frame", frame_count)
+                        st.metric("Frame", stats['frame'])
                     with col2:
-                        st.metric("Total Violations", total_violations)
+                        st.metric("Total Violations", stats['total_violations'])
                     with col3:
-                        st.metric("Current Violations", len(violations))
+                        st.metric("Current Violations", len(stats['violations']))
                     with col4:
-                        progress = frame_count / cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                        st.metric("Progress", f"{progress:.1%}")
+                        st.metric("Progress", f"{stats['progress']:.1%}")
                 
                 # Display current violations
-                if violations:
+                if stats['violations']:
                     with violations_placeholder.container():
                         st.error("🚨 LIVE VIOLATIONS DETECTED!")
-                        for i, violation in enumerate(violations):
+                        for i, violation in enumerate(stats['violations']):
                             st.write(f"**Violation {i+1}:** {violation['type']}")
                             st.write(f"**Confidence:** {violation['confidence']:.2f}")
-                            st.write(f"**Location:** Frame {frame_count}")
-                
-                # Control playback speed
-                time.sleep((1.0 / fps) / speed)
-                frame_count += 1
-                
-                # Check for stop/pause
-                if st.session_state.get('paused', False) or not st.session_state.get('playing', False):
-                    break
+                            st.write(f"**Location:** Frame {stats['frame']}")
             
-            cap.release()
+            snapshot = poll_worker(worker, render, refresh_hz=refresh_hz)
+            st.session_state.player_worker = None
             
-            if frame_count > 0:
-                st.success(f"✅ Video processing complete! Found {total_violations} total violations.")
+            if snapshot['processed'] > 0:
+                st.success(f"✅ Video processing complete! Found {snapshot['stats']['total_violations']} total violations.")
     
     else:
         st.info("👆 Upload a traffic video to start real-time violation detection")
@@ -0,0 +1,132 @@
+"""
+Background analysis thread and fixed-rate UI polling for the Streamlit video pages
+"""
+
+import cv2
+import threading
+import time
+from telemetry import FRAMES, stage_timer
+
+ANALYZE_TIMER = stage_timer('frame_analysis')
+
+class VideoWorker:
+    """Analyze frames on a background thread and publish only the latest result
+
+    Each item from `frames` is passed to `analyze` as positional arguments;
+    `analyze` returns (annotated_frame, stats). The worker never touches
+    Streamlit, so inference runs at model speed while the page reads
+    snapshot() at its own refresh rate. The preview JPEG is downscaled and
+    encoded only when a snapshot asks for a frame it has not encoded yet.
+    """
+
+    def __init__(self, frames, analyze, preview_width=640, jpeg_quality=70):
+        self.frames = frames
+        self.analyze = analyze
+        self.preview_width = preview_width
+        self.jpeg_quality = jpeg_quality
+
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.paused = False
+        self.error = None
+
+        self.latest = None
+        self.stats = {}
+        self.processed = 0
+        self.version = 0
+        self.started_at = None
+
+        self._encoded_version = -1
+        self._jpeg = None
+
+    def start(self):
+        self.running = True
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for item in self.frames:
+                while self.paused and self.running:
+                    time.sleep(0.05)
+                if not self.running:
+                    break
+                start = time.perf_counter()
+                annotated, stats = self.analyze(*item)
+                ANALYZE_TIMER.observe(time.perf_counter() - start)
+                FRAMES.inc()
+                with self.lock:
+                    self.latest = annotated
+                    self.stats = stats
+                    self.processed += 1
+                    self.version += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            # Lets generator sources run their cleanup when stopped early
+            close = getattr(self.frames, 'close', None)
+            if close:
+                close()
+            self.running = False
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def snapshot(self):
+        """Latest preview JPEG and counters, safe to call from the UI thread"""
+        with self.lock:
+            latest, version = self.latest, self.version
+            stats, processed = self.stats, self.processed
+
+        if latest is not None and version != self._encoded_version:
+            height, width = latest.shape[:2]
+            if width > self.preview_width:
+                latest = cv2.resize(latest, (self.preview_width, int(height * self.preview_width / width)),
+                                    interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode('.jpg', latest, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                self._jpeg = buffer.tobytes()
+                self._encoded_version = version
+
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            'jpeg': self._jpeg,
+            'processed': processed,
+            'fps': processed / elapsed if elapsed > 0 else 0.0,
+            'stats': stats,
+            'running': self.is_alive(),
+            'error': self.error
+        }
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def stop(self, timeout=5.0):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+def poll_worker(worker, render, refresh_hz=4, should_stop=None):
+    """Call render(snapshot) at a fixed rate until the worker finishes
+
+    Returns the final snapshot, which is always rendered once more so the
+    page ends on the last analyzed frame.
+    """
+    interval = 1.0 / refresh_hz
+    while worker.is_alive():
+        if should_stop and should_stop():
+            worker.stop()
+            break
+        started = time.time()
+        render(worker.snapshot())
+        time.sleep(max(0.0, interval - (time.time() - started)))
+
+    snapshot = worker.snapshot()
+    render(snapshot)
+    return snapshot
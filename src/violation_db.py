@@ -0,0 +1,113 @@
+"""
+Shared SQLite helpers for the violations table
+"""
+
+import sqlite3
+import time
+from plate_index import ensure_plates_table, add_plate, plate_key
+from offender_stats import ensure_offender_table, record_violation_offences, rebuild_offender_stats, remove_offence
+from telemetry import VIOLATIONS, stage_timer
+
+DB_PATH = 'current_session.db'
+
+INSERT_TIMER = stage_timer('db_insert')
+BATCH_INSERT_TIMER = stage_timer('db_insert_batch')  # one sample per insert_violations call
+
+# Columns added after the original schema; older session and archive
+# databases get them through ALTER TABLE on first use.
+EXTRA_COLUMNS = {
+    'clip_path': 'TEXT',
+    'plate_number': 'TEXT',
+}
+
+def ensure_violations_table(conn):
+    """Create the violations table and add any columns missing from older databases"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS violations (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            violation_type TEXT,
+            image_path TEXT,
+            vehicle_id TEXT,
+            location TEXT,
+            gps_coords TEXT,
+            camera_id TEXT,
+            clip_path TEXT,
+            plate_number TEXT
+        )
+    ''')
+
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(violations)")}
+    for column, column_type in EXTRA_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE violations ADD COLUMN {column} {column_type}")
+
+    ensure_plates_table(conn)
+    if ensure_offender_table(conn):
+        # One-off count of violations stored before the counters existed
+        rebuild_offender_stats(conn)
+    # Also ends the legacy-row cleanup's transaction, which would lock out other connections
+    conn.commit()
+
+def insert_violation(conn, timestamp, violation_type, image_path, vehicle_id, location,
+                     gps_coords, camera_id, clip_path=None, plate_number=None):
+    """Insert one violation row and update its offender counters without committing; returns the row id"""
+    start = time.perf_counter()
+    cursor = conn.execute(
+        "INSERT INTO violations (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id, clip_path, plate_number) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id, clip_path, plate_number)
+    )
+    if plate_number:
+        add_plate(conn, cursor.lastrowid, plate_number)
+    record_violation_offences(conn, violation_type, timestamp, plate_number)
+    INSERT_TIMER.observe(time.perf_counter() - start)
+    VIOLATIONS.inc()
+    return cursor.lastrowid
+
+def insert_violations(conn, rows):
+    """Insert many violation rows in one statement without committing
+
+    Each row is a tuple in insert_violation argument order; clip_path and
+    plate_number may be omitted. Plates given here are not added to the plate
+    search index until plate_index.index_violation_plates runs.
+    """
+    start = time.perf_counter()
+    rows = [tuple(row) + (None,) * (9 - len(row)) for row in rows]
+    conn.executemany(
+        "INSERT INTO violations (timestamp, violation_type, image_path, vehicle_id, location, gps_coords, camera_id, clip_path, plate_number) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    for timestamp, violation_type, _, _, _, _, _, _, plate_number in rows:
+        record_violation_offences(conn, violation_type, timestamp, plate_number)
+    BATCH_INSERT_TIMER.observe(time.perf_counter() - start)
+    VIOLATIONS.inc(len(rows))
+
+def update_plate_number(conn, violation_id, plate_number, confidence=None):
+    """Fill in the plate of an already stored violation, index it and count it against the plate, without committing
+
+    Reading the same plate again changes nothing; a corrected plate moves
+    the violation's index entry and offender count off the old one.
+    """
+    row = conn.execute("SELECT violation_type, timestamp, plate_number FROM violations WHERE id = ?",
+                       (violation_id,)).fetchone()
+    if row is None:
+        return
+    violation_type, timestamp, previous = row
+    previous_key = plate_key(previous)
+    if previous_key and previous_key == plate_key(plate_number):
+        return
+
+    conn.execute("UPDATE violations SET plate_number = ? WHERE id = ?", (plate_number, violation_id))
+    if previous_key:
+        conn.execute("DELETE FROM plates WHERE violation_id = ?", (violation_id,))
+        remove_offence(conn, 'plate', previous_key, violation_type)
+    add_plate(conn, violation_id, plate_number, confidence)
+    record_violation_offences(conn, violation_type, timestamp, plate_number)
+
+def connect(db_path=DB_PATH):
+    """Open the session database with the current schema in place"""
+    conn = sqlite3.connect(db_path)
+    ensure_violations_table(conn)
+    return conn
@@ -77,6 +77,9 @@ def display_violation_card(violation, show_details=True):
                         st.info("📷 Snapshot not available")
                 else:
                     st.info("📷 No snapshot available")
+                
+                if violation.get('clip_path') and os.path.exists(violation['clip_path']):
+                    st.video(violation['clip_path'])
             
             with col2:
                 st.markdown("**🚨 Severity Information**")
@@ -269,6 +272,9 @@ def display_violation_details_page(violations_df):
                         st.info("📷 Image not available")
                 else:
                     st.info("📷 No snapshot captured")
+                
+                if violation.get('clip_path') and os.path.exists(violation['clip_path']):
+                    st.video(violation['clip_path'])
             
             with col2:
                 priority_colors = {'CRITICAL': 'red', 'HIGH': 'orange', 'MEDIUM': 'yellow', 'LOW': 'green'}
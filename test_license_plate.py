@@ -5,7 +5,9 @@ Test License Plate Recognition
 
 import cv2
 import os
-from src.license_plate_recognition import LicensePlateRecognizer
+import sys
+sys.path.append('src')
+from license_plate_recognition import LicensePlateRecognizer
 
 def test_license_plate_recognition():
     """Test license plate recognition on sample images"""
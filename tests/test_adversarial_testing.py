@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+class RecordingModel:
+    """Stands in for YOLO: keeps every batch it is given and detects nothing"""
+
+    def __init__(self, model_path):
+        self.batches = []
+
+    def __call__(self, batch, verbose=False):
+        self.batches.append([image.copy() for image in batch])
+        return [SimpleNamespace(boxes=None) for _ in batch]
+
+class TestAdversarialTester(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            import cv2
+            import adversarial_testing
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        self.module = adversarial_testing
+        self.tmp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmp.name, 'scene.png')
+        image = np.random.default_rng(7).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        cv2.imwrite(self.image_path, image)
+        self.cache_path = os.path.join(self.tmp.name, 'results_cache.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_tester(self, seed=0, cache_path=None):
+        with mock.patch.object(self.module, 'YOLO', RecordingModel):
+            return self.module.AdversarialTester('weights.pt', seed=seed, cache_path=cache_path)
+
+    def test_seeded_perturbations_are_reproducible(self):
+        """Test that the same seed gives the same perturbed images and another seed does not"""
+        first, second, other = self.make_tester(), self.make_tester(), self.make_tester(seed=1)
+        for tester in (first, second, other):
+            tester.test_adversarial_inputs(self.image_path)
+
+        batch = first.model.batches[0]
+        self.assertEqual(len(batch), 1 + len(self.module.ADVERSARIAL_TESTS))
+        for image, repeat in zip(batch, second.model.batches[0]):
+            np.testing.assert_array_equal(image, repeat)
+        gaussian = 1 + [name for name, _, _ in self.module.ADVERSARIAL_TESTS].index("gaussian_noise_low")
+        self.assertFalse(np.array_equal(batch[gaussian], other.model.batches[0][gaussian]))
+
+    def test_cache_skips_inference_on_rerun(self):
+        """Test that a second run is served from the cache and a changed perturbation reruns only that test"""
+        tester = self.make_tester(cache_path=self.cache_path)
+        results = tester.test_adversarial_inputs(self.image_path)
+        self.assertEqual(len(tester.model.batches), 1)
+
+        rerun = self.make_tester(cache_path=self.cache_path)
+        self.assertEqual(rerun.test_adversarial_inputs(self.image_path), results)
+        self.assertEqual(rerun.model.batches, [])
+
+        tests = [(name, method, {**kwargs, "factor": 0.2}) if name == "dark_bias" else (name, method, kwargs)
+                 for name, method, kwargs in self.module.ADVERSARIAL_TESTS]
+        with mock.patch.object(self.module, 'ADVERSARIAL_TESTS', tests):
+            changed = self.make_tester(cache_path=self.cache_path)
+            changed.test_adversarial_inputs(self.image_path)
+        self.assertEqual([len(batch) for batch in changed.model.batches], [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark import summarize, compare_results
+
+def result(**p50s):
+    return {"stages": {stage: {"p50_ms": ms, "p95_ms": ms * 2, "p99_ms": ms * 3} for stage, ms in p50s.items()}}
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_summarize_percentiles(self):
+        """Test nearest-rank percentiles and throughput from per-item durations"""
+        stats = summarize([i / 1000 for i in range(1, 101)])
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["p50_ms"], 50)
+        self.assertAlmostEqual(stats["p95_ms"], 95)
+        self.assertAlmostEqual(stats["p99_ms"], 99)
+        self.assertAlmostEqual(stats["throughput_per_s"], 100 / 5.05)
+
+    def test_compare_flags_regressions(self):
+        """Test that only stages slower beyond the tolerance and the noise floor are flagged"""
+        baseline = result(inference=100.0, resize=1.0, rule_lane=0.01, ocr=5.0)
+        current = result(inference=120.0, resize=0.5, rule_lane=0.02, decode=2.0)
+        rows = {row["stage"]: row["status"] for row in compare_results(current, baseline, tolerance=0.1)}
+        self.assertEqual(rows, {"inference": "regressed", "resize": "improved", "rule_lane": "ok",
+                                "decode": "new", "ocr": "missing"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+class CountingConnection:
+    """Wraps a sqlite3 connection and counts the transactions committed through `with conn:`"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.commits = 0
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        self.commits += 1
+        return self.conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+class TestBulkImageIngestor(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            import cv2
+            from image_processor import ImageViolationProcessor
+            from violation_db import ensure_violations_table
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class StubProcessor(ImageViolationProcessor):
+            """Reports one car running a red light per image, without a model"""
+
+            def __init__(self):
+                self.conn = CountingConnection(sqlite3.connect(':memory:'))
+                ensure_violations_table(self.conn.conn)
+                self.detected = []
+
+            def run_detector(self, images, imgsz=None):
+                self.detected.append(len(images))
+                return [np.array([[2, 2, 10, 10, 0.9, 2]], dtype=np.float32) for _ in images]
+
+            def detect_violations_from_detections(self, image, detections):
+                return [{'type': 'red_light_violation', 'vehicle_type': 'car', 'bbox': list(detections[0, :4]),
+                         'confidence': float(detections[0, 4]), 'description': 'Car running red light'}]
+
+        self.processor_class = StubProcessor
+        self.paths = []
+        for index in range(5):
+            path = os.path.join(self.tmp.name, f'image_{index}.jpg')
+            cv2.imwrite(path, np.full((24, 32, 3), index * 40, dtype=np.uint8))
+            self.paths.append(path)
+        self.broken = os.path.join(self.tmp.name, 'broken.jpg')
+        with open(self.broken, 'wb') as f:
+            f.write(b'not an image')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_ingestor(self, processor):
+        from bulk_ingest import BulkImageIngestor
+        return BulkImageIngestor(processor, batch_size=2, workers=2,
+                                 manifest_path=os.path.join(self.tmp.name, 'manifest.jsonl'),
+                                 output_dir=os.path.join(self.tmp.name, 'violations'))
+
+    def stored_rows(self, processor):
+        return processor.conn.execute("SELECT COUNT(*) FROM violations").fetchone()[0]
+
+    def test_batches_commit_once_and_unreadable_images_are_recorded(self):
+        """Test that each batch is one transaction and an unreadable image goes in the manifest as an error"""
+        processor = self.processor_class()
+        summary = self.make_ingestor(processor).ingest(self.paths + [self.broken])
+
+        self.assertEqual(summary, {'total': 6, 'skipped': 0, 'processed': 5, 'unreadable': 1, 'violations': 5})
+        self.assertEqual(processor.detected, [2, 2, 1])  # the unreadable image never reaches the model
+        self.assertEqual(processor.conn.commits, 3)
+        self.assertEqual(self.stored_rows(processor), 5)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, 'violations'))), 5)
+
+        with open(os.path.join(self.tmp.name, 'manifest.jsonl')) as f:
+            entries = {entry['path']: entry for entry in map(json.loads, f)}
+        self.assertEqual(entries[self.broken], {'path': self.broken, 'error': 'unreadable'})
+        self.assertEqual(entries[self.paths[0]], {'path': self.paths[0], 'violations': 1})
+
+    def test_rerun_skips_paths_in_manifest(self):
+        """Test that a rerun only processes the images missing from the manifest, torn last line included"""
+        self.make_ingestor(self.processor_class()).ingest(self.paths[:3] + [self.broken])
+        with open(os.path.join(self.tmp.name, 'manifest.jsonl'), 'a') as f:
+            f.write('{"path": "torn')
+
+        processor = self.processor_class()
+        summary = self.make_ingestor(processor).ingest(self.paths + [self.broken])
+        self.assertEqual(summary['skipped'], 4)
+        self.assertEqual(summary['processed'], 2)
+        self.assertEqual(processor.detected, [2])
+        self.assertEqual(self.stored_rows(processor), 2)
+
+        # Entries written after the torn line are read back
+        summary = self.make_ingestor(self.processor_class()).ingest(self.paths + [self.broken])
+        self.assertEqual(summary['skipped'], 6)
+
+    def test_letterboxed_boxes_map_back_to_the_image(self):
+        """Test that run_detector undoes the letterbox scale and padding with (x - pad) / scale"""
+        import torch
+        from ultralytics.engine.results import Boxes
+        from image_processor import ImageViolationProcessor, letterbox
+
+        image = np.zeros((100, 200, 3), dtype=np.uint8)
+        canvas, scale, (pad_x, pad_y) = letterbox(image, 64)
+        self.assertEqual((canvas.shape, scale, pad_x, pad_y), ((64, 64, 3), 0.32, 0, 16))
+        self.assertTrue((canvas[:pad_y] == 114).all() and (canvas[pad_y:pad_y + 32] == 0).all())
+
+        box = np.array([20, 10, 120, 60], dtype=np.float32)  # in the original image
+        canvas_box = box * scale + np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)
+        seen = []
+
+        def model(canvases, **kwargs):
+            seen.extend(canvas.shape for canvas in canvases)
+            rows = torch.tensor([[*canvas_box, 0.8, 2]], dtype=torch.float32)
+            return [SimpleNamespace(boxes=Boxes(rows, (64, 64))) for _ in canvases]
+
+        processor = ImageViolationProcessor.__new__(ImageViolationProcessor)
+        processor.model = model
+        detections = processor.run_detector([image, image], imgsz=64)
+
+        self.assertEqual(seen, [(64, 64, 3), (64, 64, 3)])
+        for image_detections in detections:
+            np.testing.assert_allclose(image_detections[0, :4], box, atol=1e-3)
+            np.testing.assert_allclose(image_detections[0, 4:], [0.8, 2])
+
+if __name__ == '__main__':
+    unittest.main()
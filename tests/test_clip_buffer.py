@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clip_buffer import ClipRingBuffer
+
+FPS = 10
+
+def make_frame(value):
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, :32] = value
+    return frame
+
+class RecordingBuffer(ClipRingBuffer):
+    """Keeps finished clips in memory instead of encoding them"""
+
+    def __init__(self, **kwargs):
+        super().__init__(fps=FPS, **kwargs)
+        self.written = []
+
+    def _write_async(self, clip):
+        self.written.append(clip)
+
+class TestClipRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, 'clips')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_eviction_by_age(self):
+        """Test that frames older than pre_seconds leave the buffer"""
+        buffer = RecordingBuffer(pre_seconds=1.0, output_dir=self.output_dir)
+        for index in range(31):
+            buffer.add_frame(make_frame(index), index / FPS)
+        timestamps = [timestamp for timestamp, _ in buffer.frames]
+        self.assertEqual(timestamps, [index / FPS for index in range(20, 31)])
+        self.assertEqual(buffer.total_bytes, sum(len(data) for _, data in buffer.frames))
+
+    def test_eviction_by_byte_budget(self):
+        """Test that the byte budget caps the buffer before the age limit does"""
+        frame = make_frame(128)
+        frame_bytes = len(cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1])
+        buffer = RecordingBuffer(pre_seconds=10.0, max_bytes=3 * frame_bytes, output_dir=self.output_dir)
+        for index in range(10):
+            buffer.add_frame(frame, index / FPS)
+        self.assertEqual(len(buffer.frames), 3)
+        self.assertEqual(buffer.total_bytes, 3 * frame_bytes)
+
+    def test_pre_and_post_event_frames(self):
+        """Test that a clip holds the buffered pre-event frames plus post_seconds of later ones"""
+        buffer = RecordingBuffer(pre_seconds=1.0, post_seconds=0.5, output_dir=self.output_dir)
+        for index in range(21):
+            buffer.add_frame(make_frame(index), index / FPS)
+        clip_path = buffer.trigger('Red Light', 'car_1', 20 / FPS)
+        self.assertTrue(clip_path.startswith(self.output_dir))
+
+        for index in range(21, 25):
+            buffer.add_frame(make_frame(index), index / FPS)
+        self.assertEqual(buffer.written, [])
+        buffer.add_frame(make_frame(25), 25 / FPS)
+
+        self.assertEqual(len(buffer.written), 1)
+        clip = buffer.written[0]
+        self.assertEqual(clip['path'], clip_path)
+        self.assertEqual(len(clip['frames']), 11 + 5)
+        self.assertEqual(buffer.pending_clips, [])
+
+    def test_flush_writes_pending_clips(self):
+        """Test that clips still collecting post-event frames are written out at end of stream"""
+        buffer = ClipRingBuffer(fps=FPS, pre_seconds=0.5, post_seconds=2.0, output_dir=self.output_dir)
+        for index in range(6):
+            buffer.add_frame(make_frame(index * 40), index / FPS)
+        clip_path = buffer.trigger('Speeding', 'car_2', 5 / FPS)
+        buffer.add_frame(make_frame(250), 6 / FPS)
+        self.assertFalse(os.path.exists(clip_path))
+
+        buffer.flush()
+        self.assertEqual(buffer.pending_clips, [])
+        self.assertEqual(buffer.writers, [])
+        self.assertTrue(os.path.exists(clip_path))
+        capture = cv2.VideoCapture(clip_path)
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        self.assertEqual(frames, 6 + 1)
+
+if __name__ == '__main__':
+    unittest.main()
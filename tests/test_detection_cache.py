@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from detection_cache import DetectionCache, ROW_WIDTH
+
+class TestDetectionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings = {'model': 'abc', 'input_size': [640, 480], 'conf': 0.35}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self, settings=None):
+        return DetectionCache('media', settings or self.settings, root=self.tmp.name)
+
+    def test_detections_replay_after_reopen(self):
+        """Test that cached frames are returned without calling the detector again"""
+        calls = []
+        def run_detector(frames):
+            calls.append(len(frames))
+            return [np.array([[1, 2, 3, 4, 0.9, 2]], dtype=np.float32)]
+
+        cache = self.make_cache()
+        first = cache.detect(0, None, run_detector)
+        cache.put(30, np.zeros((0, ROW_WIDTH)))
+        self.assertEqual(len(calls), 1)
+        cache.close()
+
+        cache = self.make_cache()
+        self.assertEqual(len(cache), 2)
+        np.testing.assert_array_equal(cache.detect(0, None, run_detector), first)
+        self.assertEqual(cache.get(30).shape, (0, ROW_WIDTH))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.hits, 2)
+
+        other = self.make_cache({**self.settings, 'conf': 0.5})
+        self.assertIsNone(other.get(0))
+
+    def test_interrupted_write_is_discarded(self):
+        """Test that rows without a complete frame record are dropped on reopen"""
+        cache = self.make_cache()
+        cache.put(0, np.ones((2, ROW_WIDTH)))
+        with open(cache.rows_path, 'ab') as f:
+            np.ones((3, ROW_WIDTH), dtype=np.float32).tofile(f)
+        with open(cache.frames_path, 'ab') as f:
+            f.write(b'\x01\x02')
+        cache.close()
+
+        cache = self.make_cache()
+        self.assertEqual(list(cache.index), [0])
+        cache.put(1, np.full((1, ROW_WIDTH), 7))
+        cache.close()
+        cache = self.make_cache()
+        np.testing.assert_array_equal(cache.get(1), np.full((1, ROW_WIDTH), 7, dtype=np.float32))
+        np.testing.assert_array_equal(cache.get(0), np.ones((2, ROW_WIDTH), dtype=np.float32))
+
+    def test_one_writer_per_cache(self):
+        """Test that a cache in use cannot be opened again until it is closed"""
+        cache = self.make_cache()
+        cache.put(0, np.ones((1, ROW_WIDTH)))
+        with self.assertRaises(BlockingIOError):
+            self.make_cache()
+        self.make_cache({**self.settings, 'conf': 0.5}).close()
+
+        cache.close()
+        cache = self.make_cache()
+        self.assertEqual(len(cache), 1)
+        cache.close()
+
+    def test_cached_video_does_not_load_model(self):
+        """Test that a video whose sampled frames are all cached is processed without loading the model"""
+        try:
+            import cv2
+            import ultralytics  # noqa: F401 (local_processor imports it)
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        from local_processor import LocalTrafficProcessor, detect_frames_settings
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)  # the processor writes under outputs/
+        try:
+            path = os.path.join(self.tmp.name, 'clip.avi')
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+            for _ in range(40):
+                writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+            writer.release()
+
+            cache = DetectionCache.for_media(path, detect_frames_settings('yolov8n.pt'))
+            for frame_index in (0, 30):
+                cache.put(frame_index, np.zeros((0, ROW_WIDTH)))
+            cache.close()
+
+            processor = LocalTrafficProcessor(record_clips=False, db_path=':memory:')
+            processor.process_video(path)
+            self.assertIsNone(processor._model)
+        finally:
+            os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
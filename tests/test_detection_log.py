@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from detection_log import DetectionLog, replay
+
+FRAME_SHAPE = (480, 640, 3)
+
+def frame_rows(frame_index):
+    count = frame_index % 4
+    rows = np.zeros((count, 6), dtype=np.float32)
+    rows[:, :4] = [10.7 + frame_index, 20.2, 110.9, 220.5]
+    rows[:, 4] = 0.4 + 0.1 * np.arange(count)
+    rows[:, 5] = [2, 0, 9][:count]
+    return rows
+
+def frame_cues(frame_index):
+    return np.array([np.nan, 0.25, 1.0][:frame_index % 4], dtype=np.float32)
+
+class TestDetectionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = os.path.join(self.tmp.name, 'CAM_001')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_frames(self, frames):
+        with DetectionLog(self.log_dir) as log:
+            for frame_index in frames:
+                log.append(frame_index, FRAME_SHAPE, frame_rows(frame_index), frame_cues(frame_index))
+
+    def test_round_trip(self):
+        """Test that frames read back with truncated boxes, close confidences and their cues"""
+        self.write_frames(range(10))
+        log = DetectionLog(self.log_dir, readonly=True)
+        self.assertEqual(len(log), 10)
+
+        frames = list(log.frames(chunk=3))
+        self.assertEqual([frame.index for frame in frames], list(range(10)))
+        for frame in frames:
+            expected = frame_rows(frame.index)
+            self.assertEqual(frame.shape, FRAME_SHAPE)
+            self.assertEqual(frame.detections.shape, expected.shape)
+            np.testing.assert_array_equal(frame.detections[:, :4], np.trunc(expected[:, :4]))
+            np.testing.assert_allclose(frame.detections[:, 4], expected[:, 4], atol=1e-4)
+            np.testing.assert_array_equal(frame.detections[:, 5], expected[:, 5])
+            np.testing.assert_allclose(frame.cues, frame_cues(frame.index), atol=1e-4)
+
+    def test_appends_after_reopen(self):
+        """Test that a reopened log keeps its frames and appends after them"""
+        self.write_frames(range(5))
+        self.write_frames(range(5, 8))
+        self.assertEqual([frame.index for frame in DetectionLog(self.log_dir, readonly=True).frames()], list(range(8)))
+
+    def test_interrupted_append_is_dropped(self):
+        """Test that a frame whose rows did not reach every column is ignored on open"""
+        self.write_frames(range(4))
+        # Index record written for a frame whose cue column never made it
+        with DetectionLog(self.log_dir) as log:
+            log.append(7, FRAME_SHAPE, frame_rows(7), frame_cues(7))
+        with open(os.path.join(self.log_dir, 'cue.bin'), 'r+b') as f:
+            f.truncate(f.seek(0, 2) - 2)
+        with open(os.path.join(self.log_dir, 'frames.bin'), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+
+        log = DetectionLog(self.log_dir)
+        self.assertEqual([frame.index for frame in log.frames()], list(range(4)))
+        log.append(8, FRAME_SHAPE, frame_rows(8), frame_cues(8))
+        log.close()
+        self.assertEqual([frame.index for frame in DetectionLog(self.log_dir, readonly=True).frames()], [0, 1, 2, 3, 8])
+
+    def test_reader_while_writer_appends(self):
+        """Test that a read-only open sees the flushed frames and leaves the writer's files intact"""
+        writer = DetectionLog(self.log_dir)
+        for frame_index in range(6):
+            writer.append(frame_index, FRAME_SHAPE, frame_rows(frame_index), frame_cues(frame_index))
+        writer.flush()
+
+        with self.assertRaises(BlockingIOError):
+            DetectionLog(self.log_dir)
+        reader = DetectionLog(self.log_dir, readonly=True)
+        self.assertEqual([frame.index for frame in reader.frames()], list(range(6)))
+        with self.assertRaises(ValueError):
+            reader.append(9, FRAME_SHAPE, frame_rows(9))
+
+        for frame_index in range(6, 12):
+            writer.append(frame_index, FRAME_SHAPE, frame_rows(frame_index), frame_cues(frame_index))
+        writer.close()
+
+        frames = list(DetectionLog(self.log_dir, readonly=True).frames())
+        self.assertEqual([frame.index for frame in frames], list(range(12)))
+        for frame in frames:
+            np.testing.assert_array_equal(frame.detections[:, 5], frame_rows(frame.index)[:, 5])
+            np.testing.assert_allclose(frame.cues, frame_cues(frame.index), atol=1e-4)
+
+    def test_replay_matches_live_rules(self):
+        """Test that replaying a logged scene finds the violations the live rules found"""
+        try:
+            import ultralytics  # noqa: F401 (local_processor imports it)
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        from local_processor import LocalTrafficProcessor, RULES_TIMER
+        from scene_generator import SceneConfig, SceneGenerator
+        from telemetry import FRAMES
+
+        config = SceneConfig(frames=150, violations=[{'type': 'red_light_violation', 'frame': 60},
+                                                     {'type': 'no_helmet_violation', 'frame': 20}])
+        generator = SceneGenerator(config)
+        log = DetectionLog(self.log_dir)
+        processor = LocalTrafficProcessor(record_clips=False, db_path=':memory:', detection_log=log)
+        live = []
+        for scene_frame in generator.frames():
+            live += processor.detect_violations_from_detections(generator.render(scene_frame), scene_frame.detections,
+                                                                scene_frame.index)
+        log.close()
+
+        frames_counted, rules_timed = FRAMES.get(), RULES_TIMER.get()['count']
+        result = replay(self.log_dir)
+        self.assertEqual(result['frames'], config.frames)
+        # Replayed frames are not live traffic
+        self.assertEqual(FRAMES.get(), frames_counted)
+        self.assertEqual(RULES_TIMER.get()['count'], rules_timed)
+
+        def key(violation):
+            return violation['type'], violation['frame'], tuple(violation['vehicle_position'])
+        self.assertTrue(live)
+        self.assertEqual(sorted(map(key, result['violations'])), sorted(map(key, live)))
+
+if __name__ == '__main__':
+    unittest.main()
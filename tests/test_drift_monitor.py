@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from drift_monitor import DriftMonitor, DriftSketch, camera_drift
+
+FRAME_SHAPE = (480, 640, 3)
+HOUR = 3600
+
+def frame_detections(confidence, class_id=2, size=100):
+    return np.array([[0, 0, size, size, confidence, class_id]] * 3, dtype=np.float32)
+
+class TestDriftMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'drift', 'sketches.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sketch_quantiles_and_merge(self):
+        """Test that confidence quantiles come from the histogram and merging adds counts"""
+        sketch = DriftSketch()
+        for confidence in np.linspace(0.1, 0.9, 9):
+            sketch.update(frame_detections(confidence), FRAME_SHAPE)
+        sketch.update(np.zeros((0, 6)), FRAME_SHAPE)
+        self.assertEqual(sketch.frames, 10)
+        self.assertAlmostEqual(sketch.detection_rate, 2.7)
+        self.assertAlmostEqual(sketch.confidence_quantiles((0.5,))[0], 0.5, delta=0.01)
+
+        other = DriftSketch()
+        other.update(frame_detections(0.5, class_id=90), FRAME_SHAPE)
+        sketch.merge(other)
+        self.assertEqual(sketch.classes[90], 3)
+        self.assertEqual(sketch.classes[2], 27)
+
+    def test_changed_camera_is_flagged(self):
+        """Test that only the camera whose detections changed in recent hours shows drift"""
+        monitor = DriftMonitor(self.db_path, flush_interval=0)
+        now = 1000 * HOUR
+        for hour in range(48, 0, -1):
+            timestamp = now - hour * HOUR
+            for _ in range(5):
+                monitor.update('CAM_001', frame_detections(0.8), FRAME_SHAPE, timestamp)
+                monitor.update('CAM_002', frame_detections(0.8), FRAME_SHAPE, timestamp)
+        for _ in range(5):
+            # A smeared lens: fewer, weaker, smaller detections
+            monitor.update('CAM_001', frame_detections(0.8), FRAME_SHAPE, now)
+            monitor.update('CAM_002', frame_detections(0.4, size=20)[:1], FRAME_SHAPE, now)
+        monitor.flush()
+
+        drift = camera_drift(self.db_path, recent_hours=1, baseline_hours=48, now=now)
+        self.assertEqual(drift['CAM_001']['drift_level'], 'Low')
+        self.assertEqual(drift['CAM_002']['drift_level'], 'High')
+        self.assertEqual(drift['CAM_002']['frames'], 5)
+        self.assertEqual(drift['CAM_002']['baseline_frames'], 240)
+        self.assertEqual(camera_drift(os.path.join(self.tmp.name, 'missing.db')), {})
+
+    def test_processor_rule_pass_feeds_sketches(self):
+        """Test that the processor sketches every rule pass under its camera id, merging across flushes"""
+        try:
+            import ultralytics  # noqa: F401 (local_processor imports it)
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        import sqlite3
+        from local_processor import LocalTrafficProcessor
+        from drift_monitor import load_sketch
+
+        frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        for _ in range(2):
+            processor = LocalTrafficProcessor(record_clips=False, db_path=':memory:', camera_id='CAM_009',
+                                              drift_db=self.db_path)
+            for frame_num in range(3):
+                processor.detect_violations_from_detections(frame, frame_detections(0.6), frame_num)
+            processor.drift.flush()
+
+        conn = sqlite3.connect(self.db_path)
+        sketch = load_sketch(conn, 'CAM_009', 0, 2 ** 40)
+        conn.close()
+        self.assertEqual(sketch.frames, 6)
+        self.assertEqual(sketch.classes[2], 18)
+
+        # Offline media (no camera id) stays out of the sketches
+        offline = LocalTrafficProcessor(record_clips=False, db_path=':memory:', drift_db=self.db_path)
+        self.assertIsNone(offline.drift)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+import cv2
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from evaluation import EvaluationHarness, load_dataset_manifest
+
+class FakeTensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+class FakeBoxes:
+    def __init__(self, rows):
+        self.rows = np.array(rows, dtype=np.float32).reshape(-1, 6)
+        self.xyxy = FakeTensor(self.rows[:, :4])
+        self.conf = FakeTensor(self.rows[:, 4])
+        self.cls = FakeTensor(self.rows[:, 5])
+
+    def __len__(self):
+        return len(self.rows)
+
+class FakeResult:
+    def __init__(self, rows):
+        self.boxes = FakeBoxes(rows)
+
+class FakeModel:
+    """Reports one car per image whose confidence is the image's mean brightness / 255"""
+    names = {0: 'person', 2: 'car'}
+
+    def __init__(self):
+        self.images_seen = 0
+
+    def __call__(self, images, verbose=False, **params):
+        self.images_seen += len(images)
+        return [FakeResult([[0, 0, 10, 10, image.mean() / 255, 2]]) for image in images]
+
+class TestEvaluationHarness(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.image_dir = os.path.join(self.tmp.name, 'images')
+        os.makedirs(self.image_dir)
+        for index, value in enumerate((50, 100, 200)):
+            cv2.imwrite(os.path.join(self.image_dir, f'{index}.png'), np.full((20, 20, 3), value, np.uint8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_harness(self, **params):
+        harness = EvaluationHarness('weights.pt', cache_path=os.path.join(self.tmp.name, 'cache.db'),
+                                    batch_size=2, **params)
+        harness._model = FakeModel()
+        return harness
+
+    def test_reaudit_only_scores_changed_images(self):
+        """Test that a second run reuses cached predictions and rescores only changed files"""
+        entries = load_dataset_manifest(image_dir=self.image_dir)
+        first = self.make_harness().predict(entries)
+        self.assertEqual(len(first), 3)
+        self.assertAlmostEqual(first[entries[2]['path']][0][4], 200 / 255, places=5)
+
+        harness = self.make_harness()
+        self.assertEqual(harness.predict(entries), first)
+        self.assertEqual(harness._model.images_seen, 0)
+        self.assertEqual(harness.class_names[2], 'car')
+
+        cv2.imwrite(entries[0]['path'], np.full((20, 20, 3), 250, np.uint8))
+        os.utime(entries[0]['path'], ns=(1, 1))
+        harness = self.make_harness()
+        again = harness.predict(entries)
+        self.assertEqual(harness._model.images_seen, 1)
+        self.assertAlmostEqual(again[entries[0]['path']][0][4], 250 / 255, places=5)
+
+        harness = self.make_harness(conf=0.5)
+        harness.predict(entries)
+        self.assertEqual(harness._model.images_seen, 3)
+
+    def test_manifest_paths_are_relative_to_manifest(self):
+        """Test that manifest entries resolve against the manifest directory and keep extra keys"""
+        manifest_path = os.path.join(self.tmp.name, 'manifest.jsonl')
+        with open(manifest_path, 'w') as f:
+            f.write(json.dumps({'path': 'images/1.png', 'group': 'night'}) + '\n')
+        entries = load_dataset_manifest(manifest_path)
+        self.assertEqual(entries, [{'path': os.path.join(self.tmp.name, 'images/1.png'), 'group': 'night'}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+BOX = [40, 40, 100, 100, 0.9, 2]  # x1, y1, x2, y2, confidence, class
+PROBE = (70, 70)  # the only pixel the stub detector looks at
+
+def make_results(rows, shape):
+    import torch
+    from ultralytics.engine.results import Boxes
+    return [SimpleNamespace(boxes=Boxes(torch.tensor(rows, dtype=torch.float32).reshape(-1, 6), shape[:2]))]
+
+class ProbeModel:
+    """Stands in for YOLO: finds BOX unless the PROBE pixel was masked out"""
+
+    def __init__(self, model_path):
+        self.batches = []
+
+    def __call__(self, images, verbose=False):
+        self.batches.append(len(images))
+        return [make_results([BOX] if image[PROBE[1], PROBE[0]].any() else [], image.shape)[0]
+                for image in images]
+
+class TestOcclusionExplanation(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            import explainability
+        except ImportError:
+            self.skipTest("explainability dependencies not installed")
+        with mock.patch.object(explainability, 'YOLO', ProbeModel):
+            self.explainer = explainability.ModelExplainer('weights.pt')
+        self.image = np.full((256, 256, 3), 255, dtype=np.uint8)
+        self.results = make_results([BOX], self.image.shape)
+
+    def explain(self, **kwargs):
+        segments, importances = self.explainer.create_lime_explanation(
+            self.image, results=self.results, coarse_size=64, min_size=16, **kwargs)
+        return dict(zip(segments, importances))
+
+    def test_only_the_important_cell_is_refined(self):
+        """Test that refinement follows the one cell whose masking drops the detection, down to min_size"""
+        scores = self.explain(num_samples=100)
+
+        # Four coarse cells touch the grown box; the one holding the probe is
+        # split twice, each parent giving way to its four children
+        coarse = [(0, 0, 64, 64), (64, 0, 128, 64), (0, 64, 64, 128)]
+        middle = [(96, 64, 128, 96), (64, 96, 96, 128), (96, 96, 128, 128)]
+        fine = [(64, 64, 80, 80), (80, 64, 96, 80), (64, 80, 80, 96), (80, 80, 96, 96)]
+        self.assertEqual(sorted(scores), sorted(coarse + middle + fine))
+        self.assertEqual(scores[(64, 64, 80, 80)], 1.0)
+        self.assertEqual(sum(scores.values()), 1.0)
+        self.assertEqual(sum(self.explainer.model.batches), 12)
+
+    def test_num_samples_caps_scored_images(self):
+        """Test that no more than num_samples masked images are scored and unfinished parents keep their score"""
+        scores = self.explain(num_samples=6, batch_size=4)
+        self.assertEqual(sum(self.explainer.model.batches), 6)
+        self.assertTrue(all(size <= 4 for size in self.explainer.model.batches))
+
+        # Only two children of the probe cell were scored, so it stays whole
+        self.assertIn((64, 64, 128, 128), scores)
+        self.assertEqual(len(scores), 6)
+
+    def test_no_detections(self):
+        """Test that an image without detections has nothing to explain"""
+        empty = make_results([], self.image.shape)
+        self.assertEqual(self.explainer.create_lime_explanation(self.image, results=empty), ([], []))
+        self.assertEqual(self.explainer.model.batches, [])
+
+class TestGradCam(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            import explainability
+        except ImportError:
+            self.skipTest("explainability dependencies not installed")
+        self.explainability = explainability
+
+    def test_box_heatmap_tiny_and_edge_boxes(self):
+        """Test that degenerate, tiny and frame-edge boxes give a finite float32 heatmap peaking on each box"""
+        with mock.patch.object(self.explainability, 'YOLO', ProbeModel):
+            explainer = self.explainability.ModelExplainer('weights.pt')
+        image = np.zeros((60, 80, 3), dtype=np.uint8)
+        rows = [
+            [20, 20, 20, 20, 0.5, 2],  # zero-size box: sigma would be 0 without the floor
+            [40, 30, 41, 31, 0.9, 2],  # 1 px
+            [10, 45, 12, 47, 0.8, 0],  # 2 px
+            [0, 0, 3, 3, 0.7, 2],      # top-left corner
+            [76, 56, 80, 60, 0.6, 2],  # bottom-right corner
+        ]
+        _, heatmap = explainer.generate_grad_cam(image, results=make_results(rows, image.shape))
+
+        self.assertEqual(heatmap.shape, (60, 80))
+        self.assertEqual(heatmap.dtype, np.float32)
+        self.assertTrue(np.isfinite(heatmap).all())
+        self.assertAlmostEqual(float(heatmap.max()), 1.0, places=5)
+        self.assertGreaterEqual(heatmap.min(), 0.0)
+        for x1, y1, x2, y2, _, _ in rows:
+            x, y = min(int((x1 + x2) / 2), 79), min(int((y1 + y2) / 2), 59)
+            self.assertGreater(heatmap[y, x], 0.4)
+        # Each Gaussian is cut off 3 sigma from its centre
+        self.assertEqual(heatmap[0, 40], 0.0)
+
+        # target_class keeps only that class's boxes
+        _, heatmap = explainer.generate_grad_cam(image, target_class=0, results=make_results(rows, image.shape))
+        self.assertEqual(np.unravel_index(heatmap.argmax(), heatmap.shape), (46, 11))
+        self.assertEqual(heatmap[30, 40], 0.0)
+
+    def test_gradient_cam_shape_and_range(self):
+        """Test that Grad-CAM maps back to the image size in [0, 1], with (N, 6) detections"""
+        # An untrained network built from its config needs no weights download
+        explainer = self.explainability.ModelExplainer('yolov8n.yaml')
+        image = np.random.default_rng(0).integers(0, 256, (120, 200, 3), dtype=np.uint8)
+        heatmap, detections = explainer.gradient_cam(image, conf=0.0, imgsz=320)
+
+        self.assertEqual(heatmap.shape, (120, 200))
+        self.assertEqual(heatmap.dtype, np.float32)
+        self.assertTrue(np.isfinite(heatmap).all())
+        self.assertGreaterEqual(heatmap.min(), 0.0)
+        self.assertAlmostEqual(float(heatmap.max()), 1.0, places=5)
+        self.assertEqual(detections.shape[1], 6)
+        self.assertGreater(len(detections), 0)
+        self.assertTrue(((detections[:, 4] >= 0) & (detections[:, 4] <= 1)).all())
+
+        _, cam = explainer.generate_grad_cam(image, mode='gradient')
+        self.assertEqual(cam.shape, (120, 200))
+
+if __name__ == '__main__':
+    unittest.main()
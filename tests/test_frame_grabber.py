@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from frame_grabber import LatestFrameGrabber
+
+class FakeCapture:
+    """Returns the given frames in order, then end of stream
+
+    With paced=True each read waits for the test to call release().
+    """
+
+    def __init__(self, frames, paced=False):
+        self.frames = list(frames)
+        self.paced = threading.Semaphore(0) if paced else None
+
+    def release(self, count=1):
+        for _ in range(count):
+            self.paced.release()
+
+    def read(self):
+        if self.paced is not None:
+            self.paced.acquire()
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+class TestLatestFrameGrabber(unittest.TestCase):
+
+    def test_newest_frame_wins(self):
+        """Test that frames the consumer did not read are overwritten and counted as dropped"""
+        grabber = LatestFrameGrabber(FakeCapture(range(5)), "CAM_1").start()
+        grabber.thread.join(timeout=2.0)
+
+        ok, frame, captured_at = grabber.read()
+        self.assertTrue(ok)
+        self.assertEqual(frame, 4)
+        self.assertLessEqual(captured_at, time.time())
+        self.assertEqual(grabber.read(timeout=0.1), (False, None, None))
+
+        stats = grabber.stats()
+        self.assertEqual((stats['captured'], stats['processed'], stats['dropped']), (5, 1, 4))
+        self.assertFalse(grabber.running)
+
+    def test_consumer_that_keeps_up_drops_nothing(self):
+        """Test that read() waits for each new frame and returns every one in order"""
+        cap = FakeCapture(range(3), paced=True)
+        grabber = LatestFrameGrabber(cap).start()
+        for expected in range(3):
+            cap.release()
+            ok, frame, _ = grabber.read(timeout=2.0)
+            self.assertTrue(ok)
+            self.assertEqual(frame, expected)
+
+        cap.release()  # end of stream
+        self.assertEqual(grabber.read(timeout=2.0), (False, None, None))
+        grabber.stop()
+        self.assertFalse(grabber.thread.is_alive())
+        self.assertEqual(grabber.stats()['dropped'], 0)
+        self.assertEqual(grabber.stats()['processed'], 3)
+
+    def test_read_times_out_without_a_new_frame(self):
+        """Test that read() gives up after its timeout when no frame arrives"""
+        cap = FakeCapture(range(1), paced=True)
+        grabber = LatestFrameGrabber(cap).start()
+        began = time.perf_counter()
+        self.assertEqual(grabber.read(timeout=0.05), (False, None, None))
+        self.assertGreaterEqual(time.perf_counter() - began, 0.04)
+        cap.release(2)
+        grabber.stop()
+
+    def test_decision_latency_stats(self):
+        """Test that recorded decision latencies feed the last value and percentiles"""
+        grabber = LatestFrameGrabber(FakeCapture([]))
+        now = time.time()
+        for seconds in (0.01, 0.02, 0.03, 0.04):
+            grabber.record_decision(now - seconds)
+        stats = grabber.stats()
+        self.assertAlmostEqual(stats['latency_ms_last'], 40, delta=5)
+        self.assertAlmostEqual(stats['latency_ms_p50'], 30, delta=5)
+        self.assertAlmostEqual(stats['latency_ms_p95'], 40, delta=5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+import itertools
+from unittest import mock
+import cv2
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from frame_source import FrameSource
+
+FRAMES = 60
+FPS = 10
+
+def frame_number(frame):
+    """Read back the index painted into a frame's left half"""
+    return int(round(frame[:, :32].mean() / 4))
+
+class TestFrameSource(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'clip.avi')
+        writer = cv2.VideoWriter(cls.path, cv2.VideoWriter_fourcc(*'MJPG'), FPS, (64, 48))
+        for index in range(FRAMES):
+            frame = np.zeros((48, 64, 3), dtype=np.uint8)
+            frame[:, :32] = index * 4
+            writer.write(frame)
+        writer.release()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_stride_yields_the_sampled_frames(self):
+        """Test that stepping over grabbed frames yields the right frame contents and times"""
+        source = FrameSource(self.path, stride=7, start_frame=3, end_frame=40)
+        yielded = list(source)
+        self.assertEqual([frame_num for frame_num, _, _ in yielded], list(range(3, 40, 7)))
+        for frame_num, video_time, frame in yielded:
+            self.assertEqual(frame_number(frame), frame_num)
+            self.assertAlmostEqual(video_time, frame_num / FPS)
+
+    def test_long_gaps_are_seeked(self):
+        """Test that gaps over seek_threshold jump straight to the frame"""
+        source = FrameSource(self.path, stride=25, seek_threshold=10)
+        self.assertEqual([(frame_num, frame_number(frame)) for frame_num, _, frame in source],
+                         [(0, 0), (25, 25), (50, 50)])
+
+    def test_interval_sampling(self):
+        """Test that interval sampling picks frames by video time"""
+        source = FrameSource(self.path, interval=1.5)
+        self.assertEqual(list(itertools.islice(source.sample_frames(), 5)), [0, 15, 30, 45, 60])
+        self.assertEqual([frame_number(frame) for _, _, frame in source], [0, 15, 30, 45])
+
+    def test_reads_to_the_end_when_frame_count_is_wrong(self):
+        """Test that without an end_frame the whole video is read, whatever the container reports"""
+        open_capture = cv2.VideoCapture
+
+        for reported in (0, 20):
+            class MisreportingCapture:
+                def __init__(self, path):
+                    self.cap = open_capture(path)
+
+                def get(self, prop):
+                    return reported if prop == cv2.CAP_PROP_FRAME_COUNT else self.cap.get(prop)
+
+                def __getattr__(self, name):
+                    return getattr(self.cap, name)
+
+            with mock.patch.object(cv2, 'VideoCapture', MisreportingCapture):
+                source = FrameSource(self.path, stride=10)
+                self.assertEqual(source.total_frames, reported)
+                self.assertEqual([frame_num for frame_num, _, _ in source], list(range(0, FRAMES, 10)))
+        source = FrameSource(self.path, stride=10, end_frame=35)
+        self.assertEqual([frame_num for frame_num, _, _ in source], [0, 10, 20, 30])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import types
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ocr_engines import TesseractReader
+
+class FakeAPI:
+    def __init__(self, lang='eng', psm=8):
+        if lang != 'eng':
+            raise RuntimeError(f"Failed to init API, possibly an invalid tessdata path: {lang}")
+        self.ended = False
+
+    def SetVariable(self, name, value):
+        return True
+
+    def End(self):
+        self.ended = True
+
+def fake_tesserocr():
+    return mock.patch.dict(sys.modules, {'tesserocr': types.SimpleNamespace(PyTessBaseAPI=FakeAPI)})
+
+class TestTesseractReader(unittest.TestCase):
+
+    def test_broken_tesserocr_falls_back_to_cli(self):
+        """Test that a tesserocr API that fails to start leaves the CLI path usable"""
+        with fake_tesserocr():
+            reader = TesseractReader(lang='xyz')
+        self.assertIsNone(reader.api)
+        self.assertTrue(reader.command)
+        self.assertIsInstance(reader.available, bool)
+
+    def test_available_after_close(self):
+        """Test that a closed in-process reader still reports availability through the CLI"""
+        with fake_tesserocr():
+            reader = TesseractReader()
+        api = reader.api
+        self.assertIsNotNone(api)
+        self.assertTrue(reader.available)
+        reader.close()
+        self.assertTrue(api.ended)
+        self.assertIsNone(reader.api)
+        self.assertIsInstance(reader.available, bool)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from offender_stats import top_offenders, rebuild_offender_stats
+from violation_db import connect, insert_violation, insert_violations, update_plate_number
+
+class TestOffenderStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'session.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_counters_follow_inserts(self):
+        """Test that plate counters aggregate categories, first/last seen and worst severity"""
+        conn = connect(self.db_path)
+        with conn:
+            insert_violation(conn, '2024-01-01 08:00:00', 'Speeding Violation', '', 'car_1', 'A', '', 'cam',
+                             plate_number='MH12AB1234')
+            insert_violation(conn, '2024-01-02 09:00:00', 'Red Light Violation', '', 'car_2', 'A', '', 'cam',
+                             plate_number='MH12A81234')
+            late_id = insert_violation(conn, '2024-01-03 10:00:00', 'No Helmet Violation', '', 'bike_1', 'A', '', 'cam')
+            update_plate_number(conn, late_id, 'MH 12 AB 1234')
+            insert_violations(conn, [('2024-01-04 11:00:00', 'Speeding Violation', '', 'car_9', 'A', '', 'cam', None, 'KA01XY0001')])
+
+        top = top_offenders(conn, 'plate')
+        conn.close()
+
+        self.assertEqual(len(top), 1)
+        offender = top[0]
+        self.assertEqual(offender['total'], 3)
+        self.assertEqual(offender['counts'], {'CRITICAL': 1, 'HIGH': 1, 'MEDIUM': 1, 'LOW': 0})
+        self.assertEqual(offender['worst_category'], 'CRITICAL')
+        self.assertEqual((offender['first_seen'], offender['last_seen']), ('2024-01-01 08:00:00', '2024-01-03 10:00:00'))
+
+    def test_existing_database_is_counted_on_first_connect(self):
+        """Test that violations stored before the counters existed are counted once"""
+        legacy = sqlite3.connect(self.db_path)
+        legacy.execute("CREATE TABLE violations (id INTEGER PRIMARY KEY, timestamp TEXT, violation_type TEXT, "
+                       "image_path TEXT, vehicle_id TEXT, location TEXT, gps_coords TEXT, camera_id TEXT, "
+                       "plate_number TEXT)")
+        legacy.executemany("INSERT INTO violations (timestamp, violation_type, vehicle_id, plate_number) VALUES (?, ?, ?, ?)",
+                           [('2024-01-01 00:00:00', 'Speeding Violation', 'car_30', 'MH12AB1234'),
+                            ('2024-01-01 00:01:00', 'Wrong Way Violation', 'car_30', 'MH12AB1234'),
+                            ('2024-01-01 00:02:00', 'Speeding Violation', 'car_30', 'KA01XY0001')])
+        legacy.commit()
+        legacy.close()
+
+        for _ in range(2):
+            conn = connect(self.db_path)
+            top = top_offenders(conn, 'plate', min_total=1)
+            conn.close()
+            self.assertEqual([(o['label'], o['total']) for o in top], [('MH12AB1234', 2), ('KA01XY0001', 1)])
+
+        conn = connect(self.db_path)
+        with conn:
+            self.assertEqual(rebuild_offender_stats(conn), 3)
+        self.assertEqual(top_offenders(conn, 'plate')[0]['total'], 2)
+        self.assertEqual(top_offenders(conn, 'track', min_total=1), [])
+        conn.close()
+
+    def test_plate_reread_and_correction(self):
+        """Test that re-reading a plate does not count twice and a corrected plate moves the count"""
+        conn = connect(self.db_path)
+        with conn:
+            first = insert_violation(conn, '2024-01-01 08:00:00', 'Speeding Violation', '', 'car_30', 'A', '', 'cam')
+            second = insert_violation(conn, '2024-01-01 09:00:00', 'Speeding Violation', '', 'car_30', 'A', '', 'cam',
+                                      plate_number='MH12AB1234')
+            update_plate_number(conn, first, 'MH12AB1234')
+            update_plate_number(conn, first, 'MH 12 AB 1234')
+            update_plate_number(conn, second, 'MH12AB1234')
+        self.assertEqual([(o['label'], o['total']) for o in top_offenders(conn, min_total=1)], [('MH12AB1234', 2)])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM plates").fetchone()[0], 2)
+
+        with conn:
+            update_plate_number(conn, first, 'KA01XY0001')
+        self.assertEqual(sorted((o['label'], o['total']) for o in top_offenders(conn, min_total=1)),
+                         [('KA01XY0001', 1), ('MH12AB1234', 1)])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM plates WHERE violation_id = ?", (first,)).fetchone()[0], 1)
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from plate_cache import PlateTrackCache, vote_plate
+from simple_tracker import SimpleTracker
+
+class TestPlateCache(unittest.TestCase):
+
+    def test_vote_fixes_single_character_misreads(self):
+        """Test that per-character voting recovers the plate from noisy reads"""
+        readings = [('ABC1234', 0.9), ('A8C1234', 0.6), ('ABC1Z34', 0.7), ('AB1234', 0.4)]
+        plate, agreement = vote_plate(readings)
+        self.assertEqual(plate, 'ABC1234')
+        self.assertGreater(agreement, 0.7)
+
+    def test_reads_again_only_on_better_crop(self):
+        """Test that OCR is repeated only for clearly sharper or larger crops"""
+        cache = PlateTrackCache(sharpness_gain=1.25, area_gain=1.2, max_reads=3)
+        self.assertTrue(cache.should_read(7, 100.0, 1000))
+        cache.add_reading(7, 'ABC1234', 0.8, 100.0, 1000)
+
+        self.assertFalse(cache.should_read(7, 110.0, 1100))
+        self.assertTrue(cache.should_read(7, 130.0, 1000))
+        self.assertTrue(cache.should_read(7, 100.0, 1300))
+
+        cache.add_reading(7, 'ABC1234', 0.9, 130.0, 1000)
+        cache.add_reading(7, 'ABC1Z34', 0.5, 200.0, 1000)
+        self.assertFalse(cache.should_read(7, 1000.0, 5000))
+        self.assertEqual(cache.best(7)['plate_number'], 'ABC1234')
+
+    def test_tracker_keeps_ids_for_moving_vehicle(self):
+        """Test that a vehicle keeps its track id while it moves a little each frame"""
+        tracker = SimpleTracker(iou_threshold=0.3, max_missed=1)
+        first = tracker.update([[100, 100, 200, 180], [400, 100, 500, 180]])
+        second = tracker.update([[405, 104, 505, 184], [110, 102, 210, 182]])
+        self.assertEqual(sorted(first), sorted(second))
+
+        tracker.update([])
+        tracker.update([])
+        self.assertEqual(sorted(tracker.removed), sorted(first))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from plate_index import plate_key, search_plates, search_archives, index_violation_plates
+from violation_db import connect, insert_violation, update_plate_number
+
+class TestPlateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_session(self, name, plates):
+        conn = connect(os.path.join(self.tmp.name, name))
+        with conn:
+            for index, plate in enumerate(plates):
+                insert_violation(conn, f'2024-01-01 00:00:{index:02d}', 'Speeding Violation', '',
+                                 f'car_{index}', 'Test', '0.0,0.0', 'cam', plate_number=plate)
+        return conn
+
+    def test_key_merges_ocr_confusions(self):
+        """Test that look-alike characters and separators normalize to one key"""
+        self.assertEqual(plate_key('MH 12-AB 1234'), plate_key('MHI2A8I234'))
+        self.assertNotEqual(plate_key('MH12AB1234'), plate_key('MH12AB1235'))
+
+    def test_fuzzy_search_ranks_closest_first(self):
+        """Test that exact-key matches come before one-edit matches and far plates are excluded"""
+        conn = self.make_session('current_session.db',
+                                 ['MH12AB1234', 'MH12A81234', 'MH12AB1284', 'MH12AB123', 'KA01XY9999'])
+        matches = search_plates(conn, 'mh12ab1234', max_distance=1)
+        conn.close()
+
+        self.assertEqual([m['plate_number'] for m in matches[:2]], ['MH12A81234', 'MH12AB1234'])
+        self.assertEqual({m['distance'] for m in matches[:2]}, {0})
+        self.assertEqual({m['plate_number'] for m in matches[2:]}, {'MH12AB1284', 'MH12AB123'})
+        self.assertNotIn('KA01XY9999', [m['plate_number'] for m in matches])
+
+    def test_search_across_archives(self):
+        """Test that plates filled in later and legacy archives are all searchable"""
+        conn = self.make_session('current_session.db', [None])
+        with conn:
+            update_plate_number(conn, 1, 'DL3CAF0001', 0.8)
+        conn.close()
+
+        # An archive written before the plate index existed
+        legacy_path = os.path.join(self.tmp.name, 'archive_violations_20240101_000000.db')
+        legacy = sqlite3.connect(legacy_path)
+        legacy.execute("CREATE TABLE violations (id INTEGER PRIMARY KEY, timestamp TEXT, violation_type TEXT, "
+                       "image_path TEXT, vehicle_id TEXT, location TEXT, gps_coords TEXT, camera_id TEXT, plate_number TEXT)")
+        legacy.execute("INSERT INTO violations (timestamp, violation_type, plate_number) "
+                       "VALUES ('2023-06-01 10:00:00', 'Red Light Violation', 'DL3CAFOOO1')")
+        legacy.commit()
+        legacy.close()
+
+        conn = connect(legacy_path)
+        with conn:
+            self.assertEqual(index_violation_plates(conn), 1)
+            self.assertEqual(index_violation_plates(conn), 0)
+        conn.close()
+
+        paths = [os.path.join(self.tmp.name, name) for name in ('current_session.db', 'archive_violations_20240101_000000.db')]
+        matches = search_archives('DL3CAF0001', db_paths=paths)
+        self.assertEqual([m['database'] for m in matches], ['current_session.db', 'archive_violations_20240101_000000.db'])
+        self.assertEqual(matches[1]['violation_type'], 'Red Light Violation')
+
+if __name__ == '__main__':
+    unittest.main()
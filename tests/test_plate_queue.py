@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from plate_queue import PlateOCRQueue
+from violation_db import connect, insert_violation
+
+class FakeRecognizer:
+    """Reads the plate text stored in the crop's first pixel value"""
+
+    def __init__(self, plates, gate=None):
+        self.plates = plates
+        self.gate = gate
+        self.batches = []
+
+    def preprocess_plate(self, crop):
+        return crop
+
+    def extract_texts_batch(self, crops):
+        if self.gate:
+            self.gate.wait()
+        self.batches.append(len(crops))
+        return [(self.plates[int(crop[0, 0, 0])], 0.9) for crop in crops]
+
+    def clean_plate_text(self, text):
+        return text.upper()
+
+class TestPlateQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'session.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store_violations(self, count):
+        conn = connect(self.db_path)
+        with conn:
+            ids = [insert_violation(conn, '2024-01-01 00:00:00', 'Speeding Violation', '', f'car_{i}',
+                                    'Test', '0.0,0.0', 'cam') for i in range(count)]
+        conn.close()
+        return ids
+
+    def test_plates_written_back_to_rows(self):
+        """Test that queued violators get their plate filled in after the fact"""
+        ids = self.store_violations(3)
+        recognizer = FakeRecognizer(['abc123', 'xyz789', ''])
+        plates_read = []
+        plate_queue = PlateOCRQueue(recognizer, db_path=self.db_path,
+                                    on_plate=lambda vid, plate, conf: plates_read.append((vid, plate)))
+
+        frame = np.zeros((100, 300, 3), dtype=np.uint8)
+        for index, violation_id in enumerate(ids):
+            frame[:, index * 100:(index + 1) * 100] = index
+            self.assertTrue(plate_queue.submit_vehicle(violation_id, frame, (index * 100, 0, (index + 1) * 100, 100)))
+        plate_queue.close()
+
+        conn = connect(self.db_path)
+        rows = dict(conn.execute("SELECT id, plate_number FROM violations").fetchall())
+        conn.close()
+        self.assertEqual(rows, {ids[0]: 'ABC123', ids[1]: 'XYZ789', ids[2]: None})
+        self.assertEqual(sorted(plates_read), [(ids[0], 'ABC123'), (ids[1], 'XYZ789')])
+        self.assertEqual(plate_queue.stats()['read'], 3)
+
+    def test_submit_never_blocks_when_full(self):
+        """Test that a busy OCR worker makes submit drop crops instead of waiting"""
+        ids = self.store_violations(4)
+        gate = threading.Event()
+        recognizer = FakeRecognizer(['abc123'], gate=gate)
+        plate_queue = PlateOCRQueue(recognizer, db_path=self.db_path, batch_size=1, max_pending=1)
+
+        crop = np.zeros((40, 80, 3), dtype=np.uint8)
+        accepted = [plate_queue.submit(violation_id, crop) for violation_id in ids]
+        gate.set()
+        plate_queue.close()
+
+        self.assertIn(False, accepted)
+        stats = plate_queue.stats()
+        self.assertEqual(stats['submitted'] + stats['dropped'], len(ids))
+        self.assertEqual(stats['read'], stats['submitted'])
+
+    def test_followed_violator_plates_are_voted(self):
+        """Test that later, larger crops of a violator are read and voted into one plate for its rows"""
+        ids = self.store_violations(2)
+        # Pixel value picks the reading; one misread out of three
+        recognizer = FakeRecognizer(['', 'abc123', 'a8c123', 'abc123'])
+        plate_queue = PlateOCRQueue(recognizer, db_path=self.db_path, batch_size=1)
+
+        def frame_with_vehicle(size, value):
+            frame = np.zeros((300, 300, 3), dtype=np.uint8)
+            frame[:size, :size] = value
+            frame[:size, 1:size:2] = 255  # some texture so the crop has sharpness
+            return frame, (0, 0, size, size)
+
+        frame, box = frame_with_vehicle(100, 1)
+        plate_queue.follow(frame, [box])
+        plate_queue.submit_vehicle(ids[0], frame, box)
+        for step, value in enumerate([2, 3]):
+            frame, box = frame_with_vehicle(100 + 30 * (step + 1), value)
+            plate_queue.follow(frame, [box])
+        plate_queue.submit_vehicle(ids[1], frame, box)
+        plate_queue.close()
+
+        self.assertEqual(recognizer.batches, [1, 1, 1])
+        conn = connect(self.db_path)
+        rows = dict(conn.execute("SELECT id, plate_number FROM violations").fetchall())
+        conn.close()
+        self.assertEqual(rows, {ids[0]: 'ABC123', ids[1]: 'ABC123'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scene_generator import CLASS_IDS, SCRIPTED_VIOLATIONS, SceneConfig, SceneGenerator, stress_test
+
+def run_scene(config):
+    generator = SceneGenerator(config)
+    return generator, list(generator.frames())
+
+class TestSceneGenerator(unittest.TestCase):
+
+    def test_detections_layout(self):
+        """Test that every frame reports (N, 6) float32 rows with known class ids and one traffic light"""
+        _, frames = run_scene(SceneConfig(frames=20))
+        known = set(CLASS_IDS.values())
+        for scene_frame in frames:
+            self.assertEqual(scene_frame.detections.dtype, np.float32)
+            self.assertEqual(scene_frame.detections.shape[1], 6)
+            self.assertEqual(len(scene_frame.track_ids), len(scene_frame.detections))
+            self.assertTrue(set(scene_frame.detections[:, 5].astype(int)) <= known)
+            self.assertEqual(int((scene_frame.detections[:, 5] == CLASS_IDS['traffic light']).sum()), 1)
+
+    def test_same_seed_same_scene(self):
+        """Test that a seed reproduces the scene exactly and another seed does not"""
+        _, first = run_scene(SceneConfig(frames=30, seed=3))
+        _, second = run_scene(SceneConfig(frames=30, seed=3))
+        _, other = run_scene(SceneConfig(frames=30, seed=4))
+        self.assertTrue(all(np.array_equal(a.detections, b.detections) for a, b in zip(first, second)))
+        self.assertFalse(all(np.array_equal(a.detections, b.detections) for a, b in zip(first, other)))
+
+    def test_scripted_violations_happen(self):
+        """Test that each scripted violation shows up in the ground truth once"""
+        scripts = [{'type': kind, 'frame': 10 + 20 * i} for i, kind in enumerate(SCRIPTED_VIOLATIONS)]
+        config = SceneConfig(frames=400, violations=scripts, seed=1)
+        _, frames = run_scene(config)
+        events = [event for scene_frame in frames for event in scene_frame.violations]
+        self.assertEqual(sorted(event['type'] for event in events), sorted(SCRIPTED_VIOLATIONS))
+
+        red_light = next(event for event in events if event['type'] == 'red_light_violation')
+        self.assertEqual(config.signal(red_light['frame']), 'red')
+
+    def test_vehicles_keep_their_gap(self):
+        """Test that following vehicles in a lane never overlap"""
+        generator, _ = run_scene(SceneConfig(frames=150, vehicles={'car': 40, 'truck': 5}))
+        s = generator.state
+        for lane in range(generator.config.lanes):
+            members = np.flatnonzero(s['follows'] & (s['lane'] == lane))
+            members = members[np.argsort(-s['y'][members])]
+            bottoms = s['y'][members] + s['h'][members]
+            self.assertTrue(np.all(bottoms[1:] <= s['y'][members][:-1] + 1e-6))
+
+    def test_unknown_script_rejected(self):
+        """Test that an unknown scripted violation type raises"""
+        with self.assertRaises(ValueError):
+            SceneGenerator(SceneConfig(violations=[{'type': 'jaywalking', 'frame': 0}]))
+
+    def test_dense_scene(self):
+        """Test that a large config yields hundreds of objects per frame"""
+        config = SceneConfig(frames=5, lanes=8, vehicles={'car': 150, 'motorcycle': 60, 'bus': 5, 'truck': 15},
+                             pedestrians=40)
+        _, frames = run_scene(config)
+        self.assertGreater(np.mean([len(scene_frame.detections) for scene_frame in frames]), 100)
+
+    def test_render_shape(self):
+        """Test that rendering produces a BGR frame of the configured size"""
+        generator = SceneGenerator(SceneConfig(width=320, height=240, frames=1))
+        image = generator.render(generator.step())
+        self.assertEqual(image.shape, (240, 320, 3))
+        self.assertEqual(image.dtype, np.uint8)
+
+    def test_stress_test_reports_stages(self):
+        """Test that the stress test runs the rules and DB writer and reports each stage"""
+        try:
+            import ultralytics  # noqa: F401 (local_processor imports it)
+        except ImportError:
+            self.skipTest("ultralytics not installed")
+        config = SceneConfig(frames=30, violations=[{'type': 'wrong_way_violation', 'frame': 5}])
+        report = stress_test(config, render=False)
+        self.assertEqual(report['frames'], 30)
+        self.assertEqual(set(report['seconds']), {'generate', 'render', 'tracker', 'rules', 'db_insert'})
+        self.assertEqual(report['violations_expected'], {'wrong_way_violation': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from segment_processor import plan_segments, stitch_segments
+
+class TestSegmentProcessor(unittest.TestCase):
+
+    def test_segments_snap_to_keyframes(self):
+        """Test that cut points move to the nearest keyframe"""
+        segments = plan_segments(1000, 4, keyframes=[0, 240, 490, 760, 990])
+        self.assertEqual(segments, [(0, 240), (240, 490), (490, 760), (760, 1000)])
+
+    def test_segments_cover_video_without_keyframes(self):
+        """Test uniform split when no keyframe list is available"""
+        segments = plan_segments(900, 3)
+        self.assertEqual(segments, [(0, 300), (300, 600), (600, 900)])
+
+    def test_boundary_duplicate_is_dropped(self):
+        """Test that a vehicle reported on both sides of a cut is counted once"""
+        def violation(frame, bbox):
+            return {'type': 'red_light_violation', 'vehicle_type': 'car', 'frame': frame,
+                    'vehicle_position': bbox, 'image_path': f'/nonexistent/{frame}.jpg'}
+
+        segments = [(0, 300), (300, 600)]
+        results = {
+            0: [violation(270, [100, 300, 200, 380])],
+            1: [violation(300, [105, 305, 205, 385]), violation(330, [400, 300, 500, 380])]
+        }
+        merged = stitch_segments(results, segments)
+        self.assertEqual([v['frame'] for v in merged], [270, 330])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import subprocess
+import sys
+import os
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+SRC = os.path.join(ROOT, 'src')
+
+# Entry point module -> import-time budget in seconds. The UI framework itself
+# (its import time and whatever it imports on its own) is not counted against
+# the dashboard; everything the app adds on top is.
+ENTRY_POINTS = {
+    'free_dashboard': 0.5,
+    'archive_manager': 0.2,
+    'analyze_violations': 0.2,
+    'run_complete_analysis': 0.2,
+}
+FRAMEWORK_MODULES = ('streamlit',)
+
+# Packages that must only be imported on the code paths that use them
+HEAVY_MODULES = ('torch', 'ultralytics', 'easyocr', 'pandas', 'plotly', 'cv2', 'matplotlib', 'sklearn')
+
+def measure_import(module):
+    """Import a module in a fresh interpreter and return ({name: cumulative seconds}, stderr)
+
+    Raises ImportError if the module cannot be imported in this environment.
+    """
+    paths = [SRC, ROOT] + ([os.environ['PYTHONPATH']] if os.environ.get('PYTHONPATH') else [])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(paths))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, env=env, cwd=ROOT)
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times, result.stderr
+
+_framework_imports = None
+
+def framework_imports():
+    """Modules the UI framework imports by itself, measured once as a baseline"""
+    global _framework_imports
+    if _framework_imports is None:
+        _framework_imports = set()
+        for name in FRAMEWORK_MODULES:
+            try:
+                _framework_imports.update(measure_import(name)[0])
+            except ImportError:
+                pass
+    return _framework_imports
+
+def app_heavy_imports(times):
+    """Heavy packages imported at startup by the app rather than by the framework"""
+    return [name for name in HEAVY_MODULES if name in times and name not in framework_imports()]
+
+class TestStartupTime(unittest.TestCase):
+
+    def check_entry_point(self, module):
+        try:
+            times, _ = measure_import(module)
+        except ImportError as e:
+            self.skipTest(f"{module} not importable here: {e}")
+
+        loaded_heavy = app_heavy_imports(times)
+        self.assertEqual(loaded_heavy, [], f"{module} imports heavy packages at startup")
+
+        own_time = times[module] - sum(times.get(name, 0.0) for name in FRAMEWORK_MODULES)
+        self.assertLess(own_time, ENTRY_POINTS[module],
+                        f"{module} took {own_time:.3f}s to import (budget {ENTRY_POINTS[module]}s)")
+
+    def test_dashboard_startup(self):
+        """Test that the dashboard shell imports without the model stack"""
+        self.check_entry_point('free_dashboard')
+
+    def test_archive_manager_startup(self):
+        """Test that listing archives does not load analysis packages"""
+        self.check_entry_point('archive_manager')
+
+    def test_analyze_violations_startup(self):
+        """Test that the analysis CLI defers pandas until it runs"""
+        self.check_entry_point('analyze_violations')
+
+    def test_complete_analysis_startup(self):
+        """Test that the analysis runner defers each step's imports"""
+        self.check_entry_point('run_complete_analysis')
+
+if __name__ == '__main__':
+    # Print a budget table when run directly
+    for module, budget in ENTRY_POINTS.items():
+        try:
+            times, _ = measure_import(module)
+        except ImportError as e:
+            print(f"{module:24s} skipped ({e})")
+            continue
+        own_time = times[module] - sum(times.get(name, 0.0) for name in FRAMEWORK_MODULES)
+        heavy = app_heavy_imports(times)
+        print(f"{module:24s} {own_time * 1000:7.1f} ms  budget {budget * 1000:.0f} ms  heavy: {', '.join(heavy) or '-'}")
+    unittest.main()
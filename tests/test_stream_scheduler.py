@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from stream_scheduler import CameraStream, StreamScheduler
+from telemetry import REGISTRY
+
+class TestStreamScheduler(unittest.TestCase):
+
+    def setUp(self):
+        # Sources are never opened; frames are pushed straight into the stream queues
+        self.scheduler = StreamScheduler(batch_size=4, drift_db=None)
+        self.busy = self.scheduler.add_stream('busy.mp4', 'BUSY', queue_size=8)
+        self.quiet = self.scheduler.add_stream('quiet.mp4', 'QUIET', queue_size=8)
+        self.third = self.scheduler.add_stream('third.mp4', 'THIRD', queue_size=8)
+
+    def tearDown(self):
+        for stream in self.scheduler.streams:
+            stream.close()
+
+    def served(self):
+        return [(stream.camera_id, frame_num) for stream, frame_num, _ in self.scheduler._next_batch()]
+
+    def test_round_robin_batches(self):
+        """Test that each pass takes one frame per stream and the next batch resumes after the last stream served"""
+        for frame_num in range(5):
+            self.busy.push(frame_num, f"busy-{frame_num}")
+        self.quiet.push(0, "quiet-0")
+        self.third.push(0, "third-0")
+        self.third.push(1, "third-1")
+
+        self.assertEqual(self.served(), [('BUSY', 0), ('QUIET', 0), ('THIRD', 0), ('BUSY', 1)])
+        self.assertEqual(self.served(), [('THIRD', 1), ('BUSY', 2), ('BUSY', 3), ('BUSY', 4)])
+        self.assertEqual(self.served(), [])
+
+    def test_busy_stream_does_not_starve_others(self):
+        """Test that a stream with a full queue leaves room for a frame of every other stream in each batch"""
+        for round_num in range(10):
+            while len(self.busy.frames) < self.busy.frames.maxlen:
+                self.busy.push(round_num, "busy")
+            self.quiet.push(round_num, "quiet")
+            self.third.push(round_num, "third")
+
+            batch = self.served()
+            self.assertEqual(len(batch), 4)
+            self.assertIn(('QUIET', round_num), batch)
+            self.assertIn(('THIRD', round_num), batch)
+
+    def test_queue_drops_oldest(self):
+        """Test that a full stream queue drops its oldest frame and counts the drop"""
+        stream = CameraStream('fake.mp4', 'DROP', queue_size=2)
+        for frame_num in range(5):
+            stream.push(frame_num, f"frame-{frame_num}")
+
+        self.assertEqual(stream.dropped, 3)
+        self.assertEqual(stream.dropped_counter.get(), 3)
+        self.assertIn('traffic_stream_queue_depth{camera="DROP"} 2', REGISTRY.prometheus_text())
+        self.assertEqual(stream.pop(), (3, "frame-3"))
+        self.assertEqual(stream.pop(), (4, "frame-4"))
+        self.assertIsNone(stream.pop())
+
+        stream.close()
+        self.assertNotIn('camera="DROP"', REGISTRY.prometheus_text())
+
+if __name__ == '__main__':
+    unittest.main()
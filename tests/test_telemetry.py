@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import json
+import time
+from urllib.request import urlopen
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from telemetry import Registry, start_http_server
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_metrics_and_snapshot(self):
+        """Test that counters, gauges and histograms show up in the JSON snapshot"""
+        frames = self.registry.counter('frames_total', 'Frames')
+        frames.inc()
+        frames.inc(4)
+        depth = self.registry.gauge('queue_depth', 'Depth', camera='CAM_001')
+        depth.set_function(lambda: 7)
+        latency = self.registry.histogram('stage_seconds', 'Latency', stage='ocr')
+        for _ in range(90):
+            latency.observe(0.002)
+        for _ in range(10):
+            latency.observe(0.2)
+
+        self.assertIs(self.registry.counter('frames_total'), frames)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('frames_total')
+
+        metrics = self.registry.snapshot()['metrics']
+        self.assertEqual(metrics['frames_total']['values'], [{'labels': {}, 'value': 5}])
+        self.assertEqual(metrics['queue_depth']['values'], [{'labels': {'camera': 'CAM_001'}, 'value': 7}])
+        stats = metrics['stage_seconds']['values'][0]['value']
+        self.assertEqual(stats['count'], 100)
+        self.assertTrue(0.001 < stats['p50'] <= 0.0025)
+        self.assertTrue(0.1 < stats['p95'] <= 0.25)
+
+    def test_prometheus_text(self):
+        """Test cumulative histogram buckets and labels in the text exposition"""
+        latency = self.registry.histogram('stage_seconds', 'Latency', buckets=(0.1, 1.0), stage='inference')
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+        text = self.registry.prometheus_text()
+        self.assertIn('# TYPE stage_seconds histogram', text)
+        self.assertIn('stage_seconds_bucket{stage="inference",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="inference",le="1.0"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="inference",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="inference"} 3', text)
+
+    def test_recording_cost(self):
+        """Test that counting an event and observing a latency cost about as much as a bare attribute add"""
+        class Plain:
+            __slots__ = ('value',)
+
+            def __init__(self):
+                self.value = 0
+
+            def inc(self, amount=1):
+                self.value += amount
+
+        frames = self.registry.counter('frames_total')
+        latency = self.registry.histogram('stage_seconds', stage='rules')
+        plain = Plain()
+        events = 50000
+
+        def best_of(record):
+            # Relative to the same loop on a plain object, so machine speed cancels out
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                for _ in range(events):
+                    record()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        def record_metrics():
+            frames.inc()
+            latency.observe(0.003)
+
+        def record_plain():
+            plain.inc()
+            plain.inc()
+
+        self.assertLess(best_of(record_metrics), 5 * best_of(record_plain))
+
+    def test_unregister(self):
+        """Test that an unregistered gauge drops out of the snapshot and releases its function"""
+        frames = []
+        self.registry.gauge('queue_depth', camera='CAM_1').set_function(lambda: len(frames))
+        self.registry.gauge('queue_depth', camera='CAM_2').set(1)
+        self.registry.unregister('queue_depth', camera='CAM_1')
+        self.assertNotIn('CAM_1', self.registry.prometheus_text())
+        self.assertIn('queue_depth{camera="CAM_2"} 1', self.registry.prometheus_text())
+
+        self.registry.unregister('queue_depth', camera='CAM_2')
+        self.registry.unregister('missing_total')
+        self.assertNotIn('queue_depth', self.registry.prometheus_text())
+
+    def test_http_endpoint(self):
+        """Test that /metrics and /metrics.json serve the registry"""
+        self.registry.counter('frames_total', 'Frames').inc(3)
+        server = start_http_server(0, '127.0.0.1', registry=self.registry)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urlopen(base + '/metrics', timeout=5) as response:
+                self.assertIn('frames_total 3', response.read().decode())
+            with urlopen(base + '/metrics.json', timeout=5) as response:
+                snapshot = json.loads(response.read())
+            self.assertEqual(snapshot['metrics']['frames_total']['values'][0]['value'], 3)
+        finally:
+            server.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,6 +28,17 @@ class TestViolationDetection(unittest.TestCase):
         
         invalid = self.processor.is_valid_vehicle_detection([100, 100, 110, 105], 0.8, 2)
         self.assertFalse(invalid)
+    
+    def test_no_clip_without_stored_violation(self):
+        """Test that a violation whose evidence image fails to write starts no clip"""
+        from clip_buffer import ClipRingBuffer
+        self.processor.clip_buffer = ClipRingBuffer()
+        self.processor.write_violation_image = lambda violation, frame, timestamp: None
+        
+        violation = {'type': 'red_light_violation', 'vehicle_type': 'car', 'frame': 0}
+        self.processor.save_violation(violation, np.zeros((480, 640, 3), dtype=np.uint8), 1.0)
+        self.assertEqual(self.processor.clip_buffer.pending_clips, [])
+        self.assertNotIn('clip_path', violation)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file